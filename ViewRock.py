@@ -5,6 +5,35 @@ import math
 import webbrowser
 import random
 import time
+import os
+import json
+import bisect
+import re
+import mmap
+import struct
+from collections import Counter
+import heapq
+import tracemalloc
+import weakref
+import threading
+import queue
+import fnmatch
+import hashlib
+import zlib
+import tarfile
+import codecs
+import ast
+import operator
+import sys
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from collections import deque
+from collections import OrderedDict
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
 
 APP_NAME = "ViewRock OS"
 
@@ -22,7 +51,25 @@ theme = {
         "titlebar_fg": "#dddddd",
         "border_color": "#444466",
         "entry_bg": "#30304a",
-        "entry_fg": "#f0f0f0"
+        "entry_fg": "#f0f0f0",
+        "dock_bg": "#1a1a1a",
+        "dock_fg": "white"
+    },
+    "light": {
+        "bg": "#f4f4f8",
+        "fg": "#1e1e2f",
+        "btn_bg": "#e2e2ec",
+        "btn_fg": "#2a2a3a",
+        "active_bg": "#c9c9de",
+        "btn_hover_bg": "#b8b8d2",
+        "taskbar_bg": "#d8d8e4",
+        "titlebar_bg": "#e8e8f2",
+        "titlebar_fg": "#222233",
+        "border_color": "#a8a8c0",
+        "entry_bg": "#ffffff",
+        "entry_fg": "#111111",
+        "dock_bg": "#ececf2",
+        "dock_fg": "#1e1e2f"
     }
 }
 current_theme = "dark"
@@ -39,6 +86,9 @@ contacts_db = {}  # name -> {"username":..., "notes":...}
 # --- Installed apps store (persist in-memory) ---
 installed_apps = {}  # app_name -> open_func
 
+# --- On-disk data location ---
+DATA_DIR = os.path.join(os.path.expanduser("~"), ".viewrock")
+
 # --- Global for logged in user ---
 logged_in_user = None
 
@@ -49,33 +99,102 @@ root.geometry("1200x720")
 root.minsize(900, 600)
 
 # --- Gradient Background ---
-def draw_gradient(canvas, color1, color2):
-    width = root.winfo_width()
-    height = root.winfo_height()
-    if height <= 0:
-        return
+# Rendered gradients keyed by (width, height, color1, color2). Each entry is a full
+# screen-sized PhotoImage, so only the last few sizes are kept around.
+GRADIENT_CACHE_SIZE = 4
+gradient_cache = OrderedDict()
+
+def render_gradient(width, height, color1, color2):
+    key = (width, height, color1, color2)
+    img = gradient_cache.get(key)
+    if img is not None:
+        gradient_cache.move_to_end(key)
+        return img
     r1, g1, b1 = root.winfo_rgb(color1)
     r2, g2, b2 = root.winfo_rgb(color2)
     r_ratio = (r2 - r1) / max(height, 1)
     g_ratio = (g2 - g1) / max(height, 1)
     b_ratio = (b2 - b1) / max(height, 1)
 
-    canvas.delete("gradient")
+    # Build a single 1px wide column in one put() call, then let Tk tile it across
+    # the full width instead of issuing one call per row.
+    rows = []
     for i in range(height):
         nr = int(r1 + (r_ratio * i))
         ng = int(g1 + (g_ratio * i))
         nb = int(b1 + (b_ratio * i))
-        color = f'#{nr>>8:02x}{ng>>8:02x}{nb>>8:02x}'
-        canvas.create_line(0, i, width, i, tags=("gradient",), fill=color)
+        rows.append(f'{{#{nr>>8:02x}{ng>>8:02x}{nb>>8:02x}}}')
+    column = tk.PhotoImage(width=1, height=height)
+    column.put(" ".join(rows))
+    img = tk.PhotoImage(width=width, height=height)
+    img.tk.call(img, "copy", column, "-to", 0, 0, width, height)
+
+    gradient_cache[key] = img
+    while len(gradient_cache) > GRADIENT_CACHE_SIZE:
+        gradient_cache.popitem(last=False)
+    return img
+
+def draw_gradient(canvas, color1, color2):
+    width = root.winfo_width()
+    height = root.winfo_height()
+    if height <= 0 or width <= 0:
+        return
+    img = render_gradient(width, height, color1, color2)
+    items = canvas.find_withtag("gradient")
+    if items:
+        if canvas.itemcget(items[0], "image") != str(img):
+            canvas.itemconfig(items[0], image=img)
+    else:
+        canvas.create_image(0, 0, anchor="nw", image=img, tags=("gradient",))
+        canvas.tag_lower("gradient")
+    # Keep the shown image alive even if it gets evicted from the cache
+    canvas.gradient_image = img
 
 bg_canvas = tk.Canvas(root, highlightthickness=0)
 bg_canvas.pack(fill="both", expand=True)
 root.update()
 draw_gradient(bg_canvas, "#FF9800", "#BC4664")
 
-def on_resize(event):
+# --- Resize scheduling ---
+# <Configure> bound on root also fires for every child widget, so events not aimed
+# at root are dropped and bursts are collapsed into one relayout once the size settles.
+class ResizeScheduler:
+    def __init__(self, widget, relayout, delay=120):
+        self.widget = widget
+        self.relayout = relayout
+        self.delay = delay
+        self.pending_id = None
+        self.last_size = None
+        self.stats = {"suppressed": 0, "executed": 0}
+        widget.bind("<Configure>", self.on_configure)
+
+    def on_configure(self, event):
+        if event.widget is not self.widget:
+            return
+        if self.pending_id is not None:
+            self.widget.after_cancel(self.pending_id)
+            self.stats["suppressed"] += 1
+        elif (event.width, event.height) == self.last_size:
+            # Moves of the root window report an unchanged size
+            self.stats["suppressed"] += 1
+            return
+        self.pending_id = self.widget.after(self.delay, self.run)
+
+    def run(self):
+        self.pending_id = None
+        size = (self.widget.winfo_width(), self.widget.winfo_height())
+        if size == self.last_size:
+            self.stats["suppressed"] += 1
+            return
+        self.last_size = size
+        self.stats["executed"] += 1
+        self.relayout()
+
+def relayout_desktop():
     draw_gradient(bg_canvas, "#FF9800", "#BC4664")
-root.bind("<Configure>", on_resize)
+
+resize_scheduler = ResizeScheduler(root, relayout_desktop)
+resize_scheduler.last_size = (root.winfo_width(), root.winfo_height())
 
 # --- Fullscreen toggle for OS via topbar double click ---
 is_fullscreen = False
@@ -84,10 +203,134 @@ def toggle_fullscreen_os(event=None):
     is_fullscreen = not is_fullscreen
     root.attributes("-fullscreen", is_fullscreen)
 
+# --- Theme engine ---
+# Widgets are registered with a role, which maps widget options to theme keys. Apps
+# don't register their widgets one by one: after an app is built its content tree is
+# scanned and every option whose current color matches a theme key gets bound to that
+# key. Switching themes restyles everything in one pass and skips widgets whose
+# resolved style did not change.
+ROLE_STYLES = {
+    "border": {"bg": "border_color"},
+    "titlebar": {"bg": "titlebar_bg"},
+    "titlebar_text": {"bg": "titlebar_bg", "fg": "titlebar_fg"},
+    "content": {"bg": "bg"},
+    "button": {"bg": "btn_bg", "fg": "btn_fg", "activebackground": "active_bg"},
+    "entry": {"bg": "entry_bg", "fg": "entry_fg", "insertbackground": "entry_fg"},
+    "taskbar": {"bg": "taskbar_bg"},
+    "dock": {"bg": "dock_bg"},
+    "dock_button": {"bg": "dock_bg", "fg": "dock_fg"},
+}
+# Options and theme keys considered when scanning app content, and the role a widget
+# gets from the theme key of its background
+THEMED_OPTIONS = ("bg", "fg", "activebackground", "insertbackground", "selectbackground")
+CONTENT_KEYS = ("bg", "fg", "btn_bg", "btn_fg", "active_bg", "entry_bg", "entry_fg", "titlebar_bg", "titlebar_fg")
+BG_ROLES = {"bg": "content", "btn_bg": "button", "active_bg": "button", "entry_bg": "entry",
+            "titlebar_bg": "titlebar"}
+
+class ThemeRegistry:
+    def __init__(self):
+        self.entries = {}  # widget path -> [widget, role, {option: theme key}, applied style]
+        self.hooks = []  # callables(theme_name) for widgets that style themselves
+        self.stats = {"restyled": 0, "skipped": 0}
+
+    def register(self, widget, role, mapping=None):
+        mapping = mapping or ROLE_STYLES[role]
+        self.entries[str(widget)] = [widget, role, mapping, self.resolve(mapping, current_theme)]
+
+    def register_tree(self, parent):
+        t = theme[current_theme]
+        for w in parent.winfo_children():
+            if str(w) not in self.entries:
+                options = w.keys()
+                mapping = {}
+                for opt in THEMED_OPTIONS:
+                    if opt in options:
+                        value = str(w.cget(opt))
+                        for key in CONTENT_KEYS:
+                            if t[key] == value:
+                                mapping[opt] = key
+                                break
+                if mapping:
+                    role = BG_ROLES.get(mapping.get("bg"), "content")
+                    self.register(w, role, mapping)
+            self.register_tree(w)
+
+    def forget(self, widget, children_only=False):
+        prefix = str(widget) + "."
+        for path in [p for p in self.entries if p.startswith(prefix) or (not children_only and p == str(widget))]:
+            del self.entries[path]
+
+    def by_role(self, role):
+        return [e[0] for e in self.entries.values() if e[1] == role]
+
+    def resolve(self, mapping, name):
+        t = theme[name]
+        return tuple((opt, t[key]) for opt, key in mapping.items())
+
+    def apply(self, name):
+        global current_theme
+        current_theme = name
+        for path, entry in list(self.entries.items()):
+            widget, role, mapping, applied = entry
+            style = self.resolve(mapping, name)
+            if style == applied:
+                self.stats["skipped"] += 1
+                continue
+            try:
+                widget.configure(**dict(style))
+            except tk.TclError:
+                # widget was destroyed without being forgotten
+                del self.entries[path]
+                continue
+            entry[3] = style
+            self.stats["restyled"] += 1
+        for hook in self.hooks:
+            hook(name)
+        # All configure calls above are only redrawn once Tk goes idle: one repaint
+        root.update_idletasks()
+
+theme_registry = ThemeRegistry()
+
+# --- Hover styling ---
+# One class binding serves every hoverable widget instead of two lambdas (and two Tcl
+# commands) per widget. A widget opts in by getting the HOVER_TAG bindtag; its colors
+# are read from widget.hover_colors = (hover, normal), given either as theme keys or as
+# literal colors. Canvas widgets recolor widget.hover_item instead of their background.
+HOVER_TAG = "ViewRockHover"
+
+def enable_hover(widget, hover="active_bg", normal="btn_bg", item=None):
+    widget.hover_colors = (hover, normal)
+    widget.hover_item = item
+    tags = widget.bindtags()
+    if HOVER_TAG not in tags:
+        widget.bindtags((tags[0], HOVER_TAG) + tags[1:])
+
+def on_hover(event, index):
+    w = event.widget
+    colors = getattr(w, "hover_colors", None)
+    if colors is None:
+        return
+    color = theme[current_theme].get(colors[index], colors[index])
+    if w.hover_item is None:
+        w.configure(bg=color)
+    else:
+        w.itemconfig(w.hover_item, fill=color)
+
+root.bind_class(HOVER_TAG, "<Enter>", lambda e: on_hover(e, 0))
+root.bind_class(HOVER_TAG, "<Leave>", lambda e: on_hover(e, 1))
+
 # --- Custom App Window ---
 class AppWindow(tk.Toplevel):
-    def __init__(self, master, title, emoji):
+    # Dragging applies at most one geometry update per frame at this rate. With
+    # drag_outline only a lightweight outline follows the pointer and the real
+    # window is placed on release.
+    drag_fps = 60
+    drag_outline = False
+
+    def __init__(self, master, title, emoji, build=None, hidden=False):
         super().__init__(master)
+        if hidden:
+            self.withdraw()
         self.master = master
         self.title_text = title
         self.emoji = emoji
@@ -95,6 +338,10 @@ class AppWindow(tk.Toplevel):
         self.is_minimized = False
         self.is_maximized = False
         self.old_geometry = None
+        # Lazy content: build_content(win) fills content_frame on first show()
+        self.build_content = build
+        self.is_built = False
+        self.app_name = None  # set when launched through the app registry
 
         self.overrideredirect(True)  # Remove native window decorations
         self.geometry("600x450")
@@ -123,56 +370,144 @@ class AppWindow(tk.Toplevel):
         self.btn_close.pack(side="right", padx=btn_padx)
         self.btn_close_circle = self.btn_close.create_oval(2, 2, btn_size-2, btn_size-2, fill="#ff5f56", outline="")
         self.btn_close.bind("<Button-1>", lambda e: self.close_window())
-        self.btn_close.bind("<Enter>", lambda e: self.btn_close.itemconfig(self.btn_close_circle, fill="#ff3b30"))
-        self.btn_close.bind("<Leave>", lambda e: self.btn_close.itemconfig(self.btn_close_circle, fill="#ff5f56"))
+        enable_hover(self.btn_close, "#ff3b30", "#ff5f56", item=self.btn_close_circle)
 
         self.btn_maximize = tk.Canvas(self.title_bar, width=btn_size, height=btn_size, bg=theme[self.current_theme]["titlebar_bg"], highlightthickness=0)
         self.btn_maximize.pack(side="right", padx=btn_padx)
         self.btn_maximize_circle = self.btn_maximize.create_oval(2, 2, btn_size-2, btn_size-2, fill="#ffbd2e", outline="")
         self.btn_maximize.bind("<Button-1>", lambda e: self.toggle_maximize())
-        self.btn_maximize.bind("<Enter>", lambda e: self.btn_maximize.itemconfig(self.btn_maximize_circle, fill="#fabb00"))
-        self.btn_maximize.bind("<Leave>", lambda e: self.btn_maximize.itemconfig(self.btn_maximize_circle, fill="#ffbd2e"))
+        enable_hover(self.btn_maximize, "#fabb00", "#ffbd2e", item=self.btn_maximize_circle)
 
         self.btn_minimize = tk.Canvas(self.title_bar, width=btn_size, height=btn_size, bg=theme[self.current_theme]["titlebar_bg"], highlightthickness=0)
         self.btn_minimize.pack(side="right", padx=btn_padx)
         self.btn_minimize_circle = self.btn_minimize.create_oval(2, 2, btn_size-2, btn_size-2, fill="#27c93f", outline="")
         self.btn_minimize.bind("<Button-1>", lambda e: self.minimize_window())
-        self.btn_minimize.bind("<Enter>", lambda e: self.btn_minimize.itemconfig(self.btn_minimize_circle, fill="#12b91d"))
-        self.btn_minimize.bind("<Leave>", lambda e: self.btn_minimize.itemconfig(self.btn_minimize_circle, fill="#27c93f"))
+        enable_hover(self.btn_minimize, "#12b91d", "#27c93f", item=self.btn_minimize_circle)
 
         # Content frame
         self.content_frame = tk.Frame(self.frame, bg=theme[self.current_theme]["bg"])
         self.content_frame.pack(fill="both", expand=True)
 
+        theme_registry.register(self, "border")
+        theme_registry.register(self.frame, "border")
+        theme_registry.register(self.title_bar, "titlebar")
+        theme_registry.register(self.title_label, "titlebar_text")
+        for circle in (self.btn_close, self.btn_maximize, self.btn_minimize):
+            theme_registry.register(circle, "titlebar")
+        theme_registry.register(self.content_frame, "content")
+
         # Dragging variables
         self._offset_x = 0
         self._offset_y = 0
+        self._drag_pos = None
+        self._drag_after_id = None
+        self._drag_outline_win = None
 
         # Bind dragging events
         self.title_bar.bind("<ButtonPress-1>", self.start_move)
         self.title_bar.bind("<ButtonRelease-1>", self.stop_move)
         self.title_bar.bind("<B1-Motion>", self.do_move)
 
+        if not hidden:
+            self.lift()
+            self.after(10, lambda: self.focus_force())
+
+    def build(self):
+        if self.build_content:
+            self.build_content(self)
+
+    def ensure_built(self):
+        if not self.is_built:
+            try:
+                self.build()
+            except Exception:
+                # Leave no half-built content behind; the next show() builds from scratch
+                for child in self.content_frame.winfo_children():
+                    child.destroy()
+                raise
+            self.is_built = True
+            theme_registry.register_tree(self.content_frame)
+
+    def destroy(self):
+        theme_registry.forget(self)
+        super().destroy()
+
+    def show(self):
+        self.ensure_built()
+        self.is_minimized = False
+        self.deiconify()
         self.lift()
         self.after(10, lambda: self.focus_force())
+        self.resume()
+        if taskbar:
+            taskbar.add_window(self)
+
+    def suspend(self):
+        # Called before the window is parked in the pool; stop anything running
+        pass
+
+    def resume(self):
+        # Called every time the window is shown
+        pass
+
+    def reset_shell(self, title, emoji, build):
+        theme_registry.forget(self.content_frame, children_only=True)
+        for w in self.content_frame.winfo_children():
+            w.destroy()
+        self.title_text = title
+        self.emoji = emoji
+        self.title_label.configure(text=f"{emoji} {title}")
+        self.build_content = build
+        self.is_built = False
 
     def start_move(self, event):
         self._offset_x = event.x
         self._offset_y = event.y
+        self._drag_pos = None
+        if self.drag_outline:
+            outline = tk.Toplevel(self.master, bg=theme[current_theme]["border_color"])
+            outline.overrideredirect(True)
+            try:
+                outline.attributes("-alpha", 0.4)
+            except tk.TclError:
+                pass
+            outline.geometry(f"{self.winfo_width()}x{self.winfo_height()}+{self.winfo_x()}+{self.winfo_y()}")
+            outline.lift()
+            self._drag_outline_win = outline
 
     def stop_move(self, event):
+        if self._drag_after_id is not None:
+            self.after_cancel(self._drag_after_id)
+            self._drag_after_id = None
+        if self._drag_pos is not None:
+            x, y = self._drag_pos
+            self.geometry(f"+{x}+{y}")
+        if self._drag_outline_win is not None:
+            self._drag_outline_win.destroy()
+            self._drag_outline_win = None
+        self._drag_pos = None
         self._offset_x = 0
         self._offset_y = 0
 
     def do_move(self, event):
-        x = self.winfo_pointerx() - self._offset_x
-        y = self.winfo_pointery() - self._offset_y
-        self.geometry(f"+{x}+{y}")
+        # Only remember the latest pointer position; the move itself is applied once per frame
+        self._drag_pos = (event.x_root - self._offset_x, event.y_root - self._offset_y)
+        if self._drag_after_id is None:
+            self._drag_after_id = self.after(max(1, int(1000 / self.drag_fps)), self.apply_drag)
+
+    def apply_drag(self):
+        self._drag_after_id = None
+        if self._drag_pos is None:
+            return
+        x, y = self._drag_pos
+        target = self._drag_outline_win or self
+        target.geometry(f"+{x}+{y}")
 
     def close_window(self):
-        self.destroy()
         if taskbar:
             taskbar.remove_window(self)
+        if not window_pool.release(self):
+            self.destroy()
 
     def minimize_window(self):
         self.is_minimized = True
@@ -206,7 +541,11 @@ class Taskbar(tk.Frame):
     def __init__(self, master):
         super().__init__(master, bg=theme[current_theme]["taskbar_bg"], height=35)
         self.pack(side="bottom", fill="x")
+        theme_registry.register(self, "taskbar")
+        theme_registry.hooks.append(lambda name: self.update_taskbar_buttons())
         self.windows = []
+        self.buttons = {}  # window -> taskbar button
+        self.button_state = {}  # window -> (text, bg, fg) last applied to its button
 
     def add_window(self, win):
         if win not in self.windows:
@@ -218,33 +557,165 @@ class Taskbar(tk.Frame):
             self.windows.remove(win)
         self.update_taskbar_buttons()
 
-    def update_taskbar_buttons(self):
-        for widget in self.winfo_children():
-            widget.destroy()
-        for win in self.windows:
-            if not isinstance(win, AppWindow):
-                continue
-            text = win.title_text
-            state = " (minimized)" if win.is_minimized else ""
-            btn_bg = theme[current_theme]["active_bg"] if not win.is_minimized else theme[current_theme]["btn_bg"]
-            btn = tk.Button(self, text=text + state, bg=btn_bg, fg=theme[current_theme]["btn_fg"],
-                            relief="flat", font=FONT, padx=10, pady=3, cursor="hand2")
-            btn.pack(side="left", padx=2, pady=2)
-
-            def handler(w=win):
-                if w.is_minimized:
-                    w.deiconify()
-                    w.is_minimized = False
-                    w.lift()
-                    w.focus_force()
-                else:
-                    w.minimize_window()
+    def button_style(self, win):
+        t = theme[current_theme]
+        state = " (minimized)" if win.is_minimized else ""
+        btn_bg = t["active_bg"] if not win.is_minimized else t["btn_bg"]
+        return (win.title_text + state, btn_bg, t["btn_fg"])
 
-            btn.configure(command=handler)
+    def update_taskbar_buttons(self):
+        # Reconcile buttons against self.windows: only buttons whose window went away
+        # are destroyed, only new windows get a button and only changed state is restyled.
+        live = [w for w in self.windows if isinstance(w, AppWindow)]
+        live_set = set(live)
+        for win in [w for w in self.buttons if w not in live_set]:
+            self.buttons.pop(win).destroy()
+            self.button_state.pop(win, None)
+
+        for win in live:
+            style = self.button_style(win)
+            btn = self.buttons.get(win)
+            if btn is None:
+                text, btn_bg, btn_fg = style
+                # New windows are appended to self.windows, so packing at the end keeps order stable
+                btn = tk.Button(self, text=text, bg=btn_bg, fg=btn_fg, relief="flat", font=FONT,
+                                padx=10, pady=3, cursor="hand2", command=lambda w=win: self.toggle_window(w))
+                btn.pack(side="left", padx=2, pady=2)
+                self.buttons[win] = btn
+            elif self.button_state.get(win) != style:
+                text, btn_bg, btn_fg = style
+                btn.configure(text=text, bg=btn_bg, fg=btn_fg)
+            self.button_state[win] = style
+
+    def toggle_window(self, w):
+        if w.is_minimized:
+            w.deiconify()
+            w.is_minimized = False
+            w.lift()
+            w.focus_force()
+            self.update_taskbar_buttons()
+        else:
+            w.minimize_window()
 
 taskbar = Taskbar(root)
 
 
+# --- Tick scheduler ---
+# All periodic jobs (clock, call timers, animations) share one after() chain. Due times
+# are kept on the monotonic clock and advanced by whole intervals, so jobs don't drift
+# and missed ticks are skipped rather than replayed. Jobs falling due within the same
+# tick run together, and a job stops by itself once its owner widget is destroyed or
+# when its callback returns False.
+class TickJob:
+    def __init__(self, name, interval, func, owner, due):
+        self.name = name
+        self.interval = interval
+        self.func = func
+        self.owner = owner
+        self.due = due
+        self.cancelled = False
+        self.stats = {"runs": 0, "total_ms": 0.0, "max_ms": 0.0, "max_late_ms": 0.0, "skipped": 0, "errors": 0}
+
+class TickScheduler:
+    def __init__(self, widget, tick_ms=10):
+        self.widget = widget
+        self.tick = tick_ms / 1000
+        self.queue = []  # heap of (due, seq, job)
+        self.jobs = []
+        self.seq = 0
+        self.after_id = None
+        self.wake_at = None
+
+    def every(self, interval_ms, func, owner=None, name=None, delay_ms=None):
+        interval = interval_ms / 1000
+        delay = interval if delay_ms is None else delay_ms / 1000
+        job = TickJob(name or getattr(func, "__name__", "job"), interval, func, owner, time.monotonic() + delay)
+        self.jobs.append(job)
+        self.push(job)
+        return job
+
+    def cancel(self, job):
+        if job is not None and not job.cancelled:
+            job.cancelled = True
+            self.jobs.remove(job)
+
+    def push(self, job):
+        self.seq += 1
+        heapq.heappush(self.queue, (job.due, self.seq, job))
+        self.wake(job.due)
+
+    def wake(self, due):
+        if self.after_id is not None and self.wake_at <= due:
+            return
+        if self.after_id is not None:
+            self.widget.after_cancel(self.after_id)
+        delay_ms = max(0, int(math.ceil((due - time.monotonic()) * 1000)))
+        self.wake_at = due
+        self.after_id = self.widget.after(delay_ms, self.run)
+
+    def owner_alive(self, job):
+        if job.owner is None:
+            return True
+        try:
+            return bool(job.owner.winfo_exists())
+        except tk.TclError:
+            return False
+
+    def run(self):
+        # A job that raises is reported like any Tk callback error and must not stop the
+        # others: one whose widgets are gone (TclError) is dropped, anything else runs
+        # again next interval, and the next wake is armed whatever happened
+        self.after_id = None
+        now = time.monotonic()
+        horizon = now + self.tick / 2
+        try:
+            while self.queue and self.queue[0][0] <= horizon:
+                due, _, job = heapq.heappop(self.queue)
+                if job.cancelled:
+                    continue
+                if not self.owner_alive(job):
+                    self.cancel(job)
+                    continue
+                st = job.stats
+                started = time.monotonic()
+                try:
+                    keep = job.func()
+                except Exception as e:
+                    st["errors"] += 1
+                    self.widget.report_callback_exception(type(e), e, e.__traceback__)
+                    keep = not isinstance(e, tk.TclError)
+                elapsed = (time.monotonic() - started) * 1000
+                st["runs"] += 1
+                st["total_ms"] += elapsed
+                st["max_ms"] = max(st["max_ms"], elapsed)
+                st["max_late_ms"] = max(st["max_late_ms"], (now - due) * 1000)
+                if keep is False or job.cancelled:
+                    self.cancel(job)
+                    continue
+                job.due = due + job.interval
+                if job.due <= now:
+                    missed = int((now - job.due) // job.interval) + 1
+                    st["skipped"] += missed
+                    job.due += missed * job.interval
+                self.push(job)
+        finally:
+            while self.queue and self.queue[0][2].cancelled:
+                heapq.heappop(self.queue)
+            if self.queue and self.after_id is None:
+                self.wake(self.queue[0][0])
+
+    def report(self):
+        lines = []
+        for job in self.jobs:
+            st = job.stats
+            avg = st["total_ms"] / st["runs"] if st["runs"] else 0.0
+            lines.append(f"{job.name}: every {job.interval * 1000:.0f} ms runs={st['runs']} avg={avg:.2f} ms "
+                         f"max={st['max_ms']:.2f} ms late<={st['max_late_ms']:.1f} ms skipped={st['skipped']} "
+                         f"errors={st['errors']}")
+        return lines
+
+tick_scheduler = TickScheduler(root)
+
 topbar = tk.Frame(root, bg="#2e2e2e", height=32)
 topbar.place(relx=0, rely=0, relwidth=1)
 
@@ -258,28 +729,663 @@ clock_label.pack(side="right", padx=12)
 def update_clock():
     now = datetime.datetime.now().strftime("%a %H:%M:%S")
     clock_label.config(text=now)
-    root.after(1000, update_clock)
 
 update_clock()
+tick_scheduler.every(1000, update_clock, owner=clock_label, name="clock")
 
 
-dock_frame = tk.Frame(root, bg="#1a1a1a", height=70)
+dock_frame = tk.Frame(root, bg=theme[current_theme]["dock_bg"], height=70)
 dock_frame.place(relx=0.5, rely=1.0, anchor="s", y=-10)
+theme_registry.register(dock_frame, "dock")
+
+# --- App registry & window pool ---
+# Apps register a builder (or an AppWindow subclass as factory) under their window
+# title. Launching goes through the pool: a closed app is parked with its widget tree
+# intact and simply re-shown, and closed plain AppWindows are kept as empty shells
+# that the next launch of any app can reuse.
+app_registry = {}  # app name -> {"emoji", "build", "factory", "keep_alive"}
+
+def register_app(name, emoji, build=None, factory=None, keep_alive=True):
+    app_registry[name] = {"emoji": emoji, "build": build, "factory": factory, "keep_alive": keep_alive}
+
+def count_widgets(widget):
+    return 1 + sum(count_widgets(w) for w in widget.winfo_children())
+
+class WindowPool:
+    # Parked windows are bounded both by count and by their total widget count, which
+    # is what a built app actually costs in Tk memory.
+    def __init__(self, max_parked=6, max_shells=4, max_parked_widgets=1500):
+        self.max_parked = max_parked
+        self.max_shells = max_shells
+        self.max_parked_widgets = max_parked_widgets
+        self.parked = OrderedDict()  # app name -> [parked windows], least recently parked first
+        self.shells = []
+        self.rank = None  # optional app name -> score; the lowest ranked app is evicted first
+        self.last_source = None  # "parked", "shell" or "new" for the last acquire()
+        self.stats = {"created": 0, "parked_hits": 0, "shell_hits": 0, "evicted": 0}
+
+    def parked_count(self):
+        return sum(len(wins) for wins in self.parked.values())
+
+    def parked_widgets(self):
+        return sum(win.widget_cost for wins in self.parked.values() for win in wins)
+
+    def take_parked(self, name):
+        wins = self.parked.get(name)
+        if not wins:
+            return None
+        win = wins.pop()
+        if not wins:
+            del self.parked[name]
+        return win
+
+    def acquire(self, name, hidden=True):
+        spec = app_registry[name]
+        win = self.take_parked(name)
+        if win is not None:
+            self.stats["parked_hits"] += 1
+            self.last_source = "parked"
+            return win
+        if spec["factory"] is None and self.shells:
+            win = self.shells.pop()
+            win.reset_shell(name, spec["emoji"], spec["build"])
+            self.stats["shell_hits"] += 1
+            self.last_source = "shell"
+        elif spec["factory"] is not None:
+            win = spec["factory"](root, hidden=hidden)
+            self.stats["created"] += 1
+            self.last_source = "new"
+        else:
+            win = AppWindow(root, name, spec["emoji"], build=spec["build"], hidden=hidden)
+            self.stats["created"] += 1
+            self.last_source = "new"
+        win.app_name = name
+        return win
+
+    def victim(self):
+        if self.rank:
+            return min(self.parked, key=self.rank)
+        return next(iter(self.parked))
+
+    def park(self, win):
+        win.widget_cost = count_widgets(win)
+        if self.max_parked <= 0 or win.widget_cost > self.max_parked_widgets:
+            return self.recycle(win)
+        while self.parked and (self.parked_count() >= self.max_parked or
+                               self.parked_widgets() + win.widget_cost > self.max_parked_widgets):
+            self.stats["evicted"] += 1
+            self.recycle(self.take_parked(self.victim()))
+        win.withdraw()
+        self.parked.setdefault(win.app_name, []).append(win)
+        self.parked.move_to_end(win.app_name)
+        return True
+
+    def recycle(self, win):
+        # Keep plain AppWindows around as empty shells, destroy everything else
+        if type(win) is AppWindow and len(self.shells) < self.max_shells:
+            win.withdraw()
+            win.reset_shell("", "", None)
+            self.shells.append(win)
+            return True
+        win.destroy()
+        return False
+
+    def release(self, win):
+        spec = app_registry.get(win.app_name)
+        if spec is None:
+            return False
+        win.suspend()
+        if spec["keep_alive"]:
+            return self.park(win)
+        if type(win) is AppWindow and len(self.shells) < self.max_shells:
+            return self.recycle(win)
+        return False
+
+window_pool = WindowPool()
+
+# --- Launch statistics & pre-warming ---
+# Every launch updates a decayed frequency score per app ("frecency"). When Tk is idle,
+# hidden instances of the top scored apps are built and parked in the pool so that
+# launching them only has to deiconify.
+class LaunchStats:
+    def __init__(self, half_life=1800):
+        self.half_life = half_life  # seconds for a launch to lose half its weight
+        self.apps = {}  # app name -> {"count", "last", "score", "hits", "misses", "hit_time", "miss_time"}
+
+    def record(self, name, hit, latency):
+        now = time.time()
+        a = self.apps.setdefault(name, {"count": 0, "last": now, "score": 0.0, "hits": 0,
+                                        "misses": 0, "hit_time": 0.0, "miss_time": 0.0})
+        a["score"] = self.score(name, now) + 1
+        a["count"] += 1
+        a["last"] = now
+        if hit:
+            a["hits"] += 1
+            a["hit_time"] += latency
+        else:
+            a["misses"] += 1
+            a["miss_time"] += latency
+
+    def score(self, name, now=None):
+        a = self.apps.get(name)
+        if a is None:
+            return 0.0
+        now = time.time() if now is None else now
+        return a["score"] * 0.5 ** ((now - a["last"]) / self.half_life)
+
+    def top(self, n):
+        ranked = sorted(self.apps, key=self.score, reverse=True)
+        return ranked[:n]
+
+    def report(self):
+        lines = []
+        for name in sorted(self.apps, key=self.score, reverse=True):
+            a = self.apps[name]
+            hit_ms = a["hit_time"] / a["hits"] * 1000 if a["hits"] else 0.0
+            miss_ms = a["miss_time"] / a["misses"] * 1000 if a["misses"] else 0.0
+            lines.append(f"{name}: launches={a['count']} score={self.score(name):.2f} "
+                         f"hits={a['hits']} ({hit_ms:.1f} ms) misses={a['misses']} ({miss_ms:.1f} ms)")
+        return lines
+
+class Prewarmer:
+    def __init__(self, pool, stats, top_n=3):
+        self.pool = pool
+        self.stats = stats
+        self.top_n = top_n
+        self.enabled = True
+        self.pending_id = None
+        pool.rank = stats.score
+
+    def schedule(self):
+        if self.enabled and self.pending_id is None:
+            self.pending_id = root.after_idle(self.warm_next)
+
+    def warm_next(self):
+        # Build at most one app per idle slot so input is never blocked for long
+        self.pending_id = None
+        for name in self.stats.top(self.top_n):
+            if name in self.pool.parked or name not in app_registry:
+                continue
+            if self.pool.parked_count() >= self.pool.max_parked:
+                weakest = self.pool.victim()
+                if self.stats.score(weakest) >= self.stats.score(name):
+                    return
+            win = self.pool.acquire(name, hidden=True)
+            win.ensure_built()
+            if self.pool.park(win):
+                self.schedule()
+            return
+
+launch_stats = LaunchStats()
+prewarmer = Prewarmer(window_pool, launch_stats)
+
+def launch_app(name):
+    started = time.perf_counter()
+    win = window_pool.acquire(name)
+    hit = window_pool.last_source == "parked"
+    try:
+        win.show()
+    except Exception:
+        win.destroy()
+        raise
+    win.update_idletasks()
+    launch_stats.record(name, hit, time.perf_counter() - started)
+    prewarmer.schedule()
+    return win
+
+# --- Window cost measurement ---
+def tcl_command_count():
+    return len(root.tk.splitlist(root.tk.call("info", "commands")))
+
+def legacy_hover_cost(samples=20):
+    # What per-widget <Enter>/<Leave> lambdas used to cost, measured on scratch buttons
+    probe = tk.Frame(root)
+    buttons = [tk.Button(probe) for _ in range(samples)]
+    cmds = tcl_command_count()
+    mem = tracemalloc.get_traced_memory()[0]
+    for b in buttons:
+        b.bind("<Enter>", lambda e, b=b: b.configure(bg=theme[current_theme]["active_bg"]))
+        b.bind("<Leave>", lambda e, b=b: b.configure(bg=theme[current_theme]["btn_bg"]))
+    cost = ((tcl_command_count() - cmds) / samples, (tracemalloc.get_traced_memory()[0] - mem) / samples)
+    probe.destroy()
+    return cost
+
+def measure_window_cost(name):
+    started = not tracemalloc.is_tracing()
+    if started:
+        tracemalloc.start()
+    try:
+        cmds = tcl_command_count()
+        mem = tracemalloc.get_traced_memory()[0]
+        spec = app_registry[name]
+        if spec["factory"]:
+            win = spec["factory"](root, hidden=True)
+        else:
+            win = AppWindow(root, name, spec["emoji"], build=spec["build"], hidden=True)
+        win.ensure_built()
+        win.update_idletasks()
+        result = {"widgets": count_widgets(win),
+                  "tcl_commands": tcl_command_count() - cmds,
+                  "python_bytes": tracemalloc.get_traced_memory()[0] - mem}
+        hover_widgets = [w for w in iter_widgets(win) if getattr(w, "hover_colors", None)]
+        cmds_each, bytes_each = legacy_hover_cost()
+        result["hover_widgets"] = len(hover_widgets)
+        result["tcl_commands_saved"] = int(cmds_each * len(hover_widgets))
+        result["python_bytes_saved"] = int(bytes_each * len(hover_widgets))
+        win.destroy()
+        return result
+    finally:
+        if started:
+            tracemalloc.stop()
+
+def iter_widgets(widget):
+    yield widget
+    for w in widget.winfo_children():
+        yield from iter_widgets(w)
 
 # --- Utility: safe font widget config
 def apply_button_styles(btn, t):
     btn.configure(bg=t["btn_bg"], fg=t["btn_fg"], font=FONT, relief="flat", cursor="hand2")
-    btn.bind("<Enter>", lambda e, b=btn: b.configure(bg=t["active_bg"]))
-    btn.bind("<Leave>", lambda e, b=btn: b.configure(bg=t["btn_bg"]))
+    enable_hover(btn)
+
+# --- Virtual list ---
+# A list view over any sequence that only materializes the rows that fit on screen.
+# A fixed pool of row widgets is refilled from items[first:first + visible] whenever the
+# list scrolls or its items change, so cost depends on the view height, not on the item
+# count. Rows are plain Labels by default; make_row(parent) / fill_row(row, item,
+# selected) build richer rows such as Store cards. Selection follows the Listbox API
+# (curselection / get) so existing code keeps working.
+virtual_lists = weakref.WeakSet()
+
+class VirtualList(tk.Frame):
+    def __init__(self, master, items=(), row_height=22, make_row=None, fill_row=None, text=str, font=FONT):
+        t = theme[current_theme]
+        super().__init__(master, bg=t["bg"])
+        self.items = items
+        self.row_height = row_height
+        self.make_row = make_row or self.make_label_row
+        self.fill_row = fill_row or self.fill_label_row
+        self.custom_rows = make_row is not None
+        self.text = text
+        self.font = font
+        self.first = 0
+        self.rows = []
+        self.visible = 0
+        self.selected = None
+        self.selected_item = None
+        self.on_select = None
+        self.on_activate = None
+
+        self.scrollbar = tk.Scrollbar(self, command=self.yview)
+        self.scrollbar.pack(side="right", fill="y")
+        self.body = tk.Frame(self, bg=t["entry_bg"] if not self.custom_rows else t["bg"])
+        self.body.pack(side="left", fill="both", expand=True)
+        self.body.bind("<Configure>", lambda e: self.layout())
+        self.bind_wheel(self.body)
+        virtual_lists.add(self)
+
+    def make_label_row(self, parent):
+        return tk.Label(parent, anchor="w", font=self.font, padx=4)
+
+    def fill_label_row(self, row, item, selected):
+        t = theme[current_theme]
+        row.configure(text=self.text(item), bg=t["active_bg"] if selected else t["entry_bg"], fg=t["entry_fg"])
+
+    def bind_wheel(self, widget):
+        widget.bind("<MouseWheel>", self.on_wheel)
+        widget.bind("<Button-4>", lambda e: self.scroll(-3))
+        widget.bind("<Button-5>", lambda e: self.scroll(3))
+
+    def bind_row(self, widget, row):
+        self.bind_wheel(widget)
+        widget.bind("<Button-1>", lambda e: self.click(row), add="+")
+        widget.bind("<Double-Button-1>", lambda e: self.activate(row), add="+")
+        for child in widget.winfo_children():
+            self.bind_row(child, row)
+
+    def layout(self):
+        needed = max(1, self.body.winfo_height() // self.row_height + 1)
+        created = False
+        while len(self.rows) < needed:
+            row = self.make_row(self.body)
+            row.item_index = None
+            row.item = None
+            row.shown = False
+            self.bind_row(row, row)
+            self.rows.append(row)
+            created = True
+        if created and self.custom_rows:
+            theme_registry.register_tree(self.body)
+        self.visible = needed
+        self.refresh()
+
+    def set_items(self, items, keep_position=False):
+        self.items = items
+        if not keep_position:
+            self.first = 0
+        self.refresh()
+
+    def refresh(self):
+        n = len(self.items)
+        full = max(1, self.visible - 1)
+        self.first = max(0, min(self.first, n - full))
+        sel = self.curselection()
+        for i, row in enumerate(self.rows):
+            idx = self.first + i
+            if i < self.visible and idx < n:
+                row.item_index = idx
+                row.item = self.items[idx]
+                self.fill_row(row, row.item, sel == (idx,))
+                if not row.shown:
+                    row.place(x=0, y=i * self.row_height, relwidth=1, height=self.row_height)
+                    row.shown = True
+            elif row.shown:
+                row.place_forget()
+                row.shown = False
+                row.item_index = row.item = None
+        if n:
+            self.scrollbar.set(self.first / n, min(1.0, (self.first + full) / n))
+        else:
+            self.scrollbar.set(0, 1)
+
+    def yview(self, *args):
+        if args[0] == "moveto":
+            self.first = int(float(args[1]) * len(self.items))
+            self.refresh()
+        elif args[0] == "scroll":
+            step = int(args[1]) * (max(1, self.visible - 1) if args[2] == "pages" else 1)
+            self.scroll(step)
+
+    def scroll(self, rows):
+        self.first += rows
+        self.refresh()
+
+    def on_wheel(self, event):
+        delta = event.delta if abs(event.delta) < 120 else event.delta // 120
+        self.scroll(-3 * delta)
+
+    def see(self, index):
+        full = max(1, self.visible - 1)
+        if index < self.first:
+            self.first = index
+        elif index >= self.first + full:
+            self.first = index - full + 1
+        self.refresh()
+
+    def click(self, row):
+        if row.item_index is None:
+            return
+        self.selection_set(row.item_index)
+        if self.on_select:
+            self.on_select()
+
+    def activate(self, row):
+        if row.item_index is None:
+            return
+        self.click(row)
+        if self.on_activate:
+            self.on_activate()
+
+    def selection_set(self, index):
+        self.selected = index
+        self.selected_item = self.items[index]
+        self.refresh()
+
+    def selection_clear(self):
+        self.selected = self.selected_item = None
+        self.refresh()
+
+    def curselection(self):
+        # Selection follows the item when rows are inserted or deleted above it
+        if self.selected is None:
+            return ()
+        if self.selected < len(self.items) and self.items[self.selected] == self.selected_item:
+            return (self.selected,)
+        try:
+            self.selected = self.items.index(self.selected_item)
+        except ValueError:
+            self.selected = self.selected_item = None
+            return ()
+        return (self.selected,)
+
+    def get(self, index):
+        return self.items[index]
+
+def refresh_virtual_lists(name):
+    for vlist in list(virtual_lists):
+        if vlist.winfo_exists():
+            vlist.refresh()
+
+theme_registry.hooks.append(refresh_virtual_lists)
+
+# --- Notes storage ---
+# Notes live in an append-only log: every save appends a JSON header line followed by
+# the body, every delete appends a tombstone, and each append is fsynced. Loading only
+# parses the headers and seeks over the bodies, which are read back on demand. A torn
+# record at the end of the log (crash during a write) is cut off on load. The log is
+# rewritten with only the live records once enough of it is dead.
+class NotesStore:
+    def __init__(self, path, compact_ratio=1.0, compact_min_bytes=64 * 1024):
+        self.path = path
+        self.compact_ratio = compact_ratio
+        self.compact_min_bytes = compact_min_bytes
+        self.records = {}  # title -> (body offset, body length, record size)
+        self.titles = []  # sorted title index
+        self.live_bytes = 0
+        self.dead_bytes = 0
+        self.listeners = []  # callables(event, index, title); returning False unsubscribes
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.load()
+
+    def load(self):
+        self.records = {}
+        self.live_bytes = self.dead_bytes = 0
+        valid_end = 0
+        if os.path.exists(self.path):
+            size = os.path.getsize(self.path)
+            with open(self.path, "rb") as f:
+                while True:
+                    start = f.tell()
+                    header = f.readline()
+                    if not header.endswith(b"\n"):
+                        break
+                    try:
+                        rec = json.loads(header)
+                    except ValueError:
+                        break
+                    if rec["op"] == "put":
+                        offset = f.tell()
+                        if offset + rec["len"] + 1 > size:
+                            break
+                        f.seek(rec["len"] + 1, os.SEEK_CUR)
+                        self.drop(rec["title"])
+                        self.records[rec["title"]] = (offset, rec["len"], f.tell() - start)
+                        self.live_bytes += f.tell() - start
+                    else:
+                        self.drop(rec["title"])
+                        self.dead_bytes += f.tell() - start
+                    valid_end = f.tell()
+            if valid_end < size:
+                with open(self.path, "r+b") as f:
+                    f.truncate(valid_end)
+        self.titles = sorted(self.records)
+        self.log = open(self.path, "ab")
+        self.reader = open(self.path, "rb")
+
+    def drop(self, title):
+        old = self.records.pop(title, None)
+        if old:
+            self.live_bytes -= old[2]
+            self.dead_bytes += old[2]
+
+    def append(self, rec, body=None):
+        header = json.dumps(rec).encode("utf-8") + b"\n"
+        start = self.log.tell()
+        self.log.write(header)
+        if body is not None:
+            self.log.write(body + b"\n")
+        self.log.flush()
+        os.fsync(self.log.fileno())
+        return start + len(header), self.log.tell() - start
+
+    def get(self, title):
+        offset, length, _ = self.records[title]
+        self.reader.seek(offset)
+        return self.reader.read(length).decode("utf-8")
+
+    def __contains__(self, title):
+        return title in self.records
+
+    def __len__(self):
+        return len(self.records)
+
+    def put(self, title, body):
+        data = body.encode("utf-8")
+        offset, size = self.append({"op": "put", "title": title, "len": len(data)}, data)
+        is_new = title not in self.records
+        self.drop(title)
+        self.records[title] = (offset, len(data), size)
+        self.live_bytes += size
+        if is_new:
+            index = bisect.bisect_left(self.titles, title)
+            self.titles.insert(index, title)
+            self.notify("insert", index, title)
+        else:
+            self.notify("update", bisect.bisect_left(self.titles, title), title)
+
+    def delete(self, title):
+        if title not in self.records:
+            return
+        _, size = self.append({"op": "del", "title": title})
+        self.drop(title)
+        self.dead_bytes += size
+        index = bisect.bisect_left(self.titles, title)
+        del self.titles[index]
+        self.notify("delete", index, title)
+
+    def notify(self, event, index, title):
+        for listener in list(self.listeners):
+            if listener(event, index, title) is False:
+                self.listeners.remove(listener)
+
+    def maybe_compact(self):
+        if self.dead_bytes > self.compact_min_bytes and self.dead_bytes > self.live_bytes * self.compact_ratio:
+            self.compact()
+
+    def compact(self):
+        tmp_path = self.path + ".tmp"
+        records = {}
+        with open(tmp_path, "wb") as out:
+            for title in self.titles:
+                data = self.get(title).encode("utf-8")
+                start = out.tell()
+                out.write(json.dumps({"op": "put", "title": title, "len": len(data)}).encode("utf-8") + b"\n")
+                offset = out.tell()
+                out.write(data + b"\n")
+                records[title] = (offset, len(data), out.tell() - start)
+            out.flush()
+            os.fsync(out.fileno())
+        self.log.close()
+        self.reader.close()
+        os.replace(tmp_path, self.path)
+        self.records = records
+        self.live_bytes = sum(r[2] for r in records.values())
+        self.dead_bytes = 0
+        self.log = open(self.path, "ab")
+        self.reader = open(self.path, "rb")
+
+notes_store = NotesStore(os.path.join(DATA_DIR, "notes.log"))
+tick_scheduler.every(60000, notes_store.maybe_compact, name="notes.compact")
+
+# --- Notes search ---
+# Inverted index over note titles and bodies: term -> {title: weight}. It is built from
+# the store on the first search and then kept up to date from the store's change
+# notifications. Every query word matches as a prefix (through a sorted vocabulary),
+# all words must match, and results are ranked by tf-idf with title words and exact
+# word matches weighted higher.
+WORD_RE = re.compile(r"\w+")
+TITLE_WEIGHT = 3
+
+class NotesIndex:
+    def __init__(self, store):
+        self.store = store
+        self.postings = {}  # term -> {title: weight}
+        self.doc_terms = {}  # title -> {term: weight}
+        self.vocab = []  # sorted terms for prefix lookups
+        self.built = False
+        store.listeners.append(self.on_change)
+
+    def terms_for(self, title, body):
+        terms = Counter(WORD_RE.findall(body.lower()))
+        for word in WORD_RE.findall(title.lower()):
+            terms[word] += TITLE_WEIGHT
+        return terms
+
+    def ensure_built(self):
+        if not self.built:
+            self.built = True
+            for title in self.store.titles:
+                self.add(title, self.store.get(title), keep_sorted=False)
+            self.vocab = sorted(self.postings)  # once, not an insort per new term
+
+    def add(self, title, body, keep_sorted=True):
+        terms = self.terms_for(title, body)
+        self.doc_terms[title] = terms
+        for term, weight in terms.items():
+            docs = self.postings.get(term)
+            if docs is None:
+                docs = self.postings[term] = {}
+                if keep_sorted:
+                    bisect.insort(self.vocab, term)
+            docs[title] = weight
+
+    def remove(self, title):
+        for term in self.doc_terms.pop(title, ()):
+            docs = self.postings[term]
+            del docs[title]
+            if not docs:
+                del self.postings[term]
+                del self.vocab[bisect.bisect_left(self.vocab, term)]
+
+    def on_change(self, event, index, title):
+        if not self.built:
+            return
+        self.remove(title)
+        if event != "delete":
+            self.add(title, self.store.get(title))
+
+    def search(self, query, limit=500):
+        self.ensure_built()
+        words = WORD_RE.findall(query.lower())
+        if not words:
+            return []
+        total = max(len(self.doc_terms), 1)
+        scores = None
+        for word in words:
+            matches = {}
+            i = bisect.bisect_left(self.vocab, word)
+            while i < len(self.vocab) and self.vocab[i].startswith(word):
+                term = self.vocab[i]
+                docs = self.postings[term]
+                weight = math.log(1 + total / len(docs)) * (2 if term == word else 1)
+                for title, tf in docs.items():
+                    if scores is None or title in scores:
+                        matches[title] = matches.get(title, 0) + tf * weight
+                i += 1
+            if scores is None:
+                scores = matches
+            else:
+                scores = {title: scores[title] + score for title, score in matches.items()}
+            if not scores:
+                return []
+        return heapq.nsmallest(limit, scores, key=lambda title: (-scores[title], title))
+
+notes_index = NotesIndex(notes_store)
 
 # --- Notes App ---
-def open_notes_window():
-    win = AppWindow(root, "Notes", "📝")
-    taskbar.add_window(win)
+def build_notes_window(win):
     t = theme[current_theme]
     cf = win.content_frame
-    for w in cf.winfo_children():
-        w.destroy()
 
     tk.Label(cf, text="Notes", font=APP_TITLE_FONT, bg=t["bg"], fg=t["fg"]).pack(pady=(12, 8))
 
@@ -296,32 +1402,39 @@ def open_notes_window():
     content_text.pack(fill="both", padx=25, pady=(0, 10), expand=True)
     content_text.configure(font=FONT, wrap="word")
 
-    list_frame = tk.Frame(cf, bg=t["bg"])
-    list_frame.pack(fill="both", padx=25, pady=5, expand=True)
+    search_frame = tk.Frame(cf, bg=t["bg"])
+    search_frame.pack(fill="x", padx=25, pady=(0, 2))
+    tk.Label(search_frame, text="Search:", bg=t["bg"], fg=t["fg"], font=FONT).pack(side="left")
+    search_var = tk.StringVar()
+    search_entry = tk.Entry(search_frame, textvariable=search_var, font=FONT)
+    search_entry.pack(side="left", fill="x", expand=True, padx=10)
 
-    scrollbar = tk.Scrollbar(list_frame)
-    scrollbar.pack(side="right", fill="y")
+    # The list views the store's sorted title index directly, so a save or delete
+    # only refills the visible rows
+    notes_listbox = VirtualList(cf, notes_store.titles)
+    notes_listbox.pack(fill="both", padx=25, pady=5, expand=True)
 
-    notes_listbox = tk.Listbox(list_frame, yscrollcommand=scrollbar.set)
-    notes_listbox.pack(side="left", fill="both", expand=True)
-    scrollbar.config(command=notes_listbox.yview)
-    notes_listbox.configure(font=FONT, selectmode=tk.SINGLE, activestyle="none")
+    def refresh_list():
+        query = search_var.get().strip()
+        notes_listbox.set_items(notes_index.search(query) if query else notes_store.titles)
 
-    # Data store for notes
-    if not hasattr(root, 'notes_data'):
-        root.notes_data = {}
+    search_var.trace_add("write", lambda *args: refresh_list())
 
-    def refresh_list():
-        notes_listbox.delete(0, tk.END)
-        for k in sorted(root.notes_data.keys()):
-            notes_listbox.insert(tk.END, k)
+    def on_store_change(event, index, title):
+        if not notes_listbox.winfo_exists():
+            return False
+        if search_var.get().strip():
+            refresh_list()
+        else:
+            notes_listbox.refresh()
+
+    notes_store.listeners.append(on_store_change)
 
     def save_note():
         title = title_var.get().strip()
         content = content_text.get("1.0", tk.END).strip()
         if title and content:
-            root.notes_data[title] = content
-            refresh_list()
+            notes_store.put(title, content)
             title_var.set("")
             content_text.delete("1.0", tk.END)
         else:
@@ -331,10 +1444,9 @@ def open_notes_window():
         sel = notes_listbox.curselection()
         if sel:
             key = notes_listbox.get(sel[0])
-            if key in root.notes_data:
+            if key in notes_store:
                 if messagebox.askyesno("Delete Note", f"Delete note '{key}'?"):
-                    del root.notes_data[key]
-                    refresh_list()
+                    notes_store.delete(key)
         else:
             messagebox.showinfo("Info", "Select a note to delete.")
 
@@ -342,10 +1454,10 @@ def open_notes_window():
         sel = notes_listbox.curselection()
         if sel:
             key = notes_listbox.get(sel[0])
-            if key in root.notes_data:
+            if key in notes_store:
                 title_var.set(key)
                 content_text.delete("1.0", tk.END)
-                content_text.insert(tk.END, root.notes_data[key])
+                content_text.insert(tk.END, notes_store.get(key))
 
     btn_frame = tk.Frame(cf, bg=t["bg"])
     btn_frame.pack(pady=10)
@@ -364,31 +1476,1753 @@ def open_notes_window():
 
     refresh_list()
 
-# --- File Explorer
-virtual_fs = {
-    "root": {
-        "Documents": {
-            "readme.txt": "Welcome to ViewRock OS File Explorer!\nThis is a sample file.",
-        },
-        "Notes.txt": "These are some notes in a text file.",
-        "EmptyFolder": {}
-    }
+register_app("Notes", "📝", build_notes_window)
+
+def open_notes_window():
+    return launch_app("Notes")
+
+# --- Virtual filesystem ---
+# Files and folders are Inode objects with parent pointers. Paths are resolved through
+# a path -> inode index that is filled on first lookup and pruned when a subtree is
+# renamed or deleted. Each folder caches its listing (folders first, then files, both
+# sorted by name) until one of its entries changes. File contents are either held in
+# memory (data) or left on disk as an extent (mmap, offset, length) that is only
+# decoded when the file is read. A file saved piecewise by the large-file editor has a
+# list of pieces as its extent instead, each a string or an (mmap, offset, length).
+#
+# Snapshots are trees of immutable SnapNodes. Every inode caches its frozen copy, and a
+# mutation drops the cached copies of the changed inode and its ancestors only, so a
+# snapshot rebuilds just the changed paths and shares every untouched subtree with the
+# live tree and with earlier snapshots.
+class VFSError(Exception):
+    pass
+
+class Inode:
+    __slots__ = ("name", "parent", "children", "data", "extent", "listing", "frozen")
+
+    def __init__(self, name, parent=None, is_dir=False, data=""):
+        self.name = name
+        self.parent = parent
+        self.children = {} if is_dir else None
+        self.data = None if is_dir else data
+        self.extent = None
+        self.listing = None
+        self.frozen = None  # SnapNode matching this subtree, None once it changed
+
+    @property
+    def is_dir(self):
+        return self.children is not None
+
+class SnapNode:
+    __slots__ = ("name", "children", "data", "extent", "listing")
+
+    def __init__(self, name, children=None, data=None, extent=None):
+        self.name = name
+        self.children = children
+        self.data = data
+        self.extent = extent
+        self.listing = None
+
+    @property
+    def is_dir(self):
+        return self.children is not None
+
+class VFSSnapshot:
+    def __init__(self, root, label="", fs=None):
+        self.root = root
+        self.label = label
+        self.time = datetime.datetime.now()
+        self.fs = fs  # the live filesystem it was taken from; its extents share that image
+
+    # Background readers of a snapshot hold off checkpoints of the filesystem it came from
+    @property
+    def readers(self):
+        return self.fs.readers if self.fs is not None else 0
+
+    @readers.setter
+    def readers(self, value):
+        if self.fs is not None:
+            self.fs.readers = value
+
+    def lookup(self, path):
+        node = self.root
+        for part in path.strip("/").split("/"):
+            if not part:
+                continue
+            if not node.is_dir or part not in node.children:
+                return None
+            node = node.children[part]
+        return node
+
+    def get(self, path, want_dir=None):
+        node = self.lookup(path)
+        if node is None:
+            raise VFSError(f"'{path}' does not exist.")
+        if want_dir is True and not node.is_dir:
+            raise VFSError(f"'{path}' is not a folder.")
+        if want_dir is False and node.is_dir:
+            raise VFSError(f"'{path}' is a folder.")
+        return node
+
+    def exists(self, path):
+        return self.lookup(path) is not None
+
+    def isdir(self, path):
+        node = self.lookup(path)
+        return node is not None and node.is_dir
+
+    def listdir(self, path):
+        node = self.get(path, want_dir=True)
+        if node.listing is None:
+            node.listing = sorted(node.children.values(), key=lambda n: (not n.is_dir, n.name))
+        return node.listing
+
+    def read(self, path):
+        return VirtualFS.content(self.get(path, want_dir=False))
+
+    def pieces(self, node):
+        return VirtualFS.pieces(node)
+
+    def size(self, node):
+        return VirtualFS.size(node)
+
+    def walk(self, node=None, path="/"):
+        return VirtualFS.walk(self, node, path)
+
+    def iter_bytes(self, node, size):
+        return VirtualFS.iter_bytes(node, size)
+
+    def byte_size(self, node):
+        return VirtualFS.byte_size(node)
+
+class VirtualFS:
+    def __init__(self):
+        self.root = Inode("", None, is_dir=True)
+        self.index = {"/": self.root}
+        self.journal = None  # VFSImage that records every mutation, if any
+        self.watchers = {}  # folder path -> [callback(path, event)]; returning False unsubscribes
+        self.snapshots = weakref.WeakSet()  # live snapshots, pinned in memory on checkpoint
+        self.readers = 0  # background searches and transfers still reading extents; checkpoints wait for them
+        self.holders = weakref.WeakSet()  # open large-file editors; checkpoint() re-points or pins their chunks
+
+    @classmethod
+    def from_dict(cls, tree):
+        fs = cls()
+        fs.load_dict(fs.root, tree)
+        return fs
+
+    def load_dict(self, node, tree):
+        for name, value in tree.items():
+            if isinstance(value, dict):
+                child = node.children[name] = Inode(name, node, is_dir=True)
+                self.load_dict(child, value)
+            else:
+                node.children[name] = Inode(name, node, data=value)
+
+    @staticmethod
+    def normpath(path, cwd="/"):
+        if not path.startswith("/"):
+            path = cwd.rstrip("/") + "/" + path
+        parts = []
+        for part in path.split("/"):
+            if part in ("", "."):
+                continue
+            if part == "..":
+                if parts:
+                    parts.pop()
+            else:
+                parts.append(part)
+        return "/" + "/".join(parts)
+
+    @staticmethod
+    def join(dirpath, name):
+        return dirpath.rstrip("/") + "/" + name
+
+    @staticmethod
+    def split(path):
+        head, _, name = path.rpartition("/")
+        return head or "/", name
+
+    def path_of(self, node):
+        names = []
+        while node.parent is not None:
+            names.append(node.name)
+            node = node.parent
+        return "/" + "/".join(reversed(names))
+
+    def lookup(self, path):
+        node = self.index.get(path)
+        if node is not None:
+            return node
+        node = self.root
+        walked = ""
+        for part in path.strip("/").split("/"):
+            if not part:
+                continue
+            if not node.is_dir or part not in node.children:
+                return None
+            node = node.children[part]
+            walked += "/" + part
+            self.index[walked] = node
+        return node
+
+    def get(self, path, want_dir=None):
+        node = self.lookup(path)
+        if node is None:
+            raise VFSError(f"'{path}' does not exist.")
+        if want_dir is True and not node.is_dir:
+            raise VFSError(f"'{path}' is not a folder.")
+        if want_dir is False and node.is_dir:
+            raise VFSError(f"'{path}' is a folder.")
+        return node
+
+    def exists(self, path):
+        return self.lookup(path) is not None
+
+    def isdir(self, path):
+        node = self.lookup(path)
+        return node is not None and node.is_dir
+
+    def listdir(self, path):
+        node = self.get(path, want_dir=True)
+        if node.listing is None:
+            node.listing = sorted(node.children.values(), key=lambda n: (not n.is_dir, n.name))
+        return node.listing
+
+    def read(self, path):
+        return self.content(self.get(path, want_dir=False))
+
+    @staticmethod
+    def content(node):
+        if node.data is not None:
+            return node.data
+        if isinstance(node.extent, list):
+            return "".join(p if isinstance(p, str) else p[0][p[1]:p[1] + p[2]].decode("utf-8") for p in node.extent)
+        mm, offset, length = node.extent
+        return mm[offset:offset + length].decode("utf-8")
+
+    @staticmethod
+    def content_bytes(node):
+        if node.data is not None:
+            return node.data.encode("utf-8")
+        if isinstance(node.extent, list):
+            return b"".join(p.encode("utf-8") if isinstance(p, str) else p[0][p[1]:p[1] + p[2]] for p in node.extent)
+        mm, offset, length = node.extent
+        return mm[offset:offset + length]
+
+    @staticmethod
+    def pieces(node):
+        if node.data is not None:
+            return [node.data]
+        if isinstance(node.extent, list):
+            return list(node.extent)
+        return [node.extent]
+
+    @staticmethod
+    def size(node):
+        # Characters for in-memory text, bytes for on-disk pieces; close enough to pick an editor
+        return sum(len(p) if isinstance(p, str) else p[2] for p in VirtualFS.pieces(node))
+
+    def log(self, op, path, data=None, **fields):
+        # Returns where the journal keeps `data`, if there is a journal
+        if self.journal is not None:
+            return self.journal.log(op, path, data, **fields)
+        return None
+
+    # Change notifications: a folder's watchers hear "changed" when its entries change
+    # and "gone" when the folder itself (or one of its ancestors) is renamed or deleted.
+    def watch(self, path, callback):
+        self.watchers.setdefault(path, []).append(callback)
+
+    def unwatch(self, path, callback):
+        callbacks = self.watchers.get(path)
+        if callbacks and callback in callbacks:
+            callbacks.remove(callback)
+            if not callbacks:
+                del self.watchers[path]
+
+    def notify(self, path, event="changed"):
+        for callback in list(self.watchers.get(path, ())):
+            if callback(path, event) is False:
+                self.unwatch(path, callback)
+
+    def notify_gone(self, path):
+        prefix = path + "/"
+        for watched in [w for w in self.watchers if w == path or w.startswith(prefix)]:
+            self.notify(watched, "gone")
+
+    def touch(self, node):
+        # Ancestors of a changed inode always lose their frozen copy with it
+        while node is not None and node.frozen is not None:
+            node.frozen = None
+            node = node.parent
+
+    def freeze(self, node):
+        if node.frozen is None:
+            if node.is_dir:
+                children = {name: self.freeze(child) for name, child in node.children.items()}
+                node.frozen = SnapNode(node.name, children)
+            else:
+                node.frozen = SnapNode(node.name, data=node.data, extent=node.extent)
+        return node.frozen
+
+    def snapshot(self, label=""):
+        snap = VFSSnapshot(self.freeze(self.root), label, self)
+        self.snapshots.add(snap)
+        return snap
+
+    def restore(self, snap):
+        # Applies only the differences, through the regular (journaled, notifying) calls
+        self.restore_node(self.root, snap.root, "/")
+
+    def restore_node(self, node, snap, path):
+        if node.frozen is snap:
+            return
+        for name in [name for name in node.children if name not in snap.children]:
+            self.delete(self.join(path, name))
+        for name, snap_child in snap.children.items():
+            child_path = self.join(path, name)
+            child = node.children.get(name)
+            if child is not None and child.is_dir != snap_child.is_dir:
+                self.delete(child_path)
+                child = None
+            if child is None:
+                self.materialize(child_path, snap_child)
+            elif child.is_dir:
+                self.restore_node(child, snap_child, child_path)
+            elif child.frozen is not snap_child:
+                data = self.content(snap_child)
+                if self.content(child) != data:
+                    child = self.write(child_path, data)
+                child.frozen = snap_child
+        node.frozen = snap
+
+    def materialize(self, path, snap):
+        if snap.is_dir:
+            node = self.mkdir(path)
+            for name, snap_child in snap.children.items():
+                self.materialize(self.join(path, name), snap_child)
+        else:
+            node = self.create(path, self.content(snap))
+        node.frozen = snap
+
+    def pin_snapshots(self, skip=()):
+        # Loads snapshot-only file contents that still point into mmaps about to be closed
+        seen = set(skip)
+        for snap in list(self.snapshots):
+            stack = [snap.root]
+            while stack:
+                node = stack.pop()
+                if id(node) in seen:
+                    continue
+                seen.add(id(node))
+                if node.is_dir:
+                    stack.extend(node.children.values())
+                elif node.extent is not None:
+                    node.data = self.content(node)
+                    node.extent = None
+
+    def new_entry(self, path, is_dir, data=""):
+        dirpath, name = self.split(path)
+        if not name or "/" in name:
+            raise VFSError("Invalid name.")
+        parent = self.get(dirpath, want_dir=True)
+        if name in parent.children:
+            raise VFSError("File or folder with this name already exists.")
+        node = parent.children[name] = Inode(name, parent, is_dir=is_dir, data=data)
+        parent.listing = None
+        self.touch(parent)
+        self.index[path] = node
+        return node
+
+    def mkdir(self, path):
+        node = self.new_entry(path, True)
+        self.log("mkdir", path)
+        self.notify(self.split(path)[0])
+        return node
+
+    def create(self, path, data=""):
+        node = self.new_entry(path, False, data)
+        piece = self.log("write", path, data)
+        if piece is not None:
+            node.data = None
+            node.extent = piece
+        self.notify(self.split(path)[0])
+        return node
+
+    def write(self, path, data):
+        node = self.lookup(path)
+        if node is None:
+            return self.create(path, data)
+        if node.is_dir:
+            raise VFSError(f"'{path}' is a folder.")
+        piece = self.log("write", path, data)
+        if piece is None:
+            node.data = data
+            node.extent = None
+        else:
+            node.extent = piece  # before data, for searches reading on another thread
+            node.data = None
+        self.touch(node)
+        return node
+
+    def append(self, path, data):
+        node = self.get(path, want_dir=False)
+        piece = self.log("append", path, data) or data
+        if node.frozen is not None or node.data is not None or not isinstance(node.extent, list):
+            # A snapshot may share the current piece list; grow a fresh one
+            node.extent = self.pieces(node)
+        node.extent.append(piece)
+        node.data = None
+        self.touch(node)
+        return node
+
+    def makedirs(self, path):
+        walked = "/"
+        for part in path.strip("/").split("/"):
+            if not part:
+                continue
+            walked = self.join(walked, part)
+            node = self.lookup(walked)
+            if node is None:
+                self.mkdir(walked)
+            elif not node.is_dir:
+                raise VFSError(f"'{walked}' is a file.")
+
+    @staticmethod
+    def iter_bytes(node, size):
+        for piece in VirtualFS.pieces(node):
+            if isinstance(piece, str):
+                for pos in range(0, len(piece), size):
+                    yield piece[pos:pos + size].encode("utf-8")
+            else:
+                seq, offset, length = piece
+                for pos in range(offset, offset + length, size):
+                    yield seq[pos:min(pos + size, offset + length)]
+
+    @staticmethod
+    def byte_size(node):
+        return sum(len(p.encode("utf-8")) if isinstance(p, str) else p[2] for p in VirtualFS.pieces(node))
+
+    def write_pieces(self, path, pieces):
+        # Unchanged pieces keep pointing into the image or journal; only new text is logged
+        # Log first: if the pieces cannot be recorded the file keeps its old contents
+        node = self.get(path, want_dir=False)
+        pieces = list(pieces)
+        if self.journal is not None:
+            self.journal.log_pieces(path, pieces)
+        node.data = None
+        node.extent = pieces
+        self.touch(node)
+        return node
+
+    def unindex(self, node, path):
+        self.index.pop(path, None)
+        if node.is_dir:
+            for name, child in node.children.items():
+                self.unindex(child, self.join(path, name))
+
+    def rename(self, path, new_name):
+        if not new_name or "/" in new_name:
+            raise VFSError("Invalid name.")
+        node = self.get(path)
+        parent = node.parent
+        if parent is None:
+            raise VFSError("Cannot rename the root folder.")
+        if new_name in parent.children:
+            raise VFSError("Name already exists.")
+        self.unindex(node, path)
+        del parent.children[node.name]
+        node.name = new_name
+        parent.children[new_name] = node
+        parent.listing = None
+        self.touch(node)
+        self.log("rename", path, name=new_name)
+        self.notify_gone(path)
+        self.notify(self.split(path)[0])
+        return node
+
+    def delete(self, path):
+        node = self.get(path)
+        if node.parent is None:
+            raise VFSError("Cannot delete the root folder.")
+        self.unindex(node, path)
+        del node.parent.children[node.name]
+        node.parent.listing = None
+        self.touch(node.parent)
+        self.log("delete", path)
+        self.notify_gone(path)
+        self.notify(self.split(path)[0])
+
+    def walk(self, node=None, path="/"):
+        # Pre-order (path, inode) pairs, parents before their children
+        stack = [(path, node or self.root)]
+        while stack:
+            path, node = stack.pop()
+            yield path, node
+            if node.is_dir:
+                for name, child in reversed(list(node.children.items())):
+                    stack.append((VirtualFS.join(path, name), child))
+
+# --- VFS undo/redo ---
+# Each undoable action stores a snapshot taken just before it. Undo swaps the live tree
+# back to that snapshot and keeps a snapshot of what it replaced for redo.
+class VFSHistory:
+    def __init__(self, fs, limit=50):
+        self.fs = fs
+        self.limit = limit
+        self.undo_stack = []
+        self.redo_stack = []
+        self.saved = []  # snapshots taken by hand, kept until the session ends
+
+    def run(self, label, func, *args):
+        snap = self.fs.snapshot(label)
+        result = func(*args)
+        self.push(snap)
+        return result
+
+    def push(self, snap):
+        self.undo_stack.append(snap)
+        if len(self.undo_stack) > self.limit:
+            del self.undo_stack[0]
+        self.redo_stack.clear()
+
+    def swap(self, from_stack, to_stack):
+        if not from_stack:
+            return None
+        snap = from_stack.pop()
+        to_stack.append(self.fs.snapshot(snap.label))
+        self.fs.restore(snap)
+        return snap
+
+    def undo(self):
+        return self.swap(self.undo_stack, self.redo_stack)
+
+    def redo(self):
+        return self.swap(self.redo_stack, self.undo_stack)
+
+    def take(self, label):
+        snap = self.fs.snapshot(label)
+        self.saved.append(snap)
+        return snap
+
+    def restore(self, snap):
+        self.run(f"Restore {snap.label}", self.fs.restore, snap)
+
+    def all_snapshots(self):
+        return self.saved[::-1] + self.undo_stack[::-1]
+
+# --- Background VFS search ---
+# A worker thread walks the live tree (walk() copies each folder's entries before
+# descending, so edits made by the UI meanwhile never break it) and queues matches in
+# batches: the first match right away, then at most every BATCH_SECONDS. The Tk side
+# drains the queue every POLL_MS and hands each batch to on_batch. Find results are
+# paths; content searches yield (path, line number, line) tuples.
+def name_matcher(pattern, mode="name"):
+    if mode == "regex":
+        rx = re.compile(pattern)
+        return lambda name: rx.search(name) is not None
+    if mode == "glob":
+        rx = re.compile(fnmatch.translate(pattern), re.IGNORECASE)
+        return lambda name: rx.match(name) is not None
+    pattern = pattern.lower()
+    return lambda name: pattern in name.lower()
+
+class VFSSearch:
+    POLL_MS = 25
+    BATCH_SECONDS = 0.02
+    BATCH_SIZE = 500
+
+    def __init__(self, fs, path="/", name=None, mode="name", content=None, on_batch=None, on_done=None):
+        self.fs = fs
+        self.path = path
+        self.start_node = fs.get(path, want_dir=True)
+        self.match_name = name_matcher(name, mode) if name else None
+        self.match_content = None
+        if content:
+            self.match_content = re.compile(content if mode == "regex" else re.escape(content), re.IGNORECASE)
+        self.on_batch = on_batch
+        self.on_done = on_done
+        self.queue = queue.Queue()
+        self.cancelled = threading.Event()
+        self.count = 0
+        self.scanned = 0
+        self.error = None
+        self.done = False
+        self.started = time.perf_counter()
+        fs.readers += 1
+        self.thread = threading.Thread(target=self.run, name="vfs-search", daemon=True)
+        self.thread.start()
+        root.after(self.POLL_MS, self.poll)
+
+    def cancel(self):
+        self.cancelled.set()
+
+    def hits(self, path, node):
+        if self.match_name is not None and (node.parent is None or not self.match_name(node.name)):
+            return
+        if self.match_content is None:
+            yield path
+            return
+        if node.is_dir:
+            return
+        try:
+            text = self.fs.content(node)
+        except TypeError:
+            text = node.data or ""  # rewritten by the UI between the two reads
+        for number, line in enumerate(text.splitlines(), 1):
+            if self.match_content.search(line):
+                yield path, number, line
+
+    def run(self):
+        batch = []
+        last_flush = 0
+        try:
+            for path, node in self.fs.walk(self.start_node, self.path):
+                if self.cancelled.is_set():
+                    break
+                self.scanned += 1
+                batch.extend(self.hits(path, node))
+                if batch and (len(batch) >= self.BATCH_SIZE or time.monotonic() - last_flush >= self.BATCH_SECONDS):
+                    self.queue.put(batch)
+                    batch = []
+                    last_flush = time.monotonic()
+        except Exception as e:
+            self.error = str(e)
+        finally:
+            if batch:
+                self.queue.put(batch)
+            self.queue.put(None)
+
+    def poll(self):
+        while True:
+            try:
+                batch = self.queue.get_nowait()
+            except queue.Empty:
+                break
+            if batch is None:
+                self.done = True
+                self.fs.readers -= 1
+                if self.on_done:
+                    self.on_done(self)
+                return
+            self.count += len(batch)
+            if self.on_batch and not self.cancelled.is_set():
+                self.on_batch(batch)
+        root.after(self.POLL_MS, self.poll)
+
+    def summary(self):
+        elapsed = time.perf_counter() - self.started
+        state = "cancelled" if self.cancelled.is_set() else f"error: {self.error}" if self.error else "done"
+        return f"{self.count} match(es), {self.scanned} entries scanned in {elapsed:.2f}s ({state})"
+
+# --- Content-addressed block store ---
+# The image keeps file contents as fixed-size blocks addressed by their hash, so a
+# block shared by several files (or repeated in one) is stored once. A block nobody
+# read since the previous checkpoint is cold and gets stored zlib-compressed when that
+# saves at least a tenth; hot and new blocks stay raw, so reading them is a plain mmap
+# slice. Decompressed blocks go through a byte-bounded LRU cache keyed by hash, which
+# outlives the image it was filled from; it is locked, since search, export and batch
+# worker threads read blocks alongside the Tk thread.
+BLOCK_SIZE = 64 * 1024
+
+class BlockCache:
+    def __init__(self, limit=32 * 1024 * 1024):
+        self.limit = limit
+        self.blocks = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def get(self, digest):
+        with self.lock:
+            data = self.blocks.get(digest)
+            if data is None:
+                self.misses += 1
+                return None
+            self.blocks.move_to_end(digest)
+            self.hits += 1
+            return data
+
+    def put(self, digest, data):
+        with self.lock:
+            if digest in self.blocks:
+                return
+            self.blocks[digest] = data
+            self.size += len(data)
+            while self.size > self.limit and self.blocks:
+                _, old = self.blocks.popitem(last=False)
+                self.size -= len(old)
+
+class BlockStore:
+    def __init__(self, mm, table, cache):
+        self.mm = mm
+        self.table = table  # [digest, offset, stored length, raw length, compressed]
+        self.cache = cache
+        self.touched = set()  # blocks read since the last checkpoint
+
+    def stored(self, i):
+        _, offset, stored, _, _ = self.table[i]
+        return self.mm[offset:offset + stored]
+
+    def raw(self, i):
+        digest, _, _, _, compressed = self.table[i]
+        if not compressed:
+            return self.stored(i)
+        data = self.cache.get(digest)
+        if data is None:
+            data = zlib.decompress(self.stored(i))
+            self.cache.put(digest, data)
+        return data
+
+    def get(self, i):
+        self.touched.add(i)
+        return self.raw(i)
+
+class BlockFile:
+    # One file's blocks seen as a single byte string: supports the slicing and find()
+    # that extents and the large-file editor use on an mmap
+    def __init__(self, store, ids):
+        self.store = store
+        self.ids = ids
+        self.starts = [0]
+        for i in ids:
+            self.starts.append(self.starts[-1] + store.table[i][3])
+
+    def __len__(self):
+        return self.starts[-1]
+
+    def __getitem__(self, key):
+        start, stop, _ = key.indices(len(self))
+        parts = []
+        k = bisect.bisect_right(self.starts, start) - 1
+        while start < stop and k < len(self.ids) and self.starts[k] < stop:
+            base = self.starts[k]
+            parts.append(self.store.get(self.ids[k])[max(start - base, 0):stop - base])
+            k += 1
+        return b"".join(parts)
+
+    def find(self, sub, start=0, end=None):
+        end = len(self) if end is None else min(end, len(self))
+        k = bisect.bisect_right(self.starts, start) - 1
+        while start < end and k < len(self.ids):
+            # Search one block at a time, running len(sub) - 1 bytes into the next one
+            hit = self[start:min(self.starts[k + 1] + len(sub) - 1, end)].find(sub)
+            if hit >= 0:
+                return start + hit
+            k += 1
+            start = self.starts[k]
+        return -1
+
+# --- Disk-backed VFS image ---
+# The filesystem is saved as one image file: a fixed header, the block store's blocks
+# back to back, and a JSON metadata table (the block table, then each path with its
+# kind and block list) at the end. Version 1 images, which kept each file's bytes as
+# one extent, still open. Opening reads the header and the metadata only and maps the
+# file with mmap; file contents stay on disk until they are read. Every mutation is
+# appended to a journal next to the image (same framing as the notes log) and fsynced;
+# the journal is replayed on open, again as lazy extents into the mapped journal, and
+# folded into a fresh image by checkpoint() once it grows past journal_limit.
+# Text written in this session is also read back from the journal: write and append
+# leave (JournalView, offset, length) pieces instead of keeping the text in memory.
+class JournalView:
+    # The journal so far as a read-only sequence; a read past the current map re-maps
+    # the file, whose records sync() has already flushed
+    def __init__(self, path):
+        self.file = open(path, "rb")
+        self.map = None
+        self.lock = threading.Lock()  # search and export threads read it too
+
+    def __getitem__(self, key):
+        with self.lock:
+            if self.map is None or key.stop > len(self.map):
+                if self.map is not None:
+                    self.map.close()
+                self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+            return self.map[key]
+
+    def close(self):
+        with self.lock:
+            if self.map is not None:
+                self.map.close()
+                self.map = None
+            self.file.close()
+
+class VFSImage:
+    MAGIC = b"VRFS"
+    VERSION = 2
+    HEADER = struct.Struct("<4sIQQ")  # magic, version, metadata offset, metadata length
+
+    def __init__(self, path, journal_limit=4 * 1024 * 1024):
+        self.path = path
+        self.journal_path = path + ".journal"
+        self.skipped_path = path + ".skipped"
+        self.journal_limit = journal_limit
+        self.maps = []  # open mmaps (image and replayed journal) that extents point into
+        self.map_tags = {}  # id(mmap) -> "i" (image) or "j" (journal), for piece references
+        self.files = []
+        self.journal = None
+        self.view = None  # JournalView of the journal being written
+        self.fs = None
+        self.image_map = None
+        self.store = None
+        self.cache = BlockCache()
+        self.usage = {}  # figures from the last checkpoint, see stats()
+        self.batching = 0
+        self.generation = 0  # bumped by every checkpoint; a journal only replays onto its own generation
+        self.skipped = []  # (op, path, reason) of journal records replay could not apply
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    def open(self, default_tree):
+        if not os.path.exists(self.path):
+            self.fs = VirtualFS.from_dict(default_tree)
+            self.checkpoint()
+            return self.fs
+        self.fs = VirtualFS()
+        self.load_image()
+        self.replay_journal()
+        self.fs.journal = self
+        return self.fs
+
+    def map_file(self, path, tag):
+        f = open(path, "rb")
+        self.files.append(f)
+        if os.path.getsize(path) == 0:
+            return None
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.maps.append(mm)
+        self.map_tags[id(mm)] = tag
+        return mm
+
+    def close_maps(self):
+        for mm in self.maps:
+            mm.close()
+        for f in self.files:
+            f.close()
+        if self.view is not None:
+            self.view.close()
+            self.view = None
+        self.maps = []
+        self.files = []
+        self.map_tags = {}
+
+    def open_view(self):
+        self.view = JournalView(self.journal_path)
+        self.map_tags[id(self.view)] = "j"  # same offsets as the journal map after a restart
+
+    def load_image(self):
+        mm = self.image_map = self.map_file(self.path, "i")
+        magic, version, meta_offset, meta_length = self.HEADER.unpack_from(mm, 0)
+        if magic != self.MAGIC or version not in (1, self.VERSION):
+            raise VFSError(f"'{self.path}' is not a ViewRock filesystem image.")
+        fs = self.fs
+        meta = json.loads(mm[meta_offset:meta_offset + meta_length])
+        self.generation = 0
+        if version == 1:
+            for path, kind, offset, length in meta:
+                if path == "/":
+                    continue
+                if kind == "d":
+                    fs.new_entry(path, True)
+                else:
+                    node = fs.new_entry(path, False, None)
+                    node.extent = (mm, offset, length)
+            return
+        self.generation = meta.get("generation", 0)
+        self.store = BlockStore(mm, meta["blocks"], self.cache)
+        for row in meta["files"]:
+            if row[0] == "/":
+                continue
+            if row[1] == "d":
+                fs.new_entry(row[0], True)
+            else:
+                node = fs.new_entry(row[0], False, None)
+                blocks = BlockFile(self.store, row[2])
+                node.extent = (blocks, 0, len(blocks))
+
+    # The journal starts with a header naming the image generation it extends. A crash
+    # after a checkpoint replaced the image but before it reset the journal leaves a
+    # journal for the previous generation, whose changes are already in the image; it is
+    # dropped instead of replayed. Journals from before headers existed count as
+    # generation 0, which only an image from before generations existed has.
+    def start_journal(self):
+        self.journal = open(self.journal_path, "wb")
+        self.journal.write(json.dumps({"op": "journal", "generation": self.generation}).encode("utf-8") + b"\n")
+        self.journal.flush()
+        os.fsync(self.journal.fileno())
+        self.open_view()
+
+    def replay_journal(self):
+        if not os.path.exists(self.journal_path):
+            self.start_journal()
+            return
+        with open(self.journal_path, "rb") as f:
+            first = f.readline()
+        try:
+            head = json.loads(first)
+        except ValueError:
+            head = {}
+        start = 0
+        generation = 0
+        if isinstance(head, dict) and head.get("op") == "journal":
+            start = len(first)
+            generation = head.get("generation")
+        if generation != self.generation:
+            self.start_journal()
+            return
+        mm = self.map_file(self.journal_path, "j")
+        valid_end = pos = start
+        size = len(mm) if mm is not None else 0
+        lost = []
+        while pos < size:
+            end = mm.find(b"\n", pos)
+            if end < 0:
+                break
+            try:
+                rec = json.loads(mm[pos:end])
+            except ValueError:
+                break
+            record_start = pos
+            pos = end + 1
+            body_end = pos
+            if "len" in rec:
+                body_end = pos + rec["len"] + 1
+                if body_end > size:
+                    break
+            try:
+                self.apply_record(rec, mm, pos)
+            except (VFSError, LookupError) as e:
+                # One record that no longer fits the tree must not cost the whole filesystem;
+                # it is copied, framing and all, to skipped_path for recovery by hand
+                self.skipped.append((rec.get("op"), rec.get("path"), str(e)))
+                lost.append(mm[record_start:body_end])
+            pos = valid_end = body_end
+        if lost:
+            with open(self.skipped_path, "ab") as f:
+                f.write(b"".join(lost))
+                f.flush()
+                os.fsync(f.fileno())
+        if valid_end < size:
+            # Drop a torn record left by a crash in the middle of an append
+            with open(self.journal_path, "r+b") as f:
+                f.truncate(valid_end)
+        self.journal = open(self.journal_path, "ab")
+        self.open_view()
+
+    def apply_record(self, rec, mm, pos):
+        fs = self.fs
+        if rec["op"] == "write":
+            node = fs.lookup(rec["path"])
+            if node is None:
+                node = fs.new_entry(rec["path"], False, None)
+            node.data = None
+            node.extent = (mm, pos, rec["len"])
+        elif rec["op"] == "append":
+            node = fs.get(rec["path"], want_dir=False)
+            if node.data is not None or not isinstance(node.extent, list):
+                node.extent = fs.pieces(node)
+            node.extent.append((mm, pos, rec["len"]))
+            node.data = None
+        elif rec["op"] == "pieces":
+            pieces = []
+            for ref in rec["pieces"]:
+                if ref[0] == "d":
+                    pieces.append((mm, pos, ref[1]))
+                    pos += ref[1]
+                elif ref[0] == "b":
+                    pieces.append((BlockFile(self.store, ref[1]), ref[2], ref[3]))
+                else:
+                    pieces.append((self.image_map if ref[0] == "i" else mm, ref[1], ref[2]))
+            node = fs.get(rec["path"], want_dir=False)
+            node.data = None
+            node.extent = pieces
+        elif rec["op"] == "mkdir":
+            fs.new_entry(rec["path"], True)
+        elif rec["op"] == "rename":
+            fs.rename(rec["path"], rec["name"])
+        elif rec["op"] == "delete":
+            fs.delete(rec["path"])
+
+    def log(self, op, path, data=None, **fields):
+        rec = {"op": op, "path": path}
+        rec.update(fields)
+        body = None
+        if data is not None:
+            body = data.encode("utf-8")
+            rec["len"] = len(body)
+        self.journal.write(json.dumps(rec).encode("utf-8") + b"\n")
+        if body is None:
+            self.sync()
+            return None
+        offset = self.journal.tell()
+        self.journal.write(body + b"\n")
+        self.sync()
+        return (self.view, offset, len(body))
+
+    def log_pieces(self, path, pieces):
+        # Pieces already in the image or journal are logged as references, new text inline
+        refs = []
+        bodies = []
+        for piece in pieces:
+            if not isinstance(piece, str) and isinstance(piece[0], BlockFile) and piece[0].store is self.store:
+                refs.append(["b", piece[0].ids, piece[1], piece[2]])
+                continue
+            tag = None if isinstance(piece, str) else self.map_tags.get(id(piece[0]))
+            if tag is not None:
+                refs.append([tag, piece[1], piece[2]])
+                continue
+            body = piece.encode("utf-8") if isinstance(piece, str) else piece[0][piece[1]:piece[1] + piece[2]]
+            refs.append(["d", len(body)])
+            bodies.append(body)
+        body = b"".join(bodies)
+        rec = {"op": "pieces", "path": path, "pieces": refs, "len": len(body)}
+        self.journal.write(json.dumps(rec).encode("utf-8") + b"\n")
+        self.journal.write(body + b"\n")
+        self.sync()
+
+    def sync(self):
+        self.journal.flush()
+        if not self.batching:
+            os.fsync(self.journal.fileno())
+
+    # Bulk writers group many records under one fsync
+    def begin_batch(self):
+        self.batching += 1
+
+    def end_batch(self):
+        self.batching -= 1
+        if not self.batching and self.journal:
+            self.sync()
+
+    def journal_size(self):
+        return self.journal.tell() if self.journal else 0
+
+    def stats(self):
+        usage = self.usage
+        unique = usage.get("unique", 0)
+        stored = usage.get("stored", 0)
+        blocks = self.store.table if self.store else []
+        cache = self.cache
+        lookups = cache.hits + cache.misses
+        return [
+            f"Image: {usage.get('files', 0)} files, {usage.get('logical', 0)} bytes of content (as of the last checkpoint)",
+            f"Blocks: {len(blocks)} unique, {sum(b[4] for b in blocks)} compressed, up to {BLOCK_SIZE // 1024} KB each",
+            f"Dedup: {unique} unique bytes, ratio {usage.get('logical', 0) / unique if unique else 1:.2f}x",
+            f"Compression: {stored} bytes stored, ratio {unique / stored if stored else 1:.2f}x",
+            f"Block cache: {len(cache.blocks)} blocks, {cache.size} bytes, "
+            f"hit rate {cache.hits / lookups if lookups else 0:.0%} ({cache.hits}/{lookups})",
+            f"Journal: {self.journal_size()} bytes pending, generation {self.generation}"
+            + (f", {len(self.skipped)} record(s) skipped at startup (kept in {self.skipped_path})" if self.skipped else ""),
+        ]
+
+    def maybe_checkpoint(self, growth=0):
+        # With growth, the journal may also reach that fraction of the image first, so a
+        # bulk import rewrites the image a logarithmic rather than linear number of times
+        if self.fs.readers:
+            return
+        limit = self.journal_limit
+        if growth:
+            limit = max(limit, int(os.path.getsize(self.path) * growth))
+        if self.journal_size() > limit:
+            self.checkpoint()
+
+    def checkpoint(self):
+        fs = self.fs
+        tmp_path = self.path + ".tmp"
+        old = self.store
+        hot = {old.table[i][0] for i in old.touched} if old else set()
+        table = []
+        placed_blocks = {}  # digest -> index in the new table
+        files = []
+        placed = []
+        usage = {"files": 0, "logical": 0, "unique": 0, "stored": 0}
+
+        def place(out, digest, raw=None, packed=None, raw_length=0):
+            index = placed_blocks.get(digest)
+            if index is None:
+                stored, compressed = packed, 1
+                if packed is None:
+                    stored, compressed, raw_length = raw, 0, len(raw)
+                    if digest not in hot:
+                        packed = zlib.compress(raw)
+                        if len(packed) <= len(raw) * 0.9:
+                            stored, compressed = packed, 1
+                index = placed_blocks[digest] = len(table)
+                table.append([digest, out.tell(), len(stored), raw_length, compressed])
+                out.write(stored)
+                usage["unique"] += raw_length
+                usage["stored"] += len(stored)
+            return index
+
+        with open(tmp_path, "wb") as out:
+            out.write(b"\0" * self.HEADER.size)
+            for path, node in fs.walk():
+                if node.is_dir:
+                    files.append((path, "d"))
+                    continue
+                ids = []
+                pending = []
+
+                def flush():
+                    data = b"".join(pending)
+                    del pending[:]
+                    for pos in range(0, len(data), BLOCK_SIZE):
+                        raw = data[pos:pos + BLOCK_SIZE]
+                        digest = hashlib.blake2b(raw, digest_size=16).hexdigest()
+                        hot.add(digest)  # new blocks start out hot
+                        ids.append(place(out, digest, raw))
+
+                for piece in fs.pieces(node):
+                    if isinstance(piece, str):
+                        pending.append(piece.encode("utf-8"))
+                        continue
+                    seq, offset, length = piece
+                    end = offset + length
+                    if isinstance(seq, BlockFile) and seq.store is old:
+                        # Blocks the piece covers whole are reused; cold compressed ones are copied as stored
+                        k = bisect.bisect_left(seq.starts, offset)
+                        while k < len(seq.ids) and seq.starts[k + 1] <= end:
+                            if seq.starts[k] > offset:
+                                pending.append(seq[offset:seq.starts[k]])
+                            flush()
+                            digest, _, _, raw_length, compressed = old.table[seq.ids[k]]
+                            if compressed and digest not in hot:
+                                ids.append(place(out, digest, packed=old.stored(seq.ids[k]), raw_length=raw_length))
+                            else:
+                                ids.append(place(out, digest, old.raw(seq.ids[k])))
+                            offset = seq.starts[k + 1]
+                            k += 1
+                    if offset < end:
+                        pending.append(seq[offset:end])
+                flush()
+                files.append((path, "f", ids))
+                placed.append((node, ids))
+                usage["files"] += 1
+                usage["logical"] += sum(table[i][3] for i in ids)
+            meta = {"blocks": table, "files": files, "generation": self.generation + 1}
+            meta_bytes = json.dumps(meta, separators=(",", ":")).encode("utf-8")
+            meta_offset = out.tell()
+            out.write(meta_bytes)
+            out.seek(0)
+            out.write(self.HEADER.pack(self.MAGIC, self.VERSION, meta_offset, len(meta_bytes)))
+            out.flush()
+            os.fsync(out.fileno())
+        if self.journal:
+            self.journal.close()
+        holders = list(fs.holders)
+        for holder in holders:
+            holder.before_checkpoint()
+        fs.pin_snapshots(id(node.frozen) for node, _ in placed if node.frozen is not None)
+        self.close_maps()
+        os.replace(tmp_path, self.path)
+        self.generation += 1
+        self.start_journal()
+        mm = self.image_map = self.map_file(self.path, "i")
+        self.store = BlockStore(mm, table, self.cache)
+        self.usage = usage
+        # Contents now live in the new image; drop the in-memory copies
+        for node, ids in placed:
+            blocks = BlockFile(self.store, ids)
+            node.data = None
+            node.extent = (blocks, 0, len(blocks))
+            if node.frozen is not None:
+                node.frozen.data = None
+                node.frozen.extent = node.extent
+        for holder in holders:
+            holder.after_checkpoint()
+        fs.journal = self
+
+default_fs_tree = {
+    "home": {"welcome.txt": "Welcome to ViewRock OS!", "info.md": "This is a virtual OS terminal."},
+    "docs": {"readme.txt": "This is your documents folder."},
+    "Documents": {
+        "readme.txt": "Welcome to ViewRock OS File Explorer!\nThis is a sample file.",
+    },
+    "Notes.txt": "These are some notes in a text file.",
+    "EmptyFolder": {}
 }
-current_path = ["root"]
-def get_current_dir():
-    d = virtual_fs
-    for p in current_path:
-        d = d[p]
-    return d
+vfs_image = VFSImage(os.path.join(DATA_DIR, "vfs.img"))
+vfs = vfs_image.open(default_fs_tree)
+vfs_history = VFSHistory(vfs)
+tick_scheduler.every(30000, vfs_image.maybe_checkpoint, name="vfs.checkpoint")
+
+# --- Host import/export ---
+# Copies a host folder or tar archive into the VFS, or a VFS folder or file out to a
+# host folder or tar archive. A worker thread does all host I/O in READ_SIZE pieces;
+# tar archives are read as a stream, so members are never all in memory. Imports hand
+# the worker's output (mkdir / write / append operations, one per piece) to the Tk side
+# through a bounded queue, so the worker waits whenever the UI falls behind; the Tk
+# side applies them for at most APPLY_SECONDS per poll under one journal fsync and
+# checkpoints as the journal grows. Each piece is read back from the journal rather
+# than kept in memory, and appends grow the file's piece list in place. Binary files (a NUL byte near the start) are
+# skipped, since VFS files are text. The whole import is one undo step.
+def host_name(path):
+    return os.path.basename(os.path.normpath(path)) or "root"
+
+def is_archive_path(path):
+    return path.lower().endswith((".tar", ".tar.gz", ".tgz", ".tar.bz2", ".tar.xz"))
+
+class ChunkReader:
+    # File-like read() over an iterator of byte chunks, for tarfile.addfile
+    def __init__(self, chunks):
+        self.chunks = chunks
+        self.buffer = b""
+
+    def read(self, size=-1):
+        while size < 0 or len(self.buffer) < size:
+            chunk = next(self.chunks, None)
+            if chunk is None:
+                break
+            self.buffer += chunk
+        if size < 0:
+            size = len(self.buffer)
+        data, self.buffer = self.buffer[:size], self.buffer[size:]
+        return data
+
+class VFSTransfer:
+    POLL_MS = 25
+    READ_SIZE = 256 * 1024
+    APPLY_SECONDS = 0.015
+    QUEUE_SIZE = 64
+
+    def __init__(self, fs, mode, source, target, on_progress=None, on_done=None):
+        # mode "import": source is a host path, target a VFS folder
+        # mode "export": source is a VFS path, target a host folder or archive path
+        self.fs = fs
+        self.mode = mode
+        self.source = source
+        self.target = target
+        self.on_progress = on_progress
+        self.on_done = on_done
+        self.queue = queue.Queue(self.QUEUE_SIZE)
+        self.cancelled = threading.Event()
+        self.files = 0
+        self.done_bytes = 0
+        self.total_bytes = 0
+        self.skipped = []
+        self.error = None
+        self.done = False
+        self.finished = False  # worker side
+        self.started = time.perf_counter()
+        if mode == "import":
+            if not os.path.exists(source):
+                raise VFSError(f"'{source}' does not exist.")
+            fs.get(target, want_dir=True)
+            self.snapshot = fs.snapshot(f"Import {host_name(source)}")
+            worker = self.import_folder if os.path.isdir(source) else self.import_archive
+        else:
+            self.start_node = fs.get(source)
+            fs.readers += 1
+            worker = self.export_archive if is_archive_path(target) else self.export_folder
+        self.thread = threading.Thread(target=self.run, args=(worker,), name=f"vfs-{mode}", daemon=True)
+        self.thread.start()
+        root.after(self.POLL_MS, self.poll)
+
+    def cancel(self):
+        self.cancelled.set()
+
+    def progress(self):
+        return min(self.done_bytes / self.total_bytes, 1.0) if self.total_bytes else 0.0
+
+    def run(self, worker):
+        try:
+            worker()
+        except Exception as e:
+            self.error = str(e)
+        finally:
+            self.finished = True
+            if self.mode == "import":
+                self.put(None)
+
+    def put(self, op):
+        while True:
+            try:
+                self.queue.put(op, timeout=0.1)
+                return True
+            except queue.Full:
+                if self.cancelled.is_set() and op is not None:
+                    return False
+
+    # Worker side: imports
+    def read_file(self, stream, path, count_bytes=True):
+        decoder = codecs.getincrementaldecoder("utf-8")("replace")
+        first = True
+        while not self.cancelled.is_set():
+            chunk = stream.read(self.READ_SIZE)
+            if first and b"\0" in chunk[:8192]:
+                self.put(("skip", path, "binary file"))
+                return
+            if count_bytes:
+                self.done_bytes += len(chunk)
+            text = decoder.decode(chunk, final=not chunk)
+            if first:
+                self.put(("write", path, text))
+                first = False
+            elif text:
+                self.put(("append", path, text))
+            if not chunk:
+                return
+
+    def import_folder(self):
+        for dirpath, _, filenames in os.walk(self.source):
+            for name in filenames:
+                try:
+                    self.total_bytes += os.path.getsize(os.path.join(dirpath, name))
+                except OSError:
+                    pass
+        base = self.fs.join(self.target, host_name(self.source))
+        for dirpath, dirnames, filenames in os.walk(self.source):
+            dirnames.sort()
+            rel = os.path.relpath(dirpath, self.source)
+            folder = base if rel == "." else self.fs.join(base, rel.replace(os.sep, "/"))
+            if not self.put(("mkdir", folder)):
+                return
+            for name in sorted(filenames):
+                if self.cancelled.is_set():
+                    return
+                path = self.fs.join(folder, name)
+                try:
+                    with open(os.path.join(dirpath, name), "rb") as stream:
+                        self.read_file(stream, path)
+                except OSError as e:
+                    self.put(("skip", path, e.strerror or str(e)))
+
+    def import_archive(self):
+        self.total_bytes = os.path.getsize(self.source)
+        with open(self.source, "rb") as raw, tarfile.open(fileobj=raw, mode="r|*") as archive:
+            for member in archive:
+                if self.cancelled.is_set():
+                    return
+                parts = [p for p in member.name.split("/") if p not in ("", ".", "..")]
+                if parts:
+                    path = self.fs.join(self.target, "/".join(parts))
+                    if member.isdir():
+                        self.put(("mkdir", path))
+                    elif member.isfile():
+                        self.read_file(archive.extractfile(member), path, count_bytes=False)
+                    else:
+                        self.put(("skip", path, "not a regular file"))
+                self.done_bytes = raw.tell()
+
+    # Worker side: exports
+    def export_entries(self):
+        for path, node in self.fs.walk(self.start_node, self.source):
+            if self.cancelled.is_set():
+                return
+            rel = path[len(self.source):].strip("/")
+            yield (host_name(self.source) + "/" + rel).rstrip("/"), node
+
+    def export_folder(self):
+        self.total_bytes = sum(self.fs.size(node) for _, node in self.fs.walk(self.start_node) if not node.is_dir)
+        for rel, node in self.export_entries():
+            host_path = os.path.join(self.target, *rel.split("/"))
+            if node.is_dir:
+                os.makedirs(host_path, exist_ok=True)
+                continue
+            os.makedirs(os.path.dirname(host_path), exist_ok=True)
+            with open(host_path, "wb") as out:
+                for chunk in self.fs.iter_bytes(node, self.READ_SIZE):
+                    out.write(chunk)
+                    self.done_bytes += len(chunk)
+            self.files += 1
+
+    def export_archive(self):
+        self.total_bytes = sum(self.fs.size(node) for _, node in self.fs.walk(self.start_node) if not node.is_dir)
+        name = self.target.lower()
+        mode = "w:gz" if name.endswith((".gz", ".tgz")) else "w:bz2" if name.endswith(".bz2") else \
+            "w:xz" if name.endswith(".xz") else "w"
+        with tarfile.open(self.target, mode) as archive:
+            for rel, node in self.export_entries():
+                info = tarfile.TarInfo(rel)
+                info.mtime = int(time.time())
+                if node.is_dir:
+                    info.type = tarfile.DIRTYPE
+                    info.mode = 0o755
+                    archive.addfile(info)
+                    continue
+                info.size = self.fs.byte_size(node)
+                info.mode = 0o644
+                archive.addfile(info, ChunkReader(self.fs.iter_bytes(node, self.READ_SIZE)))
+                self.done_bytes += info.size
+                self.files += 1
+
+    # Tk side
+    def apply(self, op):
+        kind, path = op[0], op[1]
+        try:
+            if kind == "mkdir":
+                self.fs.makedirs(path)
+            elif kind == "write":
+                self.fs.makedirs(self.fs.split(path)[0])
+                self.fs.write(path, op[2])
+                self.files += 1
+            elif kind == "append":
+                self.fs.append(path, op[2])
+            else:
+                self.skipped.append((path, op[2]))
+        except VFSError as e:
+            self.skipped.append((path, str(e)))
+
+    def poll(self):
+        if self.mode == "export":
+            if self.finished:
+                self.finish()
+                return
+        else:
+            journal = self.fs.journal
+            deadline = time.perf_counter() + self.APPLY_SECONDS
+            if journal is not None:
+                journal.begin_batch()
+            try:
+                while time.perf_counter() < deadline:
+                    try:
+                        op = self.queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if op is None:
+                        self.finish()
+                        return
+                    self.apply(op)
+            finally:
+                if journal is not None:
+                    journal.end_batch()
+            if journal is not None:
+                journal.maybe_checkpoint(growth=0.25)
+        if self.on_progress:
+            self.on_progress(self)
+        root.after(self.POLL_MS, self.poll)
+
+    def finish(self):
+        self.done = True
+        if self.mode == "export":
+            self.fs.readers -= 1
+        elif self.files or self.skipped:
+            vfs_history.push(self.snapshot)
+        if self.on_done:
+            self.on_done(self)
+
+    def summary(self):
+        elapsed = time.perf_counter() - self.started
+        state = "cancelled" if self.cancelled.is_set() else f"error: {self.error}" if self.error else "done"
+        verb = "imported" if self.mode == "import" else "exported"
+        return f"{self.files} file(s) {verb}, {len(self.skipped)} skipped in {elapsed:.1f}s ({state})"
+
+# --- Large file editor ---
+# Files over LARGE_FILE_SIZE open in a ChunkedEditor. Nothing is read up front: the
+# editor starts with one region per piece of the file, (source, offset, length) into
+# its string, mmap or block list, and only cuts a CHUNK_SIZE chunk off a region at a
+# line end when that part is paged in, so a block-stored file decodes just the blocks
+# around what is on screen. The text widget holds at most WINDOW consecutive chunks,
+# each starting at a "chunk<i>" mark; scrolling near either edge pages the next chunk
+# in and the farthest one out, keeping any edits to it. The scrollbar covers the whole
+# file by line count, estimated for regions not read yet. Saving writes the file as a
+# piece list in which untouched chunks still point at their original bytes. An open
+# editor registers in vfs.holders: before a checkpoint closes the maps its chunks point
+# into, it either notes that the file is unchanged (its chunks are then re-pointed at
+# the same byte offsets in the new image) or copies the unread regions into memory.
+LARGE_FILE_SIZE = 1024 * 1024
+
+def line_boundary(seq, at, lo, hi, backwards=False):
+    # The position just past the first newline at or after `at` (or the last one before it)
+    newline = "\n" if isinstance(seq, str) else b"\n"
+    step = 4096
+    if backwards:
+        while at > lo:
+            start = max(lo, at - step)
+            k = seq[start:at].rfind(newline)
+            if k >= 0:
+                return start + k + 1
+            at = start
+        return lo
+    while at < hi:
+        end = min(hi, at + step)
+        k = seq[at:end].find(newline)
+        if k >= 0:
+            return at + k + 1
+        at = end
+    return hi
+
+class ChunkedEditor(tk.Toplevel):
+    CHUNK_SIZE = 256 * 1024
+    WINDOW = 3
+
+    def __init__(self, master, path, fs=None):
+        super().__init__(master)
+        self.fs = fs or vfs
+        self.path = path
+        self.filename = vfs.split(path)[1]
+        self.read_only = self.fs is not vfs
+        # [source, edited text, line count, byte offset in the file]; the count is None for
+        # a region not read yet, the offset None for in-memory text
+        self.opened = self.fs.pieces(self.fs.get(path, want_dir=False))
+        self.chunks = []
+        at = 0
+        for piece in self.opened:
+            if isinstance(piece, str):
+                self.chunks.append([(piece, 0, len(piece)), None, None, None])
+                at += len(piece.encode("utf-8"))
+            else:
+                self.chunks.append([piece, None, None, at])
+                at += piece[2]
+        if not self.chunks:
+            self.chunks = [[("", 0, 0), None, 0, None]]
+        self.counted = [0, 0]  # lines and characters in chunks read so far, for estimates
+        self.first = self.last = 0  # loaded chunks are [first, last)
+        self.paging = False
+        self.repoint = False
+        vfs.holders.add(self)
+        self.bind("<Destroy>", self.on_destroy, add="+")
+
+        self.title(f"{'Viewing' if self.read_only else 'Editing'}: {self.filename} (large file)")
+        self.geometry("700x500")
+        self.configure(bg="#1e1e2f")
+
+        self.status_var = tk.StringVar()
+        tk.Label(self, textvariable=self.status_var, bg="#1e1e2f", fg="white", anchor="w").pack(fill="x", padx=10, pady=(10, 0))
+        frame = tk.Frame(self, bg="#1e1e2f")
+        frame.pack(fill="both", expand=True, padx=10, pady=10)
+        self.scrollbar = tk.Scrollbar(frame, command=self.on_scrollbar)
+        self.scrollbar.pack(side="right", fill="y")
+        self.text = tk.Text(frame, bg="#30304a", fg="white", font=("Segoe UI", 11), wrap="word",
+                            undo=False, yscrollcommand=self.on_text_scroll)
+        self.text.pack(side="left", fill="both", expand=True)
+        if not self.read_only:
+            tk.Button(self, text="Save", command=self.save, bg="#30304a", fg="white").pack(pady=5)
+        self.load_window(0)
+
+    def on_destroy(self, event):
+        if event.widget is self:
+            vfs.holders.discard(self)
+
+    def before_checkpoint(self):
+        node = vfs.lookup(self.path) if self.fs is vfs else None
+        current = vfs.pieces(node) if node is not None and not node.is_dir else []
+        self.repoint = (node is not None and len(current) == len(self.opened)
+                        and all(a is b for a, b in zip(current, self.opened)))
+        if self.repoint:
+            return
+        # The file changed under the editor (or is a snapshot): keep private copies
+        for chunk in self.chunks:
+            seq, pos, length = chunk[0]
+            if chunk[3] is not None and chunk[1] is None:
+                chunk[0] = (bytes(seq[pos:pos + length]), 0, length)
+                chunk[3] = None
+
+    def after_checkpoint(self):
+        if not self.repoint:
+            return
+        node = vfs.get(self.path, want_dir=False)
+        self.opened = vfs.pieces(node)
+        blocks = node.extent[0]
+        for chunk in self.chunks:
+            if chunk[3] is not None:
+                chunk[0] = (blocks, chunk[3], chunk[0][2])
+
+    def mark(self, i):
+        return f"chunk{i}"
+
+    def line_count(self, chunk):
+        if chunk[2] is not None:
+            return chunk[2]
+        lines, size = self.counted
+        return chunk[0][2] * lines // size if size else chunk[0][2] // 80
+
+    def carve(self, i, at):
+        # Split region i at the line end at or after offset `at`; returns True if it split
+        seq, pos, length = self.chunks[i][0]
+        cut = line_boundary(seq, at, pos, pos + length)
+        if cut <= pos or cut >= pos + length:
+            return False
+        at = self.chunks[i][3]
+        self.chunks[i:i + 1] = [[(seq, pos, cut - pos), None, None, at],
+                                [(seq, cut, pos + length - cut), None, None, None if at is None else at + cut - pos]]
+        if i < self.first:
+            # Loaded chunks moved up one index; move their marks along
+            for j in reversed(range(self.first, self.last)):
+                self.text.mark_set(self.mark(j + 1), self.mark(j))
+                self.text.mark_gravity(self.mark(j + 1), "left")
+            self.text.mark_unset(self.mark(self.first))
+            self.first += 1
+            self.last += 1
+        return True
+
+    def ready(self, i, from_end=False):
+        # Make chunk i at most about CHUNK_SIZE, cutting from its end when paging up, and
+        # count its lines; returns its index, which moves when an earlier region splits
+        if self.chunks[i][2] is None:
+            seq, pos, length = self.chunks[i][0]
+            if length > 2 * self.CHUNK_SIZE:
+                if from_end:
+                    cut = line_boundary(seq, pos + length - self.CHUNK_SIZE, pos, pos + length, backwards=True)
+                    if self.carve(i, cut):
+                        i += 1
+                else:
+                    self.carve(i, pos + self.CHUNK_SIZE)
+            text = self.chunk_text(i)
+            self.chunks[i][2] = text.count("\n")
+            self.counted[0] += self.chunks[i][2]
+            self.counted[1] += len(text)
+        return i
+
+    def chunk_text(self, i):
+        source, edited = self.chunks[i][:2]
+        if edited is not None:
+            return edited
+        seq, offset, length = source
+        text = seq[offset:offset + length]
+        return text if isinstance(text, str) else text.decode("utf-8")
+
+    def capture(self, i):
+        end = self.mark(i + 1) if i + 1 < self.last else "end-1c"
+        current = self.text.get(self.mark(i), end)
+        if current != self.chunk_text(i):
+            self.chunks[i][1] = current
+            self.chunks[i][2] = current.count("\n")
+
+    def loaded_line_count(self):
+        return int(self.text.index("end-1c").split(".")[0])
+
+    def append_chunk(self):
+        i = self.ready(self.last)
+        self.text.mark_set(self.mark(i), "end-1c")
+        self.text.mark_gravity(self.mark(i), "left")
+        self.text.insert("end-1c", self.chunk_text(i))
+        self.last += 1
+
+    def prepend_chunk(self):
+        i = self.ready(self.first - 1, from_end=True)
+        for j in range(self.first, self.last):
+            self.text.mark_gravity(self.mark(j), "right")
+        self.text.insert("1.0", self.chunk_text(i))
+        for j in range(self.first, self.last):
+            self.text.mark_gravity(self.mark(j), "left")
+        self.text.mark_set(self.mark(i), "1.0")
+        self.text.mark_gravity(self.mark(i), "left")
+        self.first -= 1
+
+    def drop_first(self):
+        self.capture(self.first)
+        removed = int(self.text.index(self.mark(self.first + 1)).split(".")[0]) - 1
+        self.text.delete("1.0", self.mark(self.first + 1))
+        self.text.mark_unset(self.mark(self.first))
+        self.first += 1
+        return removed
+
+    def drop_last(self):
+        self.capture(self.last - 1)
+        self.text.delete(self.mark(self.last - 1), "end-1c")
+        self.text.mark_unset(self.mark(self.last - 1))
+        self.last -= 1
+
+    def load_window(self, first, line=0):
+        self.text.configure(state="normal")
+        for i in range(self.first, self.last):
+            self.capture(i)
+            self.text.mark_unset(self.mark(i))
+        self.text.delete("1.0", tk.END)
+        self.first = self.last = first
+        while self.last < len(self.chunks) and self.last - self.first < self.WINDOW:
+            self.append_chunk()
+        self.text.yview(f"{line + 1}.0")
+        if self.read_only:
+            self.text.configure(state="disabled")
+
+    def page(self, down):
+        self.paging = False
+        self.text.configure(state="normal")
+        top = int(self.text.index("@0,0").split(".")[0])
+        if down and self.last < len(self.chunks):
+            self.append_chunk()
+            if self.last - self.first > self.WINDOW:
+                top -= self.drop_first()
+        elif not down and self.first > 0:
+            self.prepend_chunk()
+            top += int(self.text.index(self.mark(self.first + 1)).split(".")[0]) - 1
+            if self.last - self.first > self.WINDOW:
+                self.drop_last()
+        self.text.yview(f"{max(top, 1)}.0")
+        if self.read_only:
+            self.text.configure(state="disabled")
+
+    def on_text_scroll(self, lo, hi):
+        lo, hi = float(lo), float(hi)
+        before = sum(self.line_count(c) for c in self.chunks[:self.first])
+        loaded = self.loaded_line_count()
+        total = max(before + loaded + sum(self.line_count(c) for c in self.chunks[self.last:]), 1)
+        self.scrollbar.set((before + lo * loaded) / total, (before + hi * loaded) / total)
+        self.status_var.set(f"{self.filename}: lines {before + int(lo * loaded) + 1}-{before + int(hi * loaded)} "
+                            f"of ~{total}, chunks {self.first + 1}-{self.last} of {len(self.chunks)}")
+        if self.paging:
+            return
+        if hi >= 0.98 and self.last < len(self.chunks):
+            self.paging = True
+            self.after_idle(self.page, True)
+        elif lo <= 0.02 and self.first > 0:
+            self.paging = True
+            self.after_idle(self.page, False)
+
+    def on_scrollbar(self, *args):
+        if args[0] != "moveto":
+            self.text.yview(*args)
+            return
+        for i in range(self.first, self.last):
+            self.capture(i)
+        counts = [self.line_count(c) for c in self.chunks]
+        target = float(args[1]) * sum(counts)
+        line = 0
+        for k, count in enumerate(counts):
+            if line + count > target or k == len(counts) - 1:
+                break
+            line += count
+        if self.first <= k < self.last:
+            before = sum(counts[:self.first])
+            self.text.yview("moveto", (target - before) / max(self.loaded_line_count(), 1))
+        elif self.chunks[k][2] is None:
+            # Landed inside a region not read yet: start the window at the estimated offset
+            seq, pos, length = self.chunks[k][0]
+            if self.carve(k, pos + int(length * (target - line) / max(counts[k], 1))):
+                k += 1
+            self.load_window(k)
+        else:
+            start = max(k - 1, 0)
+            self.load_window(start, int(target - sum(counts[:start])))
+
+    def save(self):
+        for i in range(self.first, self.last):
+            self.capture(i)
+        pieces = []
+        dirty = 0
+        for source, edited, _, _ in self.chunks:
+            if edited is not None:
+                pieces.append(edited)
+                dirty += 1
+            elif isinstance(source[0], str):
+                pieces.append(source[0][source[1]:source[1] + source[2]])
+            else:
+                pieces.append(source)
+        if dirty:
+            try:
+                vfs_history.run(f"Edit {self.filename}", vfs.write_pieces, self.path, pieces)
+            except VFSError as e:
+                messagebox.showerror("Error", str(e), parent=self)
+                return
+        messagebox.showinfo("Saved", f"File '{self.filename}' saved ({dirty} of {len(self.chunks)} chunks written).")
+        self.destroy()
 
+# --- File Explorer
 class FileExplorerWindow(tk.Toplevel):
-    def __init__(self, master):
+    def __init__(self, master, path="/"):
         super().__init__(master)
         self.title("File Explorer 🗂️")
         self.geometry("700x500")
         self.configure(bg="#1e1e2f")
-        self.current_dir = get_current_dir()
+        self.cwd = path
         self.history = []
+        self.fs = vfs  # the live filesystem, or a VFSSnapshot while browsing one
+        self.listing = None  # cached listing of cwd, dropped when the VFS reports a change
+        self.refresh_pending = None
+        vfs.watch(self.cwd, self.on_fs_change)
 
         # Navigation bar
         nav_frame = tk.Frame(self, bg="#2c2c44")
@@ -401,26 +3235,34 @@ class FileExplorerWindow(tk.Toplevel):
         btn_up.pack(side="left", padx=5, pady=5)
 
         self.path_var = tk.StringVar()
-        self.path_var.set("/" + "/".join(current_path[1:]) if len(current_path) > 1 else "/")
+        self.path_var.set(self.cwd)
         self.path_entry = tk.Entry(nav_frame, textvariable=self.path_var, bg="#30304a", fg="white", relief="flat")
         self.path_entry.pack(side="left", fill="x", expand=True, padx=5, pady=5)
+        self.path_entry.bind("<Return>", lambda e: self.go_to_path())
 
         btn_go = tk.Button(nav_frame, text="Go", command=self.go_to_path, bg="#30304a", fg="white")
         btn_go.pack(side="left", padx=5, pady=5)
 
-        # File/folder listbox
+        btn_undo = tk.Button(nav_frame, text="↶ Undo", command=self.undo, bg="#30304a", fg="white")
+        btn_undo.pack(side="left", padx=5, pady=5)
+
+        btn_redo = tk.Button(nav_frame, text="↷ Redo", command=self.redo, bg="#30304a", fg="white")
+        btn_redo.pack(side="left", padx=5, pady=5)
+
+        btn_snapshots = tk.Button(nav_frame, text="🕓 Snapshots", command=self.show_snapshots, bg="#30304a", fg="white")
+        btn_snapshots.pack(side="left", padx=5, pady=5)
+
+        btn_find = tk.Button(nav_frame, text="🔍 Find", command=self.show_find, bg="#30304a", fg="white")
+        btn_find.pack(side="left", padx=5, pady=5)
+
+        # File/folder list: rows are inodes straight from the cached folder listing
         self.list_frame = tk.Frame(self, bg="#1e1e2f")
         self.list_frame.pack(fill="both", expand=True, padx=10, pady=10)
 
-        self.file_listbox = tk.Listbox(self.list_frame, bg="#30304a", fg="white", font=("Segoe UI", 11))
+        self.file_listbox = VirtualList(self.list_frame, row_height=24, font=("Segoe UI", 11),
+                                        text=lambda n: f"[Folder] {n.name}" if n.is_dir else n.name)
         self.file_listbox.pack(side="left", fill="both", expand=True)
-
-        scrollbar = tk.Scrollbar(self.list_frame)
-        scrollbar.pack(side="right", fill="y")
-        self.file_listbox.config(yscrollcommand=scrollbar.set)
-        scrollbar.config(command=self.file_listbox.yview)
-
-        self.file_listbox.bind("<Double-Button-1>", self.open_selected)
+        self.file_listbox.on_activate = self.open_selected
 
         # Buttons below listbox
         btn_frame = tk.Frame(self, bg="#2c2c44")
@@ -441,33 +3283,65 @@ class FileExplorerWindow(tk.Toplevel):
         btn_delete = tk.Button(btn_frame, text="Delete", command=self.delete_item, bg="#30304a", fg="white")
         btn_delete.pack(side="left", padx=5)
 
+        btn_import = tk.Button(btn_frame, text="Import", command=self.import_host, bg="#30304a", fg="white")
+        btn_import.pack(side="left", padx=5)
+
+        btn_export = tk.Button(btn_frame, text="Export", command=self.export_host, bg="#30304a", fg="white")
+        btn_export.pack(side="left", padx=5)
+
         self.refresh_list()
 
+    def on_fs_change(self, path, event):
+        if not self.winfo_exists():
+            return False
+        if path != self.cwd or self.fs is not vfs:
+            return False
+        self.listing = None
+        if self.refresh_pending is None:
+            self.refresh_pending = self.after_idle(self.refresh_list)
+
+    def set_cwd(self, path):
+        vfs.unwatch(self.cwd, self.on_fs_change)
+        self.cwd = path
+        self.listing = None
+        if self.fs is vfs:
+            vfs.watch(path, self.on_fs_change)
+
     def refresh_list(self):
-        self.current_dir = get_current_dir()
-        self.file_listbox.delete(0, tk.END)
-        folders = [k for k,v in self.current_dir.items() if isinstance(v, dict)]
-        files = [k for k,v in self.current_dir.items() if isinstance(v, str)]
-        for f in sorted(folders):
-            self.file_listbox.insert(tk.END, f"[Folder] {f}")
-        for f in sorted(files):
-            self.file_listbox.insert(tk.END, f)
-        self.path_var.set("/" + "/".join(current_path[1:]) if len(current_path) > 1 else "/")
+        self.refresh_pending = None
+        if self.listing is None:
+            keep_position = True
+            if not self.fs.isdir(self.cwd):
+                self.set_cwd("/")
+                keep_position = False
+            self.listing = self.fs.listdir(self.cwd)
+            self.file_listbox.set_items(self.listing, keep_position=keep_position)
+        self.path_var.set(self.cwd)
+
+    def change_dir(self, path):
+        self.history.append(self.cwd)
+        self.set_cwd(path)
+        self.file_listbox.set_items(())
+        self.refresh_list()
+
+    def selected_node(self, action):
+        sel = self.file_listbox.curselection()
+        if not sel:
+            messagebox.showinfo("Info", f"Select a file or folder{action}.")
+            return None
+        return self.file_listbox.get(sel[0])
 
     def go_back(self):
         if self.history:
-            prev_path = self.history.pop()
-            current_path.clear()
-            current_path.extend(prev_path)
+            self.set_cwd(self.history.pop())
+            self.file_listbox.set_items(())
             self.refresh_list()
         else:
             messagebox.showinfo("Info", "No back history.")
 
     def go_up(self):
-        if len(current_path) > 1:
-            self.history.append(current_path[:])
-            current_path.pop()
-            self.refresh_list()
+        if self.cwd != "/":
+            self.change_dir(vfs.split(self.cwd)[0])
         else:
             messagebox.showinfo("Info", "Already at root folder.")
 
@@ -476,42 +3350,38 @@ class FileExplorerWindow(tk.Toplevel):
         if not path_str.startswith("/"):
             messagebox.showerror("Error", "Path must start with '/'")
             return
-        parts = path_str.strip("/").split("/") if path_str.strip("/") else []
-        d = virtual_fs
-        try:
-            new_path = ["root"]
-            for part in parts:
-                if part in d and isinstance(d[part], dict):
-                    d = d[part]
-                    new_path.append(part)
-                else:
-                    raise KeyError
-            self.history.append(current_path[:])
-            current_path.clear()
-            current_path.extend(new_path)
-            self.refresh_list()
-        except KeyError:
+        path = vfs.normpath(path_str)
+        if not self.fs.isdir(path):
             messagebox.showerror("Error", "Path does not exist.")
+            return
+        self.change_dir(path)
 
     def open_selected(self, event=None):
-        sel = self.file_listbox.curselection()
-        if not sel:
-            messagebox.showinfo("Info", "Select a file or folder.")
+        node = self.selected_node("")
+        if node is None:
             return
-        name = self.file_listbox.get(sel[0])
-        is_folder = name.startswith("[Folder] ")
-        item_name = name[9:] if is_folder else name
-
-        if is_folder:
-            self.history.append(current_path[:])
-            current_path.append(item_name)
-            self.refresh_list()
+        path = vfs.join(self.cwd, node.name)
+        if node.is_dir:
+            self.change_dir(path)
         else:
-            self.open_file_editor(item_name)
+            self.open_file_editor(path)
 
-    def open_file_editor(self, filename):
-        file_content = self.current_dir.get(filename, "")
+    def open_file_editor(self, path):
+        if self.fs.size(self.fs.get(path, want_dir=False)) > LARGE_FILE_SIZE:
+            ChunkedEditor(self, path, self.fs)
+            return
+        filename = vfs.split(path)[1]
+        file_content = self.fs.read(path)
         editor_win = tk.Toplevel(self)
+        if self.fs is not vfs:
+            editor_win.title(f"Viewing: {filename} ({self.fs.label})")
+            editor_win.geometry("600x400")
+            editor_win.configure(bg="#1e1e2f")
+            text_area = tk.Text(editor_win, bg="#30304a", fg="white", font=("Segoe UI", 11), wrap="word")
+            text_area.pack(fill="both", expand=True, padx=10, pady=10)
+            text_area.insert("1.0", file_content)
+            text_area.configure(state="disabled")
+            return
         editor_win.title(f"Editing: {filename}")
         editor_win.geometry("600x400")
         editor_win.configure(bg="#1e1e2f")
@@ -522,62 +3392,294 @@ class FileExplorerWindow(tk.Toplevel):
 
         def save_file():
             new_content = text_area.get("1.0", tk.END).rstrip("\n")
-            self.current_dir[filename] = new_content
+            try:
+                vfs_history.run(f"Edit {filename}", vfs.write, path, new_content)
+            except VFSError as e:
+                messagebox.showerror("Error", str(e))
+                return
             messagebox.showinfo("Saved", f"File '{filename}' saved.")
             editor_win.destroy()
 
         save_btn = tk.Button(editor_win, text="Save", command=save_file, bg="#30304a", fg="white")
         save_btn.pack(pady=5)
 
+    def read_only(self):
+        if self.fs is not vfs:
+            messagebox.showinfo("Info", "Snapshots are read-only. Restore it or go back to the live filesystem first.")
+            return True
+        return False
+
     def new_file(self):
+        if self.read_only():
+            return
         name = simpledialog.askstring("New File", "Enter new file name:")
         if not name:
             return
-        if name in self.current_dir:
-            messagebox.showerror("Error", "File or folder with this name already exists.")
-            return
-        self.current_dir[name] = ""
-        self.refresh_list()
+        try:
+            vfs_history.run(f"New file {name}", vfs.create, vfs.join(self.cwd, name))
+        except VFSError as e:
+            messagebox.showerror("Error", str(e))
 
     def new_folder(self):
+        if self.read_only():
+            return
         name = simpledialog.askstring("New Folder", "Enter new folder name:")
         if not name:
             return
-        if name in self.current_dir:
-            messagebox.showerror("Error", "File or folder with this name already exists.")
-            return
-        self.current_dir[name] = {}
-        self.refresh_list()
+        try:
+            vfs_history.run(f"New folder {name}", vfs.mkdir, vfs.join(self.cwd, name))
+        except VFSError as e:
+            messagebox.showerror("Error", str(e))
 
     def rename_item(self):
-        sel = self.file_listbox.curselection()
-        if not sel:
-            messagebox.showinfo("Info", "Select a file or folder to rename.")
+        if self.read_only():
             return
-        old_name = self.file_listbox.get(sel[0])
-        is_folder = old_name.startswith("[Folder] ")
-        old_name_clean = old_name[9:] if is_folder else old_name
-
-        new_name = simpledialog.askstring("Rename", f"Enter new name for '{old_name_clean}':")
-        if not new_name:
+        node = self.selected_node(" to rename")
+        if node is None:
             return
-        if new_name in self.current_dir:
-            messagebox.showerror("Error", "Name already exists.")
+        new_name = simpledialog.askstring("Rename", f"Enter new name for '{node.name}':")
+        if not new_name:
             return
-        self.current_dir[new_name] = self.current_dir.pop(old_name_clean)
-        self.refresh_list()
+        try:
+            vfs_history.run(f"Rename {node.name}", vfs.rename, vfs.join(self.cwd, node.name), new_name)
+        except VFSError as e:
+            messagebox.showerror("Error", str(e))
 
     def delete_item(self):
+        if self.read_only():
+            return
+        node = self.selected_node(" to delete")
+        if node is None:
+            return
+        if messagebox.askyesno("Delete", f"Are you sure you want to delete '{node.name}'?"):
+            try:
+                vfs_history.run(f"Delete {node.name}", vfs.delete, vfs.join(self.cwd, node.name))
+            except VFSError as e:
+                messagebox.showerror("Error", str(e))
+
+    def import_host(self):
+        if self.read_only():
+            return
+        choice = messagebox.askyesnocancel("Import", "Import a folder?\n(No picks a tar archive instead.)", parent=self)
+        if choice is None:
+            return
+        if choice:
+            source = filedialog.askdirectory(parent=self, title="Folder to import")
+        else:
+            source = filedialog.askopenfilename(parent=self, title="Archive to import",
+                                                filetypes=[("Tar archives", "*.tar *.tar.gz *.tgz *.tar.bz2 *.tar.xz"),
+                                                           ("All files", "*")])
+        if source:
+            self.run_transfer("Importing", "import", source, self.cwd)
+
+    def export_host(self):
+        node = None
         sel = self.file_listbox.curselection()
-        if not sel:
-            messagebox.showinfo("Info", "Select a file or folder to delete.")
+        if sel:
+            node = self.file_listbox.get(sel[0])
+        source = vfs.join(self.cwd, node.name) if node is not None else self.cwd
+        choice = messagebox.askyesnocancel("Export", f"Export '{source}' to a folder?\n(No writes a tar archive instead.)",
+                                           parent=self)
+        if choice is None:
             return
-        name = self.file_listbox.get(sel[0])
-        is_folder = name.startswith("[Folder] ")
-        name_clean = name[9:] if is_folder else name
-        if messagebox.askyesno("Delete", f"Are you sure you want to delete '{name_clean}'?"):
-            del self.current_dir[name_clean]
-            self.refresh_list()
+        if choice:
+            target = filedialog.askdirectory(parent=self, title="Export into folder")
+        else:
+            target = filedialog.asksaveasfilename(parent=self, title="Export archive", defaultextension=".tar.gz",
+                                                  initialfile=f"{host_name(source)}.tar.gz")
+        if target:
+            self.run_transfer("Exporting", "export", source, target, self.fs)
+
+    def run_transfer(self, title, mode, source, target, fs=None):
+        win = tk.Toplevel(self)
+        win.title(title)
+        win.geometry("420x150")
+        win.configure(bg="#1e1e2f")
+        status_var = tk.StringVar(value=f"{title} {source}...")
+        tk.Label(win, textvariable=status_var, bg="#1e1e2f", fg="white", anchor="w").pack(fill="x", padx=10, pady=(10, 5))
+        bar = tk.Canvas(win, height=18, bg="#30304a", highlightthickness=0)
+        bar.pack(fill="x", padx=10, pady=5)
+        fill = bar.create_rectangle(0, 0, 0, 18, fill="#4a90e2", width=0)
+
+        def on_progress(transfer):
+            if not win.winfo_exists():
+                transfer.cancel()
+                return
+            bar.coords(fill, 0, 0, bar.winfo_width() * transfer.progress(), 18)
+            status_var.set(f"{title}: {transfer.files} file(s), {transfer.progress():.0%}")
+
+        def on_done(transfer):
+            if win.winfo_exists():
+                win.destroy()
+            if transfer.error:
+                messagebox.showerror("Error", transfer.summary())
+            else:
+                lines = [transfer.summary()] + [f"{path}: {reason}" for path, reason in transfer.skipped[:10]]
+                messagebox.showinfo(title, "\n".join(lines))
+
+        try:
+            transfer = VFSTransfer(fs or vfs, mode, source, target, on_progress, on_done)
+        except VFSError as e:
+            win.destroy()
+            messagebox.showerror("Error", str(e))
+            return
+        tk.Button(win, text="Cancel", command=transfer.cancel, bg="#30304a", fg="white").pack(pady=10)
+        win.protocol("WM_DELETE_WINDOW", transfer.cancel)
+
+    def undo(self):
+        snap = vfs_history.undo()
+        if snap is None:
+            messagebox.showinfo("Info", "Nothing to undo.")
+
+    def redo(self):
+        snap = vfs_history.redo()
+        if snap is None:
+            messagebox.showinfo("Info", "Nothing to redo.")
+
+    def browse(self, fs):
+        self.fs = fs
+        self.history = []
+        self.set_cwd(self.cwd if fs.isdir(self.cwd) else "/")
+        self.file_listbox.set_items(())
+        self.refresh_list()
+        if fs is vfs:
+            self.title("File Explorer 🗂️")
+        else:
+            self.title(f"File Explorer 🗂️ — snapshot: {fs.label} ({fs.time:%H:%M:%S})")
+
+    def show_find(self):
+        win = tk.Toplevel(self)
+        win.title("Find")
+        win.geometry("520x420")
+        win.configure(bg="#1e1e2f")
+        win.search = None
+        results = []
+
+        form = tk.Frame(win, bg="#2c2c44")
+        form.pack(fill="x", padx=10, pady=10)
+        tk.Label(form, text="Name:", bg="#2c2c44", fg="white").grid(row=0, column=0, sticky="w", padx=5, pady=2)
+        name_var = tk.StringVar()
+        name_entry = tk.Entry(form, textvariable=name_var, bg="#30304a", fg="white", relief="flat")
+        name_entry.grid(row=0, column=1, columnspan=3, sticky="ew", padx=5, pady=2)
+        tk.Label(form, text="Containing:", bg="#2c2c44", fg="white").grid(row=1, column=0, sticky="w", padx=5, pady=2)
+        content_var = tk.StringVar()
+        tk.Entry(form, textvariable=content_var, bg="#30304a", fg="white", relief="flat").grid(
+            row=1, column=1, columnspan=3, sticky="ew", padx=5, pady=2)
+        mode_var = tk.StringVar(value="name")
+        for col, (text, mode) in enumerate((("Contains", "name"), ("Glob", "glob"), ("Regex", "regex")), 1):
+            tk.Radiobutton(form, text=text, variable=mode_var, value=mode, bg="#2c2c44", fg="white",
+                           selectcolor="#30304a", activebackground="#2c2c44").grid(row=2, column=col, sticky="w")
+        form.columnconfigure(1, weight=1)
+
+        status_var = tk.StringVar(value=f"Searching in {self.cwd}")
+        tk.Label(win, textvariable=status_var, bg="#1e1e2f", fg="white", anchor="w").pack(fill="x", padx=10)
+
+        result_list = VirtualList(win, row_height=22, font=("Segoe UI", 10),
+                                  text=lambda r: r if isinstance(r, str) else f"{r[0]}:{r[1]}: {r[2]}")
+        result_list.pack(fill="both", expand=True, padx=10, pady=10)
+
+        def on_batch(batch):
+            if not win.winfo_exists():
+                win.search.cancel()
+                return
+            results.extend(batch)
+            result_list.set_items(results, keep_position=True)
+            status_var.set(f"{len(results)} match(es)...")
+
+        def on_done(search):
+            if win.winfo_exists():
+                status_var.set(search.summary())
+
+        def start(event=None):
+            stop()
+            if not name_var.get() and not content_var.get():
+                return
+            del results[:]
+            result_list.set_items(results)
+            try:
+                win.search = VFSSearch(vfs, self.cwd if vfs.isdir(self.cwd) else "/", name_var.get(),
+                                       mode_var.get(), content_var.get(), on_batch, on_done)
+            except (re.error, VFSError) as e:
+                messagebox.showerror("Error", str(e), parent=win)
+                return
+            status_var.set("Searching...")
+
+        def stop():
+            if win.search is not None and not win.search.done:
+                win.search.cancel()
+
+        def activate(index=None):
+            sel = result_list.curselection()
+            if not sel:
+                return
+            result = result_list.get(sel[0])
+            path = result if isinstance(result, str) else result[0]
+            if self.fs is not vfs:
+                self.browse(vfs)
+            if vfs.isdir(path):
+                self.change_dir(path)
+            elif vfs.exists(path):
+                self.change_dir(vfs.split(path)[0])
+                self.open_file_editor(path)
+            else:
+                messagebox.showinfo("Info", f"'{path}' no longer exists.", parent=win)
+
+        result_list.on_activate = activate
+        name_entry.bind("<Return>", start)
+        name_entry.focus_set()
+        btn_frame = tk.Frame(win, bg="#2c2c44")
+        btn_frame.pack(fill="x", padx=10, pady=(0, 10))
+        tk.Button(btn_frame, text="Search", command=start, bg="#30304a", fg="white").pack(side="left", padx=5)
+        tk.Button(btn_frame, text="Stop", command=stop, bg="#30304a", fg="white").pack(side="left", padx=5)
+        tk.Button(btn_frame, text="Open", command=activate, bg="#30304a", fg="white").pack(side="left", padx=5)
+        win.bind("<Destroy>", lambda e: stop() if e.widget is win else None)
+
+    def show_snapshots(self):
+        win = tk.Toplevel(self)
+        win.title("Snapshots")
+        win.geometry("420x320")
+        win.configure(bg="#1e1e2f")
+        snaps = vfs_history.all_snapshots()
+        listbox = tk.Listbox(win, bg="#30304a", fg="white", font=("Segoe UI", 10))
+        listbox.pack(fill="both", expand=True, padx=10, pady=10)
+        for snap in snaps:
+            listbox.insert(tk.END, f"{snap.time:%H:%M:%S}  {snap.label}")
+
+        def chosen():
+            sel = listbox.curselection()
+            if not sel:
+                messagebox.showinfo("Info", "Select a snapshot.", parent=win)
+                return None
+            return snaps[sel[0]]
+
+        def take():
+            label = simpledialog.askstring("Take Snapshot", "Snapshot name:", parent=win)
+            if label:
+                vfs_history.take(label)
+                win.destroy()
+                self.show_snapshots()
+
+        def browse():
+            snap = chosen()
+            if snap is not None:
+                self.browse(snap)
+                win.destroy()
+
+        def restore():
+            snap = chosen()
+            if snap is not None and messagebox.askyesno("Restore", f"Restore the filesystem to '{snap.label}'?", parent=win):
+                vfs_history.restore(snap)
+                self.browse(vfs)
+                win.destroy()
+
+        def live():
+            self.browse(vfs)
+            win.destroy()
+
+        btn_frame = tk.Frame(win, bg="#2c2c44")
+        btn_frame.pack(fill="x", padx=10, pady=(0, 10))
+        for text, command in (("Take Snapshot", take), ("Browse", browse), ("Restore", restore), ("Live", live)):
+            tk.Button(btn_frame, text=text, command=command, bg="#30304a", fg="white").pack(side="left", padx=5)
 
 def open_file_explorer():
     FileExplorerWindow(root)
@@ -601,27 +3703,656 @@ def open_settings_app():
     tk.Label(settings, text="Theme", bg="#ececec", font=("Segoe UI", 12, "bold")).pack(pady=section_pad)
     theme_var = tk.StringVar(value="Gradient")
     def apply_theme(opt):
-        if opt == "Light":
-            root.configure(bg="white")
-        elif opt == "Dark":
-            root.configure(bg="#121212")
-        elif opt == "Gradient":
-            # simulated
-            pass
+        # "Gradient" keeps the default dark windows on top of the gradient wallpaper
+        theme_registry.apply("light" if opt == "Light" else "dark")
         print("[Theme]", opt)
     tk.OptionMenu(settings, theme_var, "Gradient", "Light", "Dark", command=apply_theme).pack()
 
     # === other settings stubbed ===
     tk.Label(settings, text="(Other settings simulated)", bg="#ececec").pack(pady=section_pad)
 
+# --- Expression engine ---
+# Calculator input is parsed with ast and checked against a whitelist: numbers, the
+# arithmetic operators, the constants and functions below, and any variable names the
+# caller allows (the plotter's x). Sub-expressions that only involve constants are
+# folded at compile time, and what is left is compiled once to a code object that runs
+# with no builtins. Compiled expressions are kept in an LRU cache keyed by source.
+# Every failure, at compile time or when evaluating, is raised as ExprError.
+class ExprError(Exception):
+    pass
+
+def safe_pow(base, exponent):
+    if (isinstance(base, int) and isinstance(exponent, int) and exponent > 0 and abs(base) > 1
+            and exponent * math.log2(abs(base)) > 4096):
+        raise OverflowError
+    result = base ** exponent
+    if isinstance(result, complex):
+        raise ValueError
+    return result
+
+def safe_factorial(n):
+    if n > 1000:
+        raise OverflowError
+    return math.factorial(n)
+
+CALC_FUNCTIONS = dict({name: getattr(math, name) for name in (
+    "sin", "cos", "tan", "asin", "acos", "atan", "atan2", "sinh", "cosh", "tanh", "exp", "log", "log10",
+    "log2", "sqrt", "floor", "ceil", "degrees", "radians", "hypot", "fabs")},
+    ln=math.log, abs=abs, round=round, min=min, max=max, pow=safe_pow, factorial=safe_factorial)
+CALC_CONSTANTS = {"pi": math.pi, "e": math.e, "tau": math.tau, "inf": math.inf}
+CALC_NAMESPACE = dict(CALC_FUNCTIONS, __builtins__={}, _pow=safe_pow)
+CALC_SYMBOLS = (("^", "**"), ("π", "pi"), ("×", "*"), ("÷", "/"), ("√", "sqrt"))
+BIN_OPS = {ast.Add: operator.add, ast.Sub: operator.sub, ast.Mult: operator.mul, ast.Div: operator.truediv,
+           ast.FloorDiv: operator.floordiv, ast.Mod: operator.mod, ast.Pow: safe_pow}
+UNARY_OPS = {ast.UAdd: operator.pos, ast.USub: operator.neg}
+CALC_ERRORS = (ZeroDivisionError, ValueError, OverflowError, TypeError)
+MAX_RESULT_BITS = 12000  # about 3600 digits, safely under what str() will print for an int
+
+def result_error(value):
+    # The message for a result the calculator cannot show, or None if it is fine
+    if not isinstance(value, (int, float)):
+        return "Invalid result"
+    if isinstance(value, int) and value.bit_length() > MAX_RESULT_BITS:
+        return "Result too large"
+    return None
+
+def calc_error_message(error):
+    if isinstance(error, ZeroDivisionError):
+        return "Division by zero"
+    if isinstance(error, OverflowError):
+        return "Result too large"
+    if isinstance(error, TypeError):
+        return "Invalid arguments"
+    return "Math domain error"
+
+class CompiledExpr:
+    __slots__ = ("source", "names", "code", "value")
+
+    def __init__(self, source, names, code=None, value=None):
+        self.source = source
+        self.names = names
+        self.code = code  # None when the whole expression folded to value
+        self.value = value
+
+    def __call__(self, namespace=None, **values):
+        if self.code is None:
+            return self.value
+        return eval(self.code, namespace or CALC_NAMESPACE, values)
+
+class ExprEngine:
+    def __init__(self, cache_size=256):
+        self.cache_size = cache_size
+        self.cache = OrderedDict()
+        self.stats = {"hits": 0, "misses": 0}
+
+    def compile(self, text, names=()):
+        key = (text, names)
+        compiled = self.cache.get(key)
+        if compiled is not None:
+            self.cache.move_to_end(key)
+            self.stats["hits"] += 1
+            return compiled
+        self.stats["misses"] += 1
+        source = text
+        for symbol, replacement in CALC_SYMBOLS:
+            source = source.replace(symbol, replacement)
+        if not source.strip():
+            raise ExprError("Empty expression")
+        try:
+            tree = ast.parse(source.strip(), mode="eval")
+            body = self.check(tree.body, names)
+        except SyntaxError as e:
+            raise ExprError(f"Syntax error at position {e.offset or 0}") from None
+        except (RecursionError, MemoryError):  # the parser runs out of stack as MemoryError
+            raise ExprError("Expression too deeply nested") from None
+        if isinstance(body, ast.Constant):
+            compiled = CompiledExpr(text, names, value=body.value)
+        else:
+            code = compile(ast.fix_missing_locations(ast.Expression(body)), "<calc>", "eval")
+            compiled = CompiledExpr(text, names, code)
+        self.cache[key] = compiled
+        if len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+        return compiled
+
+    def fold(self, func, args, node):
+        try:
+            value = func(*args)
+        except CALC_ERRORS as e:
+            raise ExprError(f"{calc_error_message(e)} at position {node.col_offset + 1}") from None
+        error = result_error(value)
+        if error:
+            raise ExprError(f"{error} at position {node.col_offset + 1}")
+        return ast.copy_location(ast.Constant(value), node)
+
+    def check(self, node, names):
+        where = f"at position {getattr(node, 'col_offset', 0) + 1}"
+        if isinstance(node, ast.Constant):
+            if type(node.value) not in (int, float):
+                raise ExprError(f"Only numbers are allowed {where}")
+            return node
+        if isinstance(node, ast.Name):
+            if node.id in names:
+                return node
+            if node.id in CALC_CONSTANTS:
+                return ast.copy_location(ast.Constant(CALC_CONSTANTS[node.id]), node)
+            if node.id in CALC_FUNCTIONS:
+                raise ExprError(f"'{node.id}' needs arguments {where}")
+            raise ExprError(f"Unknown name '{node.id}' {where}")
+        if isinstance(node, ast.Attribute):
+            # Old-style math.sin(...) is accepted as sin(...)
+            if isinstance(node.value, ast.Name) and node.value.id == "math":
+                return self.check(ast.copy_location(ast.Name(node.attr, ast.Load()), node), names)
+            raise ExprError(f"Attribute access is not allowed {where}")
+        if isinstance(node, ast.UnaryOp) and type(node.op) in UNARY_OPS:
+            operand = self.check(node.operand, names)
+            if isinstance(operand, ast.Constant):
+                return self.fold(UNARY_OPS[type(node.op)], (operand.value,), node)
+            return ast.copy_location(ast.UnaryOp(node.op, operand), node)
+        if isinstance(node, ast.BinOp) and type(node.op) in BIN_OPS:
+            left = self.check(node.left, names)
+            right = self.check(node.right, names)
+            if isinstance(left, ast.Constant) and isinstance(right, ast.Constant):
+                return self.fold(BIN_OPS[type(node.op)], (left.value, right.value), node)
+            if isinstance(node.op, ast.Pow):
+                return ast.copy_location(ast.Call(ast.Name("_pow", ast.Load()), [left, right], []), node)
+            return ast.copy_location(ast.BinOp(left, node.op, right), node)
+        if isinstance(node, ast.Call):
+            func = node.func
+            if isinstance(func, ast.Attribute) and isinstance(func.value, ast.Name) and func.value.id == "math":
+                func = ast.copy_location(ast.Name(func.attr, ast.Load()), func)
+            if not isinstance(func, ast.Name) or func.id not in CALC_FUNCTIONS:
+                name = func.id if isinstance(func, ast.Name) else "this"
+                raise ExprError(f"Unknown function '{name}' {where}")
+            if node.keywords or any(isinstance(a, ast.Starred) for a in node.args):
+                raise ExprError(f"Only plain arguments are allowed {where}")
+            args = [self.check(a, names) for a in node.args]
+            if all(isinstance(a, ast.Constant) for a in args):
+                return self.fold(CALC_FUNCTIONS[func.id], [a.value for a in args], node)
+            return ast.copy_location(ast.Call(ast.Name(func.id, ast.Load()), args, []), node)
+        kind = type(node).__name__
+        raise ExprError(f"'{kind}' is not allowed in a calculation {where}")
+
+    def evaluate(self, text, **values):
+        compiled = self.compile(text, tuple(sorted(values)))
+        try:
+            value = compiled(**values)
+        except CALC_ERRORS as e:
+            raise ExprError(calc_error_message(e)) from None
+        error = result_error(value)
+        if error:
+            raise ExprError(error)
+        return value
+
+    def benchmark(self, seconds=0.3):
+        samples = ["2+3*4", "sqrt(16)+2^10", "sin(π/4)*cos(π/3)+log10(1000)", "(1+2)*(3+4)/5-6%4"]
+
+        def rate(func):
+            count = 0
+            start = time.perf_counter()
+            while time.perf_counter() - start < seconds:
+                for text in samples:
+                    func(text)
+                count += len(samples)
+            return count / (time.perf_counter() - start)
+
+        def legacy(text):
+            return eval(text.replace("^", "**").replace("π", str(math.pi)), {"__builtins__": None}, math.__dict__)
+
+        def uncached(text):
+            self.cache.clear()
+            return self.evaluate(text)
+
+        variable = self.compile("sin(x)*2 + x^2 - sqrt(abs(x))", ("x",))
+        count = 0
+        start = time.perf_counter()
+        while time.perf_counter() - start < seconds:
+            for x in range(1000):
+                variable(x=x)
+            count += 1000
+        compiled_rate = count / (time.perf_counter() - start)
+        results = [("legacy string eval", rate(legacy)), ("engine, parse every time", rate(uncached)),
+                   ("engine, cached", rate(self.evaluate)), ("compiled expression in x", compiled_rate)]
+        return [f"{name}: {value:,.0f} evals/sec" for name, value in results] + \
+            [f"Cache: {len(self.cache)}/{self.cache_size} entries, {self.stats['hits']} hits, {self.stats['misses']} misses"]
+
+calc_engine = ExprEngine()
+
+# --- Function plotting ---
+# Plot mode evaluates a compiled expression in x over the visible range. Samples sit on
+# a grid of step 2**level, so after a pan or a zoom most of the new grid's points are
+# points of the old one: PlotSampler copies those over and evaluates only the rest.
+# With NumPy the missing points are evaluated in one pass through ufuncs; without it,
+# one point at a time. decimate() then reduces the samples to first/min/max/last per
+# pixel column, so the canvas only ever draws about four points per pixel.
+if np is not None:
+    def numpy_factorial(values):
+        values = np.asarray(values, dtype=float)
+        ok = (values >= 0) & (values <= 170) & (values == np.floor(values))
+        out = np.full(values.shape, np.nan)
+        out[ok] = [math.factorial(int(v)) for v in values[ok]]
+        return out
+
+    PLOT_NAMESPACE = {
+        "__builtins__": {}, "sin": np.sin, "cos": np.cos, "tan": np.tan, "asin": np.arcsin, "acos": np.arccos,
+        "atan": np.arctan, "atan2": np.arctan2, "sinh": np.sinh, "cosh": np.cosh, "tanh": np.tanh, "exp": np.exp,
+        "log": np.log, "ln": np.log, "log10": np.log10, "log2": np.log2, "sqrt": np.sqrt, "floor": np.floor,
+        "ceil": np.ceil, "degrees": np.degrees, "radians": np.radians, "hypot": np.hypot, "fabs": np.fabs,
+        "abs": np.abs, "round": np.round, "min": np.minimum, "max": np.maximum, "factorial": numpy_factorial,
+        "pow": lambda a, b: np.power(np.asarray(a, dtype=float), b),
+        "_pow": lambda a, b: np.power(np.asarray(a, dtype=float), b),
+    }
+
+class PlotSampler:
+    def __init__(self, text, samples):
+        self.compiled = calc_engine.compile(text, ("x",))
+        self.samples = samples
+        self.level = None  # grid of the cached samples: x = k * 2**level for k in [k0, k0 + len(ys))
+        self.k0 = 0
+        self.ys = None
+        self.evaluated = 0
+
+    def grid(self, x0, x1):
+        level = math.floor(math.log2(max(x1 - x0, 1e-300) / self.samples))
+        step = 2.0 ** level
+        return level, math.floor(x0 / step), math.ceil(x1 / step) + 1
+
+    def evaluate(self, xs):
+        if np is not None:
+            try:
+                with np.errstate(all="ignore"):
+                    ys = self.compiled(PLOT_NAMESPACE, x=xs)
+                return np.array(np.broadcast_to(np.asarray(ys, dtype=float), xs.shape))
+            except CALC_ERRORS as e:
+                raise ExprError(calc_error_message(e)) from None
+        ys = []
+        for x in xs:
+            try:
+                y = self.compiled(x=x)
+                ys.append(float(y) if isinstance(y, (int, float)) else math.nan)
+            except CALC_ERRORS:
+                ys.append(math.nan)
+        return ys
+
+    def sample(self, x0, x1):
+        level, a, b = self.grid(x0, x1)
+        step = 2.0 ** level
+        old_level, old_k0, old_ys = self.level, self.k0, self.ys
+        reuse = (old_ys is not None and abs(level - old_level) <= 40
+                 and (abs(a) + abs(b)) << abs(level - old_level) < 1 << 62)
+        if np is not None:
+            ks = np.arange(a, b, dtype=np.int64)
+            ys = np.full(len(ks), np.nan)
+            known = np.zeros(len(ks), dtype=bool)
+            if reuse:
+                if level >= old_level:
+                    old_ks = ks * (1 << (level - old_level))
+                    known = (old_ks >= old_k0) & (old_ks < old_k0 + len(old_ys))
+                else:
+                    factor = 1 << (old_level - level)
+                    old_ks = ks // factor
+                    known = (ks % factor == 0) & (old_ks >= old_k0) & (old_ks < old_k0 + len(old_ys))
+                ys[known] = old_ys[old_ks[known] - old_k0]
+            missing = ~known
+            self.evaluated = int(missing.sum())
+            if self.evaluated:
+                ys[missing] = self.evaluate(ks[missing] * step)
+            xs = ks * step
+        else:
+            ys = []
+            pending = []
+            for k in range(a, b):
+                old_k = None
+                if reuse:
+                    if level >= old_level:
+                        old_k = k << (level - old_level)
+                    elif k % (1 << (old_level - level)) == 0:
+                        old_k = k >> (old_level - level)
+                if old_k is not None and old_k0 <= old_k < old_k0 + len(old_ys):
+                    ys.append(old_ys[old_k - old_k0])
+                else:
+                    ys.append(None)
+                    pending.append(k - a)
+            for i, y in zip(pending, self.evaluate([(a + i) * step for i in pending])):
+                ys[i] = y
+            self.evaluated = len(pending)
+            xs = [k * step for k in range(a, b)]
+        self.level, self.k0, self.ys = level, a, ys
+        return xs, ys
+
+def decimate(xs, ys, x0, x1, width):
+    # Per pixel column: (column, first, min, max, last), NaN columns left out
+    columns = []
+    scale = width / (x1 - x0)
+    if np is not None:
+        px = np.clip(((xs - x0) * scale).astype(np.int64), -1, width)
+        starts = np.searchsorted(px, np.arange(width + 1))
+        keep = starts[:-1] < starts[1:]
+        first = starts[:-1][keep]
+        last = starts[1:][keep] - 1
+        inside = ys[:starts[-1]]
+        lows = np.fmin.reduceat(inside, first)
+        highs = np.fmax.reduceat(inside, first)
+        firsts = np.where(np.isnan(ys[first]), lows, ys[first])
+        lasts = np.where(np.isnan(ys[last]), highs, ys[last])
+        for row in zip(np.nonzero(keep)[0].tolist(), firsts.tolist(), lows.tolist(), highs.tolist(), lasts.tolist()):
+            if not math.isnan(row[2]):
+                columns.append(row)
+        return columns
+    current = None
+    for x, y in zip(xs, ys):
+        if y is None or math.isnan(y) or math.isinf(y):
+            continue
+        column = int((x - x0) * scale)
+        if not 0 <= column < width:
+            continue
+        if current is None or current[0] != column:
+            current = [column, y, y, y, y]
+            columns.append(current)
+        else:
+            current[2] = min(current[2], y)
+            current[3] = max(current[3], y)
+            current[4] = y
+    return [tuple(c) for c in columns]
+
+def open_plot_window(master, text=""):
+    win = tk.Toplevel(master)
+    win.title("Plot")
+    win.geometry("640x480")
+    t = theme[current_theme]
+    win.configure(bg=t["bg"])
+    view = {"x0": -10.0, "x1": 10.0, "drag": None, "pending": None, "sampler": None}
+
+    form = tk.Frame(win, bg=t["bg"])
+    form.pack(fill="x", padx=10, pady=10)
+    tk.Label(form, text="y =", font=FONT, bg=t["bg"], fg=t["fg"]).pack(side="left")
+    expr_var = tk.StringVar(value=text if "x" in text else "sin(x) * x")
+    expr_entry = tk.Entry(form, textvariable=expr_var, font=FONT, bg=t["entry_bg"], fg=t["entry_fg"],
+                          insertbackground=t["entry_fg"])
+    expr_entry.pack(side="left", fill="x", expand=True, padx=5)
+    tk.Label(form, text="Samples:", font=FONT, bg=t["bg"], fg=t["fg"]).pack(side="left")
+    samples_var = tk.StringVar(value="1000000" if np is not None else "20000")
+    tk.Entry(form, textvariable=samples_var, width=9, font=FONT, bg=t["entry_bg"], fg=t["entry_fg"],
+             insertbackground=t["entry_fg"]).pack(side="left", padx=5)
+
+    canvas = tk.Canvas(win, bg=t["entry_bg"], highlightthickness=0)
+    canvas.pack(fill="both", expand=True, padx=10)
+    status_var = tk.StringVar()
+    tk.Label(win, textvariable=status_var, font=FONT, bg=t["bg"], fg=t["fg"], anchor="w").pack(fill="x", padx=10, pady=5)
+
+    def replot(event=None):
+        try:
+            samples = max(100, int(samples_var.get()))
+            view["sampler"] = PlotSampler(expr_var.get(), samples)
+        except ValueError:
+            status_var.set("Samples must be a whole number.")
+            return
+        except ExprError as e:
+            view["sampler"] = None
+            canvas.delete("all")
+            status_var.set(f"Error: {e}")
+            return
+        schedule()
+
+    def schedule():
+        if view["pending"] is None:
+            view["pending"] = win.after(16, render)
+
+    def render():
+        view["pending"] = None
+        sampler = view["sampler"]
+        width, height = canvas.winfo_width(), canvas.winfo_height()
+        if sampler is None or width < 2 or height < 2:
+            return
+        x0, x1 = view["x0"], view["x1"]
+        start = time.perf_counter()
+        try:
+            xs, ys = sampler.sample(x0, x1)
+        except ExprError as e:
+            status_var.set(f"Error: {e}")
+            return
+        columns = decimate(xs, ys, x0, x1, width)
+        canvas.delete("all")
+        finite = sorted(v for c in columns for v in (c[2], c[3]) if not math.isinf(v))
+        if not finite:
+            status_var.set("Nothing to plot in this range.")
+            return
+        # Fit y to the 1st-99th percentile of the columns so asymptotes don't flatten the curve
+        low = finite[len(finite) // 100]
+        high = finite[-1 - len(finite) // 100]
+        if high - low < 1e-12:
+            low, high = low - 1, high + 1
+        pad = (high - low) * 0.08
+        low, high = low - pad, high + pad
+
+        def py(y):
+            return max(-10000.0, min(10000.0, (high - y) / (high - low) * height))
+
+        if x0 < 0 < x1:
+            zx = -x0 / (x1 - x0) * width
+            canvas.create_line(zx, 0, zx, height, fill=t["border_color"])
+        if low < 0 < high:
+            canvas.create_line(0, py(0), width, py(0), fill=t["border_color"])
+        segment = []
+        previous = None
+        for column, first, lo, hi, last in columns:
+            if previous is not None and column != previous + 1 and len(segment) >= 4:
+                canvas.create_line(*segment, fill="#4a90e2", width=2)
+                segment = []
+            segment += [column, py(first), column, py(lo), column, py(hi), column, py(last)]
+            previous = column
+        if len(segment) >= 4:
+            canvas.create_line(*segment, fill="#4a90e2", width=2)
+        canvas.create_text(5, 5, anchor="nw", text=f"y {high:.4g}", fill=t["fg"], font=FONT)
+        canvas.create_text(5, height - 5, anchor="sw", text=f"x {x0:.4g} … {x1:.4g}, y {low:.4g}", fill=t["fg"], font=FONT)
+        status_var.set(f"{'NumPy' if np is not None else 'Pure Python'}: {len(ys)} samples, "
+                       f"{sampler.evaluated} evaluated, {len(columns)} columns, "
+                       f"{(time.perf_counter() - start) * 1000:.0f} ms")
+
+    def press(event):
+        view["drag"] = event.x
+
+    def drag(event):
+        if view["drag"] is None:
+            return
+        shift = (view["drag"] - event.x) * (view["x1"] - view["x0"]) / max(canvas.winfo_width(), 1)
+        view["x0"] += shift
+        view["x1"] += shift
+        view["drag"] = event.x
+        schedule()
+
+    def zoom(event, factor):
+        anchor = view["x0"] + (view["x1"] - view["x0"]) * event.x / max(canvas.winfo_width(), 1)
+        view["x0"] = anchor - (anchor - view["x0"]) * factor
+        view["x1"] = anchor + (view["x1"] - anchor) * factor
+        schedule()
+
+    canvas.bind("<ButtonPress-1>", press)
+    canvas.bind("<B1-Motion>", drag)
+    canvas.bind("<ButtonRelease-1>", lambda e: view.update(drag=None))
+    canvas.bind("<MouseWheel>", lambda e: zoom(e, 0.8 if e.delta > 0 else 1.25))
+    canvas.bind("<Button-4>", lambda e: zoom(e, 0.8))
+    canvas.bind("<Button-5>", lambda e: zoom(e, 1.25))
+    canvas.bind("<Configure>", lambda e: schedule())
+    expr_entry.bind("<Return>", replot)
+    tk.Button(form, text="Plot", command=replot, bg=t["btn_bg"], fg=t["btn_fg"], relief="flat").pack(side="left")
+    replot()
+    return win
+
+# --- Batch calculation ---
+# Evaluates a file of expressions, one per line (blank lines and # comments skipped).
+# A driver thread streams the file in CHUNK_LINES pieces to a process pool, keeps at
+# most two chunks per worker in flight, and passes finished chunks on in file order.
+# The pool forks (the module builds the GUI at import time, so a spawned worker would
+# start a second desktop); where fork is unavailable or unsafe next to Tk (macOS) it
+# falls back to threads. Results go to the output file (host files are written by the
+# driver, VFS files by the Tk side) and to on_batch; a bad line is reported as an
+# error row and the run carries on. Every worker thread gets its own ExprEngine, since
+# the engine's LRU cache is not safe to share between threads.
+batch_engines = threading.local()
+
+def evaluate_chunk(lines):
+    engine = getattr(batch_engines, "engine", None)
+    if engine is None:
+        engine = batch_engines.engine = ExprEngine()
+    results = []
+    for number, text in lines:
+        expr = text.strip()
+        if not expr or expr.startswith("#"):
+            continue
+        try:
+            results.append((number, expr, str(engine.evaluate(expr)), None))
+        except ExprError as e:
+            results.append((number, expr, None, str(e)))
+        except Exception as e:
+            # Anything the engine did not anticipate is still this line's problem only
+            results.append((number, expr, None, f"{type(e).__name__}: {e}"))
+    return results
+
+def format_batch_result(row):
+    number, expr, result, error = row
+    return f"{expr} = {result}" if error is None else f"line {number}: {expr}: {error}"
+
+def make_calc_pool():
+    workers = os.cpu_count() or 2
+    if "fork" in multiprocessing.get_all_start_methods() and sys.platform != "darwin":
+        return ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("fork")), "processes", workers
+    return ThreadPoolExecutor(workers), "threads", workers
+
+class CalcBatch:
+    POLL_MS = 50
+    CHUNK_LINES = 2000
+    READ_SIZE = 256 * 1024
+
+    def __init__(self, source, output=None, fs=None, on_batch=None, on_done=None):
+        # With fs, source and output are paths in that VFS; otherwise host paths
+        self.fs = fs
+        self.source = source
+        self.output = output or source + ".out"
+        self.on_batch = on_batch
+        self.on_done = on_done
+        self.queue = queue.Queue(16)
+        self.cancelled = threading.Event()
+        self.lines = 0
+        self.errors = 0
+        self.error = None
+        self.done = False
+        self.mode = None
+        self.started = time.perf_counter()
+        if fs is not None:
+            self.node = fs.get(source, want_dir=False)
+            fs.makedirs(fs.split(self.output)[0])
+            fs.write(self.output, "")
+            fs.readers += 1
+        elif not os.path.isfile(source):
+            raise VFSError(f"'{source}' does not exist.")
+        self.thread = threading.Thread(target=self.run, name="calc-batch", daemon=True)
+        self.thread.start()
+        root.after(self.POLL_MS, self.poll)
+
+    def cancel(self):
+        self.cancelled.set()
+
+    def read_lines(self):
+        if self.fs is None:
+            with open(self.source, encoding="utf-8", errors="replace") as f:
+                for line in f:
+                    yield line.rstrip("\r\n")
+            return
+        decoder = codecs.getincrementaldecoder("utf-8")("replace")
+        tail = ""
+        for chunk in self.fs.iter_bytes(self.node, self.READ_SIZE):
+            lines = (tail + decoder.decode(chunk)).split("\n")
+            tail = lines.pop()
+            yield from lines
+        tail += decoder.decode(b"", final=True)
+        if tail:
+            yield tail
+
+    def read_chunks(self):
+        chunk = []
+        for number, line in enumerate(self.read_lines(), 1):
+            chunk.append((number, line))
+            if len(chunk) >= self.CHUNK_LINES:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+    def run(self):
+        pool, self.mode, workers = make_calc_pool()
+        out = open(self.output, "w", encoding="utf-8") if self.fs is None else None
+        in_flight = deque()
+        try:
+            for chunk in self.read_chunks():
+                if self.cancelled.is_set():
+                    break
+                in_flight.append(pool.submit(evaluate_chunk, chunk))
+                while len(in_flight) >= workers * 2 and not self.cancelled.is_set():
+                    self.emit(in_flight.popleft().result(), out)
+            while in_flight and not self.cancelled.is_set():
+                self.emit(in_flight.popleft().result(), out)
+        except Exception as e:
+            self.error = str(e)
+        finally:
+            pool.shutdown(wait=False, cancel_futures=True)
+            if out is not None:
+                out.close()
+            self.queue.put(None)
+
+    def emit(self, rows, out):
+        if not rows:
+            return
+        if out is not None:
+            out.write("\n".join(format_batch_result(row) for row in rows) + "\n")
+        while not self.cancelled.is_set():
+            try:
+                self.queue.put(rows, timeout=0.1)
+                return
+            except queue.Full:
+                pass
+
+    def poll(self):
+        journal = self.fs.journal if self.fs is not None else None
+        if journal is not None:
+            journal.begin_batch()
+        try:
+            while True:
+                try:
+                    rows = self.queue.get_nowait()
+                except queue.Empty:
+                    break
+                if rows is None:
+                    self.finish()
+                    return
+                self.lines += len(rows)
+                self.errors += sum(1 for row in rows if row[3] is not None)
+                if self.fs is not None:
+                    self.fs.append(self.output, "\n".join(format_batch_result(row) for row in rows) + "\n")
+                if self.on_batch:
+                    self.on_batch(self, rows)
+        finally:
+            if journal is not None:
+                journal.end_batch()
+        root.after(self.POLL_MS, self.poll)
+
+    def finish(self):
+        self.done = True
+        if self.fs is not None:
+            self.fs.readers -= 1
+        if self.on_done:
+            self.on_done(self)
+
+    def summary(self):
+        elapsed = time.perf_counter() - self.started
+        state = "cancelled" if self.cancelled.is_set() else f"error: {self.error}" if self.error else "done"
+        return (f"{self.lines} expression(s), {self.errors} error(s) in {elapsed:.2f}s "
+                f"({self.lines / elapsed if elapsed else 0:,.0f}/s on {self.mode}, {state}) -> {self.output}")
+
 # --- Calculator App ---
-def open_calculator_window():
-    win = AppWindow(root, "Calculator", "🧮")
-    taskbar.add_window(win)
+def build_calculator_window(win):
     t = theme[current_theme]
     cf = win.content_frame
-    for w in cf.winfo_children():
-        w.destroy()
 
     tk.Label(cf, text="Calculator", font=APP_TITLE_FONT, bg=t["bg"], fg=t["fg"]).pack(pady=(12, 10))
 
@@ -644,16 +4375,20 @@ def open_calculator_window():
 
     def calculate(event=None):
         nonlocal expression
+        expression = display_var.get()
         try:
-            exp = expression.replace('^', '**').replace('π', str(math.pi))
-            result = str(eval(exp, {"__builtins__": None}, math.__dict__))
+            result = str(calc_engine.evaluate(expression))
             history_box.insert(tk.END, f"{expression} = {result}")
             display_var.set(result)
             expression = result
-        except Exception:
+        except ExprError as e:
+            history_box.insert(tk.END, f"{expression}: {e}")
+            history_box.see(tk.END)
             display_var.set("Error")
             expression = ""
 
+    display_entry.bind("<Return>", calculate)
+
     def clear(event=None):
         nonlocal expression
         expression = ""
@@ -680,8 +4415,7 @@ def open_calculator_window():
             b = tk.Button(row_frame, text=btn, font=("Segoe UI", 16), width=6, height=2,
                           command=action, bg=t["btn_bg"], fg=t["btn_fg"], relief="flat")
             b.pack(side="left", expand=True, fill="both", padx=3, pady=3)
-            b.bind("<Enter>", lambda e, b=b: b.configure(bg=t["active_bg"]))
-            b.bind("<Leave>", lambda e, b=b: b.configure(bg=t["btn_bg"]))
+            enable_hover(b)
 
     sci_frame = tk.LabelFrame(cf, text="Scientific Functions", bg=t["bg"], fg=t["fg"], font=FONT, padx=10, pady=5)
     sci_frame.pack(fill="x", padx=20, pady=(5, 15))
@@ -695,20 +4429,21 @@ def open_calculator_window():
             update_display('π')
             return
         try:
-            result = str(eval(func, {"__builtins__": None}, math.__dict__))
+            result = str(calc_engine.evaluate(func))
             display_var.set(result)
             expression = result
-        except Exception:
+        except ExprError as e:
+            history_box.insert(tk.END, f"{func}: {e}")
             display_var.set("Error")
             expression = ""
 
     sci_buttons = [
-        ("sin(π/2)", "math.sin(math.pi/2)"),
-        ("cos(0)", "math.cos(0)"),
-        ("tan(π/4)", "math.tan(math.pi/4)"),
-        ("log(10)", "math.log10(10)"),
-        ("ln(1)", "math.log(1)"),
-        ("√(16)", "math.sqrt(16)"),
+        ("sin(π/2)", "sin(π/2)"),
+        ("cos(0)", "cos(0)"),
+        ("tan(π/4)", "tan(π/4)"),
+        ("log(10)", "log10(10)"),
+        ("ln(1)", "ln(1)"),
+        ("√(16)", "sqrt(16)"),
         ("π", "π"),
         ("Clear", "clear")
     ]
@@ -717,17 +4452,340 @@ def open_calculator_window():
         b = tk.Button(sci_frame, text=text, font=FONT, bg=t["btn_bg"], fg=t["btn_fg"], relief="flat",
                       command=lambda c=cmd: handle_sci(c))
         b.pack(side="left", expand=True, fill="both", padx=5, pady=3)
-        b.bind("<Enter>", lambda e, b=b: b.configure(bg=t["active_bg"]))
-        b.bind("<Leave>", lambda e, b=b: b.configure(bg=t["btn_bg"]))
+        enable_hover(b)
+
+    b = tk.Button(sci_frame, text="📈 Plot", font=FONT, bg=t["btn_bg"], fg=t["btn_fg"], relief="flat",
+                  command=lambda: open_plot_window(win, display_var.get()))
+    b.pack(side="left", expand=True, fill="both", padx=5, pady=3)
+    enable_hover(b)
+
+    batch = None
+
+    def on_batch(job, rows):
+        if not history_box.winfo_exists():
+            job.cancel()
+            return
+        history_box.insert(tk.END, *[format_batch_result(row) for row in rows])
+        overflow = history_box.size() - 1000
+        if overflow > 0:
+            history_box.delete(0, overflow - 1)
+        history_box.see(tk.END)
+        display_var.set(f"{job.lines} done, {job.errors} errors")
+
+    def on_batch_done(job):
+        if history_box.winfo_exists():
+            history_box.insert(tk.END, job.summary())
+            history_box.see(tk.END)
+
+    def run_batch():
+        nonlocal batch
+        if batch is not None and not batch.done:
+            if messagebox.askyesno("Batch", "A batch is running. Cancel it?", parent=win):
+                batch.cancel()
+            return
+        choice = messagebox.askyesnocancel("Batch", "Read expressions from a ViewRock file?\n(No picks a file on this computer.)",
+                                           parent=win)
+        if choice is None:
+            return
+        if choice:
+            source = simpledialog.askstring("Batch", "Path of the file in the ViewRock filesystem:", parent=win)
+            fs = vfs
+        else:
+            source = filedialog.askopenfilename(parent=win, title="Expressions file")
+            fs = None
+        if not source:
+            return
+        try:
+            batch = CalcBatch(vfs.normpath(source) if fs else source, fs=fs, on_batch=on_batch, on_done=on_batch_done)
+        except VFSError as e:
+            messagebox.showerror("Error", str(e), parent=win)
+
+    b = tk.Button(sci_frame, text="Batch…", font=FONT, bg=t["btn_bg"], fg=t["btn_fg"], relief="flat", command=run_batch)
+    b.pack(side="left", expand=True, fill="both", padx=5, pady=3)
+    enable_hover(b)
+
+register_app("Calculator", "🧮", build_calculator_window)
+
+def open_calculator_window():
+    return launch_app("Calculator")
+
+# --- Terminal commands ---
+# Both terminals dispatch through one registry: a dict from lower-cased name to Command,
+# so a command costs one lookup however many are registered. The argument spec
+# ("<file> [folder]", "<app...>") is parsed once into the argument counts the dispatcher
+# checks and into the names that tell Tab to complete VFS paths. Command names also
+# live in a prefix trie, and so does each folder's listing (rebuilt only when the
+# folder's cached listing changes), so completion walks the typed prefix instead of
+# scanning every name. Apps can call register_command at any time; each command names
+# the shells it runs in, and a shell is anything with kind, cwd, output, print and clear.
+SHELLS = ("Terminal", "Terminal++")
+PATH_ARGS = {"file", "folder", "path", "output"}
+
+class PrefixTrie:
+    def __init__(self, words=()):
+        self.root = {}
+        for word in words:
+            self.insert(word)
+
+    def insert(self, word):
+        node = self.root
+        for ch in word:
+            node = node.setdefault(ch, {})
+        node[""] = word
+
+    def remove(self, word):
+        trail = [(None, self.root)]
+        for ch in word:
+            node = trail[-1][1].get(ch)
+            if node is None:
+                return
+            trail.append((ch, node))
+        trail[-1][1].pop("", None)
+        while len(trail) > 1 and not trail[-1][1]:
+            ch, _ = trail.pop()
+            trail[-1][1].pop(ch)
+
+    def complete(self, prefix):
+        node = self.root
+        for ch in prefix:
+            node = node.get(ch)
+            if node is None:
+                return []
+        words, stack = [], [node]
+        while stack:
+            node = stack.pop()
+            for ch, child in node.items():
+                if ch == "":
+                    words.append(child)
+                else:
+                    stack.append(child)
+        return sorted(words)
+
+class Command:
+    def __init__(self, name, handler, args="", help="", shells=SHELLS):
+        self.name = name
+        self.handler = handler
+        self.args = args
+        self.help = help
+        self.shells = shells
+        tokens = args.split()
+        self.required = sum(1 for tok in tokens if tok.startswith("<"))
+        self.most = None if any(tok.endswith("...>") or tok.endswith("...]") for tok in tokens) else len(tokens)
+        self.paths = any(tok.strip("<>[]") in PATH_ARGS for tok in tokens)
+
+    def usage(self):
+        return f"{self.name} {self.args}".strip()
+
+command_registry = {}
+command_trie = PrefixTrie()
+
+def register_command(name, handler, args="", help="", shells=SHELLS):
+    name = name.lower()
+    command_registry[name] = command = Command(name, handler, args, help, shells)
+    command_trie.insert(name)
+    return command
+
+def unregister_command(name):
+    if command_registry.pop(name.lower(), None) is not None:
+        command_trie.remove(name.lower())
+
+def run_command(term, line):
+    parts = line.split()
+    if not parts:
+        return
+    command = command_registry.get(parts[0].lower())
+    if command is None or term.kind not in command.shells:
+        term.print(f"Unknown command: {line}")
+        return
+    args = parts[1:]
+    if len(args) < command.required or command.most is not None and len(args) > command.most:
+        term.print(f"Usage: {command.usage()}")
+        return
+    command.handler(term, args)
+
+path_tries = OrderedDict()  # folder path -> (listing it was built from, PrefixTrie)
+
+def path_trie(folder):
+    listing = vfs.listdir(folder)
+    cached = path_tries.get(folder)
+    if cached is not None and cached[0] is listing:
+        path_tries.move_to_end(folder)
+        return cached[1]
+    trie = PrefixTrie(node.name + "/" if node.is_dir else node.name for node in listing)
+    path_tries[folder] = (listing, trie)
+    if len(path_tries) > 64:
+        path_tries.popitem(last=False)
+    return trie
+
+def complete_command(term, entry):
+    # Tab: complete the word before the cursor; list the choices when it cannot be extended
+    before = entry.get()[:entry.index(tk.INSERT)]
+    words = before.split()
+    word = "" if not words or before[-1].isspace() else words[-1]
+    if len(words) <= 1 and word == before.lstrip():
+        choices = [name + " " for name in command_trie.complete(word.lower())
+                   if term.kind in command_registry[name].shells]
+        stem = ""
+    else:
+        command = command_registry.get(words[0].lower())
+        if command is None or not command.paths or term.cwd is None:
+            return "break"
+        stem, _, name = word.rpartition("/")
+        if stem or word.startswith("/"):
+            stem += "/"
+        folder = vfs.normpath(stem or ".", term.cwd)
+        if not vfs.isdir(folder):
+            return "break"
+        choices = [stem + match for match in path_trie(folder).complete(name)]
+    if not choices:
+        return "break"
+    common = choices[0] if len(choices) == 1 else os.path.commonprefix(choices)
+    if len(common) > len(word):
+        start = len(before) - len(word)
+        entry.delete(start, tk.INSERT)
+        entry.insert(start, common)
+    elif len(choices) > 1:
+        term.print("  ".join(choice.rstrip() for choice in choices[:200]))
+    return "break"
+
+# Terminal output is buffered: print() only appends to a ring of at most `scrollback`
+# lines, and one flush per frame writes the ring into the Text widget in a single
+# insert, trims the oldest lines in a single delete and scrolls once. A command that
+# prints 100k lines therefore costs 100k deque appends and one widget update, and
+# neither the ring nor the widget ever holds more than the scrollback limit.
+TERMINAL_SCROLLBACK = 5000
+FRAME_MS = 16
+
+class TerminalOutput:
+    def __init__(self, output_text, scrollback=None):
+        self.output_text = output_text
+        self.scrollback = scrollback or TERMINAL_SCROLLBACK
+        self.pending = deque(maxlen=self.scrollback)
+        self.lines = 0  # lines currently in the widget
+        self.flush_id = None
+
+    def print(self, text):
+        self.pending.extend(text.split("\n"))
+        if self.flush_id is None:
+            self.flush_id = self.output_text.after(FRAME_MS, self.flush)
+
+    def flush(self):
+        self.flush_id = None
+        if not self.pending or not self.output_text.winfo_exists():
+            return
+        text = self.output_text
+        text.configure(state="normal")
+        excess = min(self.lines + len(self.pending) - self.scrollback, self.lines)
+        if excess > 0:
+            text.delete("1.0", f"{excess + 1}.0")
+            self.lines -= excess
+        text.insert(tk.END, "\n".join(self.pending) + "\n")
+        self.lines += len(self.pending)
+        self.pending.clear()
+        text.see(tk.END)
+        text.configure(state="disabled")
+
+    def clear(self):
+        self.pending.clear()
+        self.lines = 0
+        self.output_text.configure(state="normal")
+        self.output_text.delete("1.0", tk.END)
+        self.output_text.configure(state="disabled")
+
+    def set_scrollback(self, lines):
+        self.scrollback = lines
+        self.pending = deque(self.pending, maxlen=lines)
+        excess = self.lines - lines
+        if excess > 0:
+            self.output_text.configure(state="normal")
+            self.output_text.delete("1.0", f"{excess + 1}.0")
+            self.output_text.configure(state="disabled")
+            self.lines = lines
+
+class TerminalShell:
+    # The plain Terminal's side of the command interface; Terminal++ implements it itself
+    kind = "Terminal"
+    cwd = None
+
+    def __init__(self, output_text):
+        self.output = TerminalOutput(output_text)
+
+    def print(self, text):
+        self.output.print(text)
+
+    def clear(self):
+        self.output.clear()
+
+def cmd_help(term, args):
+    term.print("Commands:")
+    for command in command_registry.values():
+        if term.kind in command.shells:
+            term.print(f"{command.usage()} - {command.help}")
+
+def cmd_onconsole(term, args):
+    term.print("ViewRock OS Terminal v1.0")
+    term.print(f"User: {logged_in_user}")
+    term.print(f"Time: {datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+
+def cmd_shutdown(term, args):
+    term.print("Shutting down...")
+    root.destroy()
+
+def cmd_restart(term, args):
+    term.print("Restarting...")
+    root.destroy()
+    main()
+
+def cmd_perf_window(term, args):
+    name = " ".join(args)
+    if name not in app_registry:
+        term.print(f"Usage: perf.window <app>  (one of: {', '.join(app_registry)})")
+        return
+    for key, value in measure_window_cost(name).items():
+        term.print(f"{key}: {value}")
+
+def cmd_perf_launch(term, args):
+    for line in launch_stats.report() or ["No launches recorded yet."]:
+        term.print(line)
+    term.print(f"Pool: {window_pool.stats} parked={window_pool.parked_count()} "
+               f"widgets={window_pool.parked_widgets()}")
+
+def cmd_scrollback(term, args):
+    output = term.output
+    if args:
+        if not args[0].isdigit() or int(args[0]) < 1:
+            term.print("Usage: scrollback [lines]")
+            return
+        output.set_scrollback(int(args[0]))
+    term.print(f"Scrollback: {output.scrollback} lines")
+
+def print_lines(report):
+    def handler(term, args):
+        for line in report():
+            term.print(line)
+    return handler
+
+register_command("mith.help", cmd_help, help="Show help")
+register_command("onconsole()", cmd_onconsole, help="Show system info", shells=("Terminal",))
+register_command("admin*var(shutdown)", cmd_shutdown, help="Shutdown OS", shells=("Terminal",))
+register_command("admin*var(clear)", lambda term, args: term.clear(), help="Clear terminal")
+register_command("user.catch()", lambda term, args: term.print(f"User: {logged_in_user or 'Guest'}"), help="Show user")
+register_command("restart", cmd_restart, help="Restart OS")
+register_command("sleep", lambda term, args: term.print("Sleep mode (simulated)..."), help="Sleep mode",
+                 shells=("Terminal",))
+register_command("shutdown", cmd_shutdown, help="Shutdown OS")
+register_command("scrollback", cmd_scrollback, "[lines]", "Show or set how many lines the terminal keeps")
+register_command("perf.launch", cmd_perf_launch, help="App launch statistics")
+register_command("perf.ticks", print_lines(lambda: tick_scheduler.report()), help="Periodic job timings")
+register_command("perf.window", cmd_perf_window, "<app...>", "Tcl commands and memory used by one app window")
+register_command("perf.vfs", print_lines(lambda: vfs_image.stats()),
+                 help="Filesystem deduplication, compression and cache statistics")
+register_command("perf.calc", print_lines(lambda: calc_engine.benchmark()), help="Calculator expression engine throughput")
 
 # --- Simple Terminal ---
-def open_terminal_window():
-    win = AppWindow(root, "Terminal", "💻")
-    taskbar.add_window(win)
+def build_terminal_window(win):
     t = theme[current_theme]
     cf = win.content_frame
-    for w in cf.winfo_children():
-        w.destroy()
 
     output_text = tk.Text(cf, bg=t["entry_bg"], fg=t["entry_fg"], insertbackground=t["entry_fg"],
                          font=FONT, state="disabled")
@@ -738,68 +4796,29 @@ def open_terminal_window():
                            font=FONT, insertbackground=t["entry_fg"])
     input_entry.pack(fill="x", padx=10, pady=10)
 
-    def print_output(text):
-        output_text.configure(state="normal")
-        output_text.insert(tk.END, text + "\n")
-        output_text.see(tk.END)
-        output_text.configure(state="disabled")
+    shell = TerminalShell(output_text)
 
     def execute_command(event=None):
         cmd = input_var.get().strip()
-        print_output(f"> {cmd}")
+        shell.print(f"> {cmd}")
         input_var.set("")
-        handle_command(cmd)
-
-    def handle_command(cmd):
-        cmd_lower = cmd.lower()
-        if cmd_lower == "mith.help":
-            print_output("Commands:")
-            print_output("mith.help - Show help")
-            print_output("onconsole() - Show system info")
-            print_output("admin*var(shutdown) - Shutdown OS")
-            print_output("admin*var(clear) - Clear terminal")
-            print_output("user.catch() - Show user")
-            print_output("restart - Restart OS")
-            print_output("sleep - Sleep mode")
-            print_output("shutdown - Shutdown OS")
-        elif cmd_lower == "onconsole()":
-            print_output("ViewRock OS Terminal v1.0")
-            print_output(f"User: {logged_in_user}")
-            print_output(f"Time: {datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-        elif cmd_lower == "admin*var(shutdown)":
-            print_output("Shutting down...")
-            root.destroy()
-        elif cmd_lower == "admin*var(clear)":
-            output_text.configure(state="normal")
-            output_text.delete("1.0", tk.END)
-            output_text.configure(state="disabled")
-        elif cmd_lower == "user.catch()":
-            print_output(f"User: {logged_in_user}")
-        elif cmd_lower == "restart":
-            print_output("Restarting...")
-            root.destroy()
-            main()
-        elif cmd_lower == "sleep":
-            print_output("Sleep mode (simulated)...")
-        elif cmd_lower == "shutdown":
-            print_output("Shutting down...")
-            root.destroy()
-        else:
-            print_output(f"Unknown command: {cmd}")
+        run_command(shell, cmd)
 
     input_entry.bind("<Return>", execute_command)
-    print_output("Welcome to ViewRock OS Terminal!")
-    print_output("Type 'mith.help' for commands.")
+    input_entry.bind("<Tab>", lambda e: complete_command(shell, input_entry))
+    shell.print("Welcome to ViewRock OS Terminal!")
+    shell.print("Type 'mith.help' for commands.")
     input_entry.focus()
 
+register_app("Terminal", "💻", build_terminal_window)
+
+def open_terminal_window():
+    return launch_app("Terminal")
+
 # --- Tic Tac Toe App ---
-def open_tictactoe_window():
-    win = AppWindow(root, "Tic-Tac-Toe", "❌⭕")
-    taskbar.add_window(win)
+def build_tictactoe_window(win):
     t = theme[current_theme]
     cf = win.content_frame
-    for w in cf.winfo_children():
-        w.destroy()
 
     tk.Label(cf, text="Tic Tac Toe", font=APP_TITLE_FONT, bg=t["bg"], fg=t["fg"]).pack(pady=10)
 
@@ -854,14 +4873,15 @@ def open_tictactoe_window():
     reset_btn = tk.Button(cf, text="Reset Game", command=reset_game, bg=t["btn_bg"], fg=t["btn_fg"])
     reset_btn.pack(pady=12)
 
+register_app("Tic-Tac-Toe", "❌⭕", build_tictactoe_window)
+
+def open_tictactoe_window():
+    return launch_app("Tic-Tac-Toe")
+
 # --- Whiteboard Pro+Mega App
-def open_whiteboard_pro_mega_window():
-    win = AppWindow(root, "Whiteboard Pro+Mega", "🖌️")
-    taskbar.add_window(win)
+def build_whiteboard_pro_mega_window(win):
     t = theme[current_theme]
     cf = win.content_frame
-    for w in cf.winfo_children():
-        w.destroy()
 
     tk.Label(cf, text="Whiteboard Pro+Mega", font=APP_TITLE_FONT, bg=t["bg"], fg=t["fg"]).pack(pady=10)
 
@@ -929,30 +4949,25 @@ def open_whiteboard_pro_mega_window():
     tk.Button(btn_frame, text="Save", command=save_canvas).pack(side="left", padx=5)
     tk.Button(btn_frame, text="Load", command=load_canvas).pack(side="left", padx=5)
 
+register_app("Whiteboard Pro+Mega", "🖌️", build_whiteboard_pro_mega_window)
+
+def open_whiteboard_pro_mega_window():
+    return launch_app("Whiteboard Pro+Mega")
+
 # -----------------------------
 # --- CONTACTS APP (NEW) ---
 # -----------------------------
-def open_contacts_app():
-    win = AppWindow(root, "Contacts", "👥")
-    taskbar.add_window(win)
+def build_contacts_app(win):
     t = theme[current_theme]
     cf = win.content_frame
-    for w in cf.winfo_children():
-        w.destroy()
 
     tk.Label(cf, text="Contacts Manager", font=APP_TITLE_FONT, bg=t["bg"], fg=t["fg"]).pack(pady=8)
 
     frame = tk.Frame(cf, bg=t["bg"])
     frame.pack(fill="both", expand=True, padx=10, pady=8)
 
-    list_frame = tk.Frame(frame, bg=t["bg"])
-    list_frame.pack(side="left", fill="both", expand=True)
-
-    scrollbar = tk.Scrollbar(list_frame)
-    scrollbar.pack(side="right", fill="y")
-    contacts_listbox = tk.Listbox(list_frame, yscrollcommand=scrollbar.set, font=FONT)
-    contacts_listbox.pack(fill="both", expand=True)
-    scrollbar.config(command=contacts_listbox.yview)
+    contacts_listbox = VirtualList(frame)
+    contacts_listbox.pack(side="left", fill="both", expand=True)
 
     detail_frame = tk.Frame(frame, bg=t["bg"])
     detail_frame.pack(side="right", fill="both", expand=True, padx=10)
@@ -967,9 +4982,7 @@ def open_contacts_app():
     notes_text.pack(fill="both", pady=3, expand=True)
 
     def refresh_list():
-        contacts_listbox.delete(0, tk.END)
-        for name in sorted(contacts_db.keys()):
-            contacts_listbox.insert(tk.END, name)
+        contacts_listbox.set_items(sorted(contacts_db))
 
     def on_select(evt=None):
         sel = contacts_listbox.curselection()
@@ -980,7 +4993,7 @@ def open_contacts_app():
             notes_text.delete("1.0", tk.END)
             notes_text.insert("1.0", data.get("notes", ""))
 
-    contacts_listbox.bind("<<ListboxSelect>>", on_select)
+    contacts_listbox.on_select = on_select
 
     def add_contact():
         name = simpledialog.askstring("Add Contact", "Contact Name:")
@@ -1024,22 +5037,39 @@ def open_contacts_app():
 
     refresh_list()
 
+register_app("Contacts", "👥", build_contacts_app)
+
+def open_contacts_app():
+    return launch_app("Contacts")
+
 # -----------------------------
 # --- VIDEO CALL APP (SIMULATED) ---
 # -----------------------------
 class SimulatedVideoCall(AppWindow):
-    def __init__(self, master):
-        super().__init__(master, "Video Call", "📹")
+    def __init__(self, master, hidden=False):
+        super().__init__(master, "Video Call", "📹", hidden=hidden)
         self.call_active = False
         self.camera_active = False
         self.audio_muted = False
         self.video_muted = False
         self.current_call_target = None
         self.call_start_time = None
-        taskbar.add_window(self)
-        self.init_ui()
         self.local_anim_id = None
         self.remote_anim_id = None
+        self.timer_job = None
+        self.refresh_contacts_list = None
+
+    def build(self):
+        self.init_ui()
+
+    def suspend(self):
+        self.end_call(notify=False)
+        if self.camera_active:
+            self.stop_camera()
+
+    def resume(self):
+        if self.refresh_contacts_list:
+            self.refresh_contacts_list()
 
     def init_ui(self):
         t = theme[current_theme]
@@ -1093,6 +5123,7 @@ class SimulatedVideoCall(AppWindow):
                 contacts_listbox.insert(tk.END, name)
 
         refresh_contacts_list()
+        self.refresh_contacts_list = refresh_contacts_list
 
         def on_contact_double(evt=None):
             sel = contacts_listbox.curselection()
@@ -1144,18 +5175,16 @@ class SimulatedVideoCall(AppWindow):
     def start_camera(self):
         self.camera_active = True
         self.btn_start_camera.config(text="Stop Camera")
-        self._animate_local()
+        tick_scheduler.cancel(self.local_anim_id)
+        self.local_anim_id = tick_scheduler.every(450, self._animate_local, owner=self,
+                                                  name="video.local", delay_ms=0)
         self.update_status_text()
 
     def stop_camera(self):
         self.camera_active = False
         self.btn_start_camera.config(text="Start Camera")
-        if self.local_anim_id:
-            try:
-                self.after_cancel(self.local_anim_id)
-            except Exception:
-                pass
-            self.local_anim_id = None
+        tick_scheduler.cancel(self.local_anim_id)
+        self.local_anim_id = None
         self.render_local_frame(clear=True)
         self.update_status_text()
 
@@ -1174,7 +5203,7 @@ class SimulatedVideoCall(AppWindow):
         else:
             # resume remote animation if call active
             if self.call_active:
-                self._animate_remote()
+                self.start_remote_animation()
         self.update_status_text()
 
     def update_status_text(self):
@@ -1203,14 +5232,15 @@ class SimulatedVideoCall(AppWindow):
         self.call_btn.config(state="disabled")
         self.end_call_btn.config(state="normal")
         self.update_status_text()
-        self._animate_remote()
-        self._update_timer()
+        self.start_remote_animation()
+        tick_scheduler.cancel(self.timer_job)
+        self.timer_job = tick_scheduler.every(1000, self._update_timer, owner=self, name="video.timer")
         messagebox.showinfo("Calling", f"Calling {contact_name} (simulated)...")
         # ensure camera on (simulated)
         if not self.camera_active:
             self.start_camera()
 
-    def end_call(self):
+    def end_call(self, notify=True):
         if not self.call_active:
             return
         self.call_active = False
@@ -1219,25 +5249,23 @@ class SimulatedVideoCall(AppWindow):
         self.call_btn.config(state="normal")
         self.end_call_btn.config(state="disabled")
         # stop animations
-        if self.remote_anim_id:
-            try:
-                self.after_cancel(self.remote_anim_id)
-            except Exception:
-                pass
-            self.remote_anim_id = None
+        tick_scheduler.cancel(self.remote_anim_id)
+        tick_scheduler.cancel(self.timer_job)
+        self.remote_anim_id = None
+        self.timer_job = None
         self.render_remote_frame(clear=True)
         self.update_status_text()
         self.timer_var.set("00:00")
-        messagebox.showinfo("Call ended", "Call has ended (simulated).")
+        if notify:
+            messagebox.showinfo("Call ended", "Call has ended (simulated).")
 
     def _update_timer(self):
         if not self.call_active or not self.call_start_time:
-            return
+            return False
         elapsed = int(time.time() - self.call_start_time)
         mm = elapsed // 60
         ss = elapsed % 60
         self.timer_var.set(f"{mm:02d}:{ss:02d}")
-        self.after(1000, self._update_timer)
 
     def render_local_frame(self, clear=False):
         self.local_canvas.delete("all")
@@ -1282,31 +5310,31 @@ class SimulatedVideoCall(AppWindow):
         if self.current_call_target:
             self.remote_canvas.create_text(w-10, 10, anchor="ne", text=self.current_call_target, fill="white")
 
+    def start_remote_animation(self):
+        tick_scheduler.cancel(self.remote_anim_id)
+        self.remote_anim_id = tick_scheduler.every(650, self._animate_remote, owner=self,
+                                                   name="video.remote", delay_ms=0)
+
     def _animate_local(self):
         if not self.camera_active:
-            return
+            return False
         self.render_local_frame()
-        # schedule next frame
-        self.local_anim_id = self.after(450, self._animate_local)
 
     def _animate_remote(self):
         if not self.call_active or self.video_muted:
-            return
+            return False
         self.render_remote_frame()
-        self.remote_anim_id = self.after(650, self._animate_remote)
+
+register_app("Video Call", "📹", factory=SimulatedVideoCall)
 
 # Helper function to open Video Call app
 def open_video_call_app():
-    SimulatedVideoCall(root)
+    return launch_app("Video Call")
 
 # --- Store App ---
-def open_store_window():
-    win = AppWindow(root, "Store", "🛒")
-    taskbar.add_window(win)
+def build_store_window(win):
     t = theme[current_theme]
     cf = win.content_frame
-    for w in cf.winfo_children():
-        w.destroy()
 
     tk.Label(cf, text="ViewRock OS Store", font=APP_TITLE_FONT, bg=t["bg"], fg=t["fg"]).pack(pady=12)
 
@@ -1324,7 +5352,7 @@ def open_store_window():
         "Terminal++": {
             "desc": "Enhanced terminal with extra commands.",
             "icon": "💻",
-            "open_func": lambda: TerminalPlus(root)
+            "open_func": lambda: launch_app("Terminal++")
         },
         "Contacts": {
             "desc": "Manage your contacts (create/edit/delete).",
@@ -1346,22 +5374,44 @@ def open_store_window():
         add_to_dock(app_name, apps_for_install[app_name]["icon"], apps_for_install[app_name]["open_func"])
         messagebox.showinfo("Store", f"'{app_name}' has been installed!")
 
-    for app_name, app_info in apps_for_install.items():
-        frame = tk.Frame(cf, bg=t["bg"], relief="ridge", bd=1)
-        frame.pack(fill="x", padx=20, pady=10)
+    # Catalog cards are pooled rows of a VirtualList; each card is refilled with
+    # whichever app scrolls into view
+    def make_card(parent):
+        t = theme[current_theme]
+        card = tk.Frame(parent, bg=t["bg"])
+        frame = tk.Frame(card, bg=t["bg"], relief="ridge", bd=1)
+        frame.pack(fill="both", expand=True, padx=20, pady=5)
 
-        icon_lbl = tk.Label(frame, text=app_info["icon"], font=("Segoe UI", 24), bg=t["bg"], fg=t["fg"])
-        icon_lbl.pack(side="left", padx=10, pady=10)
+        card.icon_lbl = tk.Label(frame, font=("Segoe UI", 24), bg=t["bg"], fg=t["fg"])
+        card.icon_lbl.pack(side="left", padx=10, pady=10)
 
         info_frame = tk.Frame(frame, bg=t["bg"])
         info_frame.pack(side="left", fill="x", expand=True)
 
-        tk.Label(info_frame, text=app_name, font=TITLE_FONT, bg=t["bg"], fg=t["fg"]).pack(anchor="w")
-        tk.Label(info_frame, text=app_info["desc"], font=FONT, bg=t["bg"], fg=t["fg"]).pack(anchor="w")
+        card.name_lbl = tk.Label(info_frame, font=TITLE_FONT, bg=t["bg"], fg=t["fg"])
+        card.name_lbl.pack(anchor="w")
+        card.desc_lbl = tk.Label(info_frame, font=FONT, bg=t["bg"], fg=t["fg"])
+        card.desc_lbl.pack(anchor="w")
 
         install_btn = tk.Button(frame, text="Install", bg=t["btn_bg"], fg=t["btn_fg"],
-                                command=lambda n=app_name: install_app(n))
+                                command=lambda: card.item and install_app(card.item[0]))
         install_btn.pack(side="right", padx=20, pady=20)
+        enable_hover(install_btn)
+        return card
+
+    def fill_card(card, item, selected):
+        app_name, app_info = item
+        card.icon_lbl.configure(text=app_info["icon"])
+        card.name_lbl.configure(text=app_name)
+        card.desc_lbl.configure(text=app_info["desc"])
+
+    catalog = VirtualList(cf, list(apps_for_install.items()), row_height=86, make_row=make_card, fill_row=fill_card)
+    catalog.pack(fill="both", expand=True, pady=(0, 10))
+
+register_app("Store", "🛒", build_store_window)
+
+def open_store_window():
+    return launch_app("Store")
 
 # --- Dock Integration ---
 dock_buttons = {}
@@ -1369,10 +5419,12 @@ def add_to_dock(app_name, emoji, open_func):
     # avoid duplicates
     if app_name in dock_buttons:
         return
-    btn = tk.Button(dock_frame, text=f"{emoji}\n{app_name}", font=FONT, bg="#1a1a1a", fg="white",
+    t = theme[current_theme]
+    btn = tk.Button(dock_frame, text=f"{emoji}\n{app_name}", font=FONT, bg=t["dock_bg"], fg=t["dock_fg"],
                     relief="flat", padx=10, pady=5, cursor="hand2", justify="center", wraplength=80,
                     command=open_func)
     btn.pack(side="left", padx=8, pady=8)
+    theme_registry.register(btn, "dock_button")
     dock_buttons[app_name] = btn
 
 def remove_from_dock(app_name):
@@ -1403,15 +5455,39 @@ preinstall_core_apps()
 
 # --- Terminal++ class (used by store) ---
 class TerminalPlus(AppWindow):
-    def __init__(self, master):
-        super().__init__(master, "Terminal++", "💻")
-        self.cwd = "home"
-        self.virtual_fs = {
-            "home": {"welcome.txt": "Welcome to ViewRock OS!", "info.md": "This is a virtual OS terminal."},
-            "docs": {"readme.txt": "This is your documents folder."},
-        }
+    kind = "Terminal++"
+
+    def __init__(self, master, hidden=False):
+        super().__init__(master, "Terminal++", "💻", hidden=hidden)
+        # Terminal++ works on the shared VFS, with its own cached listing of cwd
+        self.cwd = "/home" if vfs.isdir("/home") else "/"
+        self.listing = None
+        self.search = None
+        self.transfer = None
+        self.batch = None
+        vfs.watch(self.cwd, self.on_fs_change)
+
+    def on_fs_change(self, path, event):
+        if not self.winfo_exists() or path != self.cwd:
+            return False
+        self.listing = None
+
+    def change_dir(self, path):
+        vfs.unwatch(self.cwd, self.on_fs_change)
+        self.cwd = path
+        self.listing = None
+        vfs.watch(path, self.on_fs_change)
+
+    def cwd_listing(self):
+        if self.listing is None:
+            if not vfs.isdir(self.cwd):
+                self.print(f"{self.cwd} no longer exists, back to /")
+                self.change_dir("/")
+            self.listing = vfs.listdir(self.cwd)
+        return self.listing
+
+    def build(self):
         self.init_ui()
-        taskbar.add_window(self)
 
     def init_ui(self):
         t = theme[current_theme]
@@ -1422,24 +5498,145 @@ class TerminalPlus(AppWindow):
         self.output_text = tk.Text(cf, bg=t["entry_bg"], fg=t["entry_fg"], insertbackground=t["entry_fg"],
                                    font=FONT, state="disabled")
         self.output_text.pack(fill="both", expand=True, padx=10, pady=(10, 0))
+        self.output = TerminalOutput(self.output_text)
 
         self.input_var = tk.StringVar()
         self.input_entry = tk.Entry(cf, textvariable=self.input_var, bg=t["entry_bg"], fg=t["entry_fg"],
                                     font=FONT, insertbackground=t["entry_fg"])
         self.input_entry.pack(fill="x", padx=10, pady=10)
         self.input_entry.bind("<Return>", self.execute_command)
+        self.input_entry.bind("<Control-c>", lambda e: self.stop_search())
+        self.input_entry.bind("<Tab>", lambda e: complete_command(self, self.input_entry))
         self.print_welcome()
 
     def print(self, text):
-        self.output_text.configure(state="normal")
-        self.output_text.insert(tk.END, text + "\n")
-        self.output_text.see(tk.END)
-        self.output_text.configure(state="disabled")
+        self.output.print(text)
+
+    def clear(self):
+        self.output.clear()
 
     def print_welcome(self):
         self.print("Terminal++ for ViewRock OS (Simulated Filesystem)")
         self.print("Type 'mith.help' for commands.")
 
+    def start_search(self, parts, grep):
+        # find [-r] <pattern> [folder] / grep [-r] <text> [folder]
+        mode = "name"
+        if parts[1:2] == ["-r"]:
+            mode = "regex"
+            parts = parts[:1] + parts[2:]
+        if len(parts) < 2:
+            self.print(f"Usage: {parts[0]} [-r] <{'text' if grep else 'pattern'}> [folder]")
+            return
+        pattern = parts[1]
+        if mode == "name" and not grep and any(c in pattern for c in "*?["):
+            mode = "glob"
+        path = vfs.normpath(parts[2], self.cwd) if len(parts) > 2 else self.cwd
+        self.stop_search()
+
+        def on_batch(batch):
+            if not self.winfo_exists():
+                self.search.cancel()
+                return
+            for hit in batch:
+                self.print(f"{hit[0]}:{hit[1]}: {hit[2]}" if grep else hit)
+
+        def on_done(search):
+            if self.winfo_exists():
+                self.print(search.summary())
+
+        try:
+            if grep:
+                self.search = VFSSearch(vfs, path, None, mode, pattern, on_batch, on_done)
+            else:
+                self.search = VFSSearch(vfs, path, pattern, mode, None, on_batch, on_done)
+        except (re.error, VFSError) as e:
+            self.print(f"{parts[0]}: {e}")
+
+    def stop_search(self):
+        if self.search is not None and not self.search.done:
+            self.search.cancel()
+        if self.transfer is not None and not self.transfer.done:
+            self.transfer.cancel()
+        if self.batch is not None and not self.batch.done:
+            self.batch.cancel()
+
+    def start_batch(self, parts):
+        # calc.batch <file> [output]; host: before a path means a file on this computer
+        if len(parts) < 2:
+            self.print("Usage: calc.batch <file> [output]   (prefix host: for files on this computer)")
+            return
+        if self.batch is not None and not self.batch.done:
+            self.print("A batch is already running; 'stop' cancels it.")
+            return
+
+        def resolve(path):
+            if path.startswith("host:"):
+                return os.path.expanduser(path[len("host:"):]), None
+            return vfs.normpath(path, self.cwd), vfs
+
+        source, fs = resolve(parts[1])
+        output = None
+        if len(parts) > 2:
+            output, output_fs = resolve(parts[2])
+            if output_fs is not fs:
+                self.print("calc.batch: the output must be on the same side (ViewRock or host:) as the input.")
+                return
+
+        shown = [0]  # error rows printed so far; the rest are only in the output file
+
+        def on_batch(job, rows):
+            if not self.winfo_exists():
+                job.cancel()
+                return
+            for row in rows:
+                if row[3] is not None and shown[0] < 20:
+                    shown[0] += 1
+                    self.print(format_batch_result(row))
+
+        def on_done(job):
+            if self.winfo_exists():
+                self.print(job.summary())
+
+        try:
+            self.batch = CalcBatch(source, output, fs, on_batch, on_done)
+        except VFSError as e:
+            self.print(f"calc.batch: {e}")
+
+    def start_transfer(self, parts):
+        # import <host folder or archive> [folder] / export <path> <host folder or archive>
+        if parts[0] == "import" and len(parts) < 2 or parts[0] == "export" and len(parts) < 3:
+            self.print("Usage: import <host folder or archive> [folder]" if parts[0] == "import"
+                       else "Usage: export <path> <host folder or archive>")
+            return
+        if self.transfer is not None and not self.transfer.done:
+            self.print("A transfer is already running; 'stop' cancels it.")
+            return
+        if parts[0] == "import":
+            source = os.path.expanduser(parts[1])
+            target = vfs.normpath(parts[2], self.cwd) if len(parts) > 2 else self.cwd
+        else:
+            source = vfs.normpath(parts[1], self.cwd)
+            target = os.path.expanduser(parts[2])
+        reported = [0]
+
+        def on_progress(transfer):
+            step = int(transfer.progress() * 10)
+            if step > reported[0] and self.winfo_exists():
+                reported[0] = step
+                self.print(f"{parts[0]}: {step * 10}% ({transfer.files} files)")
+
+        def on_done(transfer):
+            if self.winfo_exists():
+                self.print(transfer.summary())
+                for path, reason in transfer.skipped[:10]:
+                    self.print(f"  skipped {path}: {reason}")
+
+        try:
+            self.transfer = VFSTransfer(vfs, parts[0], source, target, on_progress, on_done)
+        except VFSError as e:
+            self.print(f"{parts[0]}: {e}")
+
     def execute_command(self, event=None):
         cmd = self.input_var.get().strip()
         self.print(f"{self.cwd}> {cmd}")
@@ -1447,46 +5644,55 @@ class TerminalPlus(AppWindow):
         self.handle_command(cmd)
 
     def handle_command(self, cmd):
-        parts = cmd.split()
-        if not parts:
-            return
-        base = parts[0].lower()
-
-        if base == "mith.help":
-            self.print("Commands: mith.help, dir, cd <folder>, open <file>, user.catch(), shutdown, restart")
-        elif base == "dir":
-            items = self.virtual_fs.get(self.cwd, {})
-            for item in items:
-                self.print(f"- {item}")
-        elif base == "cd":
-            if len(parts) < 2:
-                self.print("Usage: cd <folder>")
-            elif parts[1] in self.virtual_fs:
-                self.cwd = parts[1]
-                self.print(f"Changed directory to {self.cwd}")
-            else:
-                self.print("Folder not found.")
-        elif base == "open":
-            if len(parts) < 2:
-                self.print("Usage: open <file>")
-            else:
-                file = parts[1]
-                contents = self.virtual_fs.get(self.cwd, {}).get(file)
-                if contents:
-                    self.print(f"--- {file} ---\n{contents}\n")
-                else:
-                    self.print(f"File '{file}' not found.")
-        elif base == "user.catch()":
-            self.print(f"Logged in user: {logged_in_user or 'Guest'}")
-        elif base == "shutdown":
-            self.print("Shutting down ViewRock OS...")
-            root.destroy()
-        elif base == "restart":
-            self.print("Restarting OS...")
-            root.destroy()
-            main()
-        else:
-            self.print(f"Unknown command: {cmd}")
+        run_command(self, cmd)
+
+def cmd_dir(term, args):
+    if args:
+        path = vfs.normpath(args[0], term.cwd)
+        if not vfs.isdir(path):
+            term.print("Folder not found.")
+            return
+        items = vfs.listdir(path)
+    else:
+        items = term.cwd_listing()
+    for node in items:
+        term.print(f"- [Folder] {node.name}" if node.is_dir else f"- {node.name}")
+
+def cmd_cd(term, args):
+    path = vfs.normpath(args[0], term.cwd)
+    if vfs.isdir(path):
+        term.change_dir(path)
+        term.print(f"Changed directory to {term.cwd}")
+    else:
+        term.print("Folder not found.")
+
+def cmd_open(term, args):
+    node = vfs.lookup(vfs.normpath(args[0], term.cwd))
+    if node is not None and not node.is_dir:
+        term.print(f"--- {args[0]} ---\n{vfs.content(node)}\n")
+    else:
+        term.print(f"File '{args[0]}' not found.")
+
+VFS_SHELLS = ("Terminal++",)
+register_command("dir", cmd_dir, "[folder]", "List a folder", VFS_SHELLS)
+register_command("cd", cmd_cd, "<folder>", "Change folder", VFS_SHELLS)
+register_command("pwd", lambda term, args: term.print(term.cwd), help="Show the current folder", shells=VFS_SHELLS)
+register_command("open", cmd_open, "<file>", "Print a file", VFS_SHELLS)
+register_command("find", lambda term, args: term.start_search(["find"] + args, False), "[-r] <pattern> [folder]",
+                 "Find files by name (glob, or regex with -r)", VFS_SHELLS)
+register_command("grep", lambda term, args: term.start_search(["grep"] + args, True), "[-r] <text> [folder]",
+                 "Find lines in files", VFS_SHELLS)
+register_command("import", lambda term, args: term.start_transfer(["import"] + args), "<host-path> [folder]",
+                 "Copy a host folder or archive in", VFS_SHELLS)
+register_command("export", lambda term, args: term.start_transfer(["export"] + args), "<path> <host-path>",
+                 "Copy a file or folder out to a host folder or archive", VFS_SHELLS)
+register_command("calc.batch", lambda term, args: term.start_batch(["calc.batch"] + args), "<file> [output]",
+                 "Evaluate a file of expressions (host: for files on this computer)", VFS_SHELLS)
+register_command("stop", lambda term, args: term.stop_search(), help="Cancel a running find, grep, transfer or batch",
+                 shells=VFS_SHELLS)
+register_command("df", print_lines(lambda: vfs_image.stats()), help="Filesystem usage", shells=VFS_SHELLS)
+
+register_app("Terminal++", "💻", factory=TerminalPlus)
 
 # --- Signup/Login system ---
 def signup_window():
@@ -1580,6 +5786,11 @@ def main():
     if not user_db:
         # create a default account for quick testing
         user_db["demo"] = "demo"
+    if vfs_image.skipped:
+        lines = [f"{op} {path}: {reason}" for op, path, reason in vfs_image.skipped[:10]]
+        messagebox.showwarning("Filesystem",
+                               f"{len(vfs_image.skipped)} change(s) from the last session could not be replayed "
+                               f"and were saved to {vfs_image.skipped_path}:\n\n" + "\n".join(lines))
     signup_window()
     login_window()
     root.mainloop()
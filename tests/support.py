@@ -0,0 +1,28 @@
+import ast
+import os
+import types
+
+SOURCE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "ViewRock.py")
+
+
+# Importing ViewRock opens the desktop, which needs a display. Tests of the parts that
+# do not touch Tk run the module's imports and only the top-level classes, functions
+# and assignments they name instead; `stubs` stand in for globals those refer to.
+def load(*names, **stubs):
+    with open(SOURCE, encoding="utf-8") as f:
+        tree = ast.parse(f.read(), SOURCE)
+    namespace = {"__name__": "ViewRock"}
+    namespace.update(stubs)
+    body = []
+    for node in tree.body:
+        if isinstance(node, (ast.Import, ast.ImportFrom)):
+            body.append(node)
+        elif isinstance(node, (ast.ClassDef, ast.FunctionDef)) and node.name in names:
+            body.append(node)
+        elif isinstance(node, ast.Assign) and any(getattr(t, "id", None) in names for t in node.targets):
+            body.append(node)
+    exec(compile(ast.Module(body=body, type_ignores=[]), SOURCE, "exec"), namespace)
+    missing = [name for name in names if name not in namespace]
+    if missing:
+        raise LookupError(f"not defined at the top level of ViewRock.py: {', '.join(missing)}")
+    return types.SimpleNamespace(**namespace)
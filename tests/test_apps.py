@@ -0,0 +1,35 @@
+import os
+import sys
+import tempfile
+import tkinter
+import unittest
+
+# ViewRock keeps its filesystem image under ~/.viewrock; keep the test's copy out of the real one
+os.environ["HOME"] = tempfile.mkdtemp()
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+try:
+    import ViewRock
+except tkinter.TclError:  # no display to build the desktop on
+    ViewRock = None
+
+
+@unittest.skipIf(ViewRock is None, "needs a display")
+class AppBuildTest(unittest.TestCase):
+    def test_every_app_builds(self):
+        for name, spec in ViewRock.app_registry.items():
+            with self.subTest(app=name):
+                if spec["factory"]:
+                    win = spec["factory"](ViewRock.root, hidden=True)
+                else:
+                    win = ViewRock.AppWindow(ViewRock.root, name, spec["emoji"], build=spec["build"], hidden=True)
+                try:
+                    win.ensure_built()
+                    win.update_idletasks()
+                    self.assertTrue(win.is_built)
+                finally:
+                    win.destroy()
+
+
+if __name__ == "__main__":
+    unittest.main()
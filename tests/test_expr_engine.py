@@ -0,0 +1,76 @@
+import math
+import unittest
+
+from support import load
+
+vr = load("ExprError", "safe_pow", "safe_factorial", "CALC_FUNCTIONS", "CALC_CONSTANTS", "CALC_NAMESPACE",
+          "CALC_SYMBOLS", "BIN_OPS", "UNARY_OPS", "CALC_ERRORS", "MAX_RESULT_BITS", "result_error",
+          "calc_error_message", "CompiledExpr", "ExprEngine")
+
+
+class ExprEngineTest(unittest.TestCase):
+    def setUp(self):
+        self.engine = vr.ExprEngine(cache_size=3)
+
+    def assertRejected(self, text, message, **values):
+        with self.assertRaises(vr.ExprError) as caught:
+            self.engine.evaluate(text, **values)
+        self.assertIn(message, str(caught.exception))
+
+    def test_arithmetic_functions_and_symbols(self):
+        self.assertEqual(self.engine.evaluate("2+3*4"), 14)
+        self.assertEqual(self.engine.evaluate("2^10"), 1024)
+        self.assertAlmostEqual(self.engine.evaluate("sin(π/2) + math.sqrt(16)"), 5.0)
+        self.assertAlmostEqual(self.engine.evaluate("ln(e) × 6 ÷ 3"), 2.0)
+        self.assertEqual(self.engine.evaluate("factorial(5) % 7"), 1)
+
+    def test_variables(self):
+        self.assertEqual(self.engine.evaluate("x^2 + 1", x=3), 10)
+        compiled = self.engine.compile("sin(x) * 2", ("x",))
+        self.assertAlmostEqual(compiled(x=math.pi / 2), 2.0)
+
+    def test_whitelist(self):
+        self.assertRejected("__import__('os')", "Unknown function '__import__'")
+        self.assertRejected("(1).__class__", "Attribute access is not allowed")
+        self.assertRejected("'a' * 3", "Only numbers are allowed")
+        self.assertRejected("[1, 2]", "'List' is not allowed")
+        self.assertRejected("y + 1", "Unknown name 'y'")
+        self.assertRejected("sin", "'sin' needs arguments")
+        self.assertRejected("max(*[1])", "Only plain arguments are allowed")
+        self.assertRejected("lambda: 1", "'Lambda' is not allowed")
+        self.assertRejected("1 +", "Syntax error")
+        self.assertRejected("   ", "Empty expression")
+
+    def test_constants_are_folded(self):
+        compiled = self.engine.compile("2 * pi + sqrt(4)")
+        self.assertIsNone(compiled.code)
+        self.assertAlmostEqual(compiled.value, 2 * math.pi + 2)
+
+    def test_limits(self):
+        self.assertRejected("1/0", "Division by zero at position 1")
+        self.assertRejected("9^9^9", "Result too large")
+        self.assertRejected("factorial(1001)", "Result too large")
+        self.assertRejected("sqrt(-1)", "Math domain error")
+        self.assertRejected("(-8)^(1/3)", "Math domain error")
+        self.assertRejected("10^4000", "Result too large")
+        self.assertRejected("x * x * x", "Result too large", x=2 ** 4500)
+        self.assertRejected("-" * 1000 + "1", "too deeply nested")
+        self.assertRejected("-" * 100000 + "1", "too deeply nested")
+        self.assertEqual(self.engine.evaluate("2^1000").bit_length(), 1001)
+
+    def test_result_error(self):
+        self.assertIsNone(vr.result_error(1.5))
+        self.assertEqual(vr.result_error(1 << vr.MAX_RESULT_BITS), "Result too large")
+        self.assertEqual(vr.result_error(1j), "Invalid result")
+
+    def test_cache_is_lru(self):
+        for text in ("1+1", "2+2", "3+3"):
+            self.engine.evaluate(text)
+        self.engine.evaluate("1+1")
+        self.engine.evaluate("4+4")
+        self.assertEqual([key[0] for key in self.engine.cache], ["3+3", "1+1", "4+4"])
+        self.assertEqual(self.engine.stats, {"hits": 1, "misses": 4})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,55 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from support import load
+
+vr = load("NotesStore", "NotesIndex", "WORD_RE", "TITLE_WEIGHT")
+
+
+class NotesIndexTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.store = vr.NotesStore(os.path.join(self.dir, "notes.log"))
+        self.store.put("Shopping list", "milk, eggs and bread")
+        self.store.put("Meeting", "discuss the shopping budget")
+        self.store.put("Ideas", "bread machine; milky way")
+        self.index = vr.NotesIndex(self.store)
+
+    def tearDown(self):
+        self.store.log.close()
+        self.store.reader.close()
+        shutil.rmtree(self.dir)
+
+    def test_bulk_build_sorts_vocabulary(self):
+        self.index.ensure_built()
+        self.assertEqual(self.index.vocab, sorted(self.index.postings))
+        self.assertIn("milky", self.index.vocab)
+
+    def test_words_match_as_prefixes_and_all_must_match(self):
+        self.assertEqual(self.index.search("milk"), ["Shopping list", "Ideas"])
+        self.assertEqual(self.index.search("bread milk"), ["Shopping list", "Ideas"])
+        self.assertEqual(self.index.search("bread budget"), [])
+        self.assertEqual(self.index.search("   "), [])
+
+    def test_title_words_rank_higher(self):
+        self.assertEqual(self.index.search("shopping"), ["Shopping list", "Meeting"])
+
+    def test_limit(self):
+        self.assertEqual(self.index.search("milk", limit=1), ["Shopping list"])
+
+    def test_follows_store_changes_after_build(self):
+        self.index.ensure_built()
+        self.store.put("Ideas", "zebra crossing")
+        self.store.put("Zoo", "zebras")
+        self.store.delete("Meeting")
+        self.assertEqual(self.index.search("zebra"), ["Ideas", "Zoo"])
+        self.assertEqual(self.index.search("budget"), [])
+        self.assertEqual(self.index.search("machine"), [])
+        self.assertEqual(self.index.vocab, sorted(self.index.postings))
+        self.assertNotIn("budget", self.index.vocab)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,92 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from support import load
+
+vr = load("NotesStore")
+
+
+class NotesStoreTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, "notes.log")
+        self.stores = []
+
+    def tearDown(self):
+        for store in self.stores:
+            store.log.close()
+            store.reader.close()
+        shutil.rmtree(self.dir)
+
+    def open(self, **kwargs):
+        store = vr.NotesStore(self.path, **kwargs)
+        self.stores.append(store)
+        return store
+
+    def test_put_get_delete_survive_reopen(self):
+        store = self.open()
+        store.put("b", "bee")
+        store.put("a", "ay")
+        store.put("b", "bée 2")
+        store.delete("a")
+        store.delete("missing")
+        self.assertEqual(store.titles, ["b"])
+        self.assertEqual(store.get("b"), "bée 2")
+        reopened = self.open()
+        self.assertEqual(reopened.titles, ["b"])
+        self.assertEqual(reopened.get("b"), "bée 2")
+        self.assertNotIn("a", reopened)
+
+    def test_listeners_get_sorted_positions(self):
+        store = self.open()
+        events = []
+        store.listeners.append(lambda *event: events.append(event))
+        store.put("m", "1")
+        store.put("c", "2")
+        store.put("m", "3")
+        store.delete("c")
+        self.assertEqual(events, [("insert", 0, "m"), ("insert", 0, "c"), ("update", 1, "m"), ("delete", 0, "c")])
+
+    def test_listener_returning_false_unsubscribes(self):
+        store = self.open()
+        store.listeners.append(lambda *event: False)
+        store.put("a", "1")
+        self.assertEqual(store.listeners, [])
+
+    def test_torn_tail_is_cut_off(self):
+        store = self.open()
+        store.put("kept", "body")
+        store.log.close()
+        size = os.path.getsize(self.path)
+        with open(self.path, "ab") as f:
+            f.write(b'{"op": "put", "title": "torn", "len": 100}\nshort')
+        reopened = self.open()
+        self.assertEqual(reopened.titles, ["kept"])
+        self.assertEqual(os.path.getsize(self.path), size)
+
+    def test_compaction_keeps_only_live_records(self):
+        store = self.open(compact_min_bytes=0)
+        for i in range(20):
+            store.put("note", f"version {i}")
+        store.put("other", "x")
+        store.maybe_compact()
+        self.assertEqual(store.dead_bytes, 0)
+        self.assertEqual(os.path.getsize(self.path), store.live_bytes)
+        self.assertEqual(store.get("note"), "version 19")
+        reopened = self.open()
+        self.assertEqual(reopened.titles, ["note", "other"])
+        self.assertEqual(reopened.get("other"), "x")
+
+    def test_no_compaction_below_threshold(self):
+        store = self.open()
+        store.put("a", "1")
+        store.put("a", "2")
+        size = os.path.getsize(self.path)
+        store.maybe_compact()
+        self.assertEqual(os.path.getsize(self.path), size)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,42 @@
+import unittest
+
+from support import load
+
+vr = load("PrefixTrie")
+
+
+class PrefixTrieTest(unittest.TestCase):
+    def setUp(self):
+        self.trie = vr.PrefixTrie(["cat", "cd", "calc", "cal", "perf.vfs", "perf.window"])
+
+    def test_complete(self):
+        self.assertEqual(self.trie.complete("ca"), ["cal", "calc", "cat"])
+        self.assertEqual(self.trie.complete("perf."), ["perf.vfs", "perf.window"])
+        self.assertEqual(self.trie.complete("cal"), ["cal", "calc"])
+        self.assertEqual(self.trie.complete("x"), [])
+        self.assertEqual(len(self.trie.complete("")), 6)
+
+    def test_insert_is_idempotent(self):
+        self.trie.insert("cat")
+        self.assertEqual(self.trie.complete("cat"), ["cat"])
+
+    def test_remove_keeps_longer_and_shorter_words(self):
+        self.trie.remove("cal")
+        self.assertEqual(self.trie.complete("ca"), ["calc", "cat"])
+        self.trie.insert("cal")
+        self.trie.remove("calc")
+        self.assertEqual(self.trie.complete("ca"), ["cal", "cat"])
+
+    def test_remove_prunes_empty_branches(self):
+        self.trie.remove("perf.vfs")
+        self.trie.remove("perf.window")
+        self.assertNotIn("p", self.trie.root)
+
+    def test_remove_missing_word(self):
+        self.trie.remove("ca")
+        self.trie.remove("dog")
+        self.assertEqual(self.trie.complete("c"), ["cal", "calc", "cat", "cd"])
+
+
+if __name__ == "__main__":
+    unittest.main()
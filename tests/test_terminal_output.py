@@ -0,0 +1,95 @@
+import unittest
+
+from support import load
+
+vr = load("TERMINAL_SCROLLBACK", "FRAME_MS", "TerminalOutput")
+
+
+class FakeText:
+    # Just enough of tk.Text for TerminalOutput; `after` callbacks run when the test flushes
+    def __init__(self):
+        self.text = ""
+        self.scheduled = []
+        self.inserts = 0
+
+    def after(self, ms, callback):
+        self.scheduled.append(callback)
+        return len(self.scheduled)
+
+    def run_pending(self):
+        scheduled, self.scheduled = self.scheduled, []
+        for callback in scheduled:
+            callback()
+
+    def winfo_exists(self):
+        return True
+
+    def configure(self, **options):
+        pass
+
+    def see(self, index):
+        pass
+
+    def insert(self, index, text):
+        assert index == "end", index
+        self.text += text
+        self.inserts += 1
+
+    def delete(self, start, end):
+        assert start == "1.0"
+        if end == "end":
+            self.text = ""
+            return
+        line = int(end.split(".")[0])
+        self.text = "".join(self.text.splitlines(True)[line - 1:])
+
+    def lines(self):
+        return self.text.splitlines()
+
+
+class TerminalOutputTest(unittest.TestCase):
+    def setUp(self):
+        self.widget = FakeText()
+        self.output = vr.TerminalOutput(self.widget, scrollback=10)
+
+    def test_prints_are_batched_into_one_insert_per_frame(self):
+        for i in range(5):
+            self.output.print(f"line {i}")
+        self.assertEqual(len(self.widget.scheduled), 1)
+        self.widget.run_pending()
+        self.assertEqual(self.widget.inserts, 1)
+        self.assertEqual(self.widget.lines(), [f"line {i}" for i in range(5)])
+
+    def test_ring_keeps_only_the_last_scrollback_lines(self):
+        self.output.print("\n".join(str(i) for i in range(100000)))
+        self.assertEqual(len(self.output.pending), 10)
+        self.widget.run_pending()
+        self.assertEqual(self.widget.lines(), [str(i) for i in range(99990, 100000)])
+
+    def test_widget_is_trimmed_to_scrollback(self):
+        for frame in range(3):
+            for i in range(4):
+                self.output.print(f"{frame}.{i}")
+            self.widget.run_pending()
+        self.assertEqual(self.output.lines, 10)
+        self.assertEqual(self.widget.lines(), [f"{f}.{i}" for f in range(3) for i in range(4)][2:])
+
+    def test_set_scrollback_trims_widget(self):
+        self.output.print("\n".join(str(i) for i in range(8)))
+        self.widget.run_pending()
+        self.output.set_scrollback(3)
+        self.assertEqual(self.widget.lines(), ["5", "6", "7"])
+        self.assertEqual(self.output.lines, 3)
+
+    def test_clear(self):
+        self.output.print("a")
+        self.widget.run_pending()
+        self.output.print("b")
+        self.output.clear()
+        self.widget.run_pending()
+        self.assertEqual(self.widget.text, "")
+        self.assertEqual(self.output.lines, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
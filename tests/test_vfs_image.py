@@ -0,0 +1,132 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from support import load
+
+vr = load("VFSError", "Inode", "SnapNode", "VFSSnapshot", "VirtualFS", "BLOCK_SIZE",
+          "BlockCache", "BlockStore", "BlockFile", "JournalView", "VFSImage")
+
+
+class VFSImageTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, "vfs.img")
+        self.images = []
+
+    def tearDown(self):
+        for image in self.images:
+            self.close(image)
+        shutil.rmtree(self.dir)
+
+    def open(self, tree=None):
+        image = vr.VFSImage(self.path)
+        self.images.append(image)
+        return image, image.open(tree or {})
+
+    def close(self, image):
+        if image.journal and not image.journal.closed:
+            image.journal.close()
+        image.close_maps()
+
+    def paths(self, fs):
+        return [path for path, _ in fs.walk()]
+
+    def reopen(self, image):
+        self.close(image)
+        return self.open()
+
+    def test_journal_replays_on_open(self):
+        image, fs = self.open({"a": {}, "old.txt": "old"})
+        fs.mkdir("/b")
+        fs.create("/b/x.txt", "hello")
+        fs.append("/b/x.txt", " wörld")
+        fs.rename("/a", "c")
+        fs.delete("/old.txt")
+        image, fs = self.reopen(image)
+        self.assertEqual(self.paths(fs), ["/", "/b", "/b/x.txt", "/c"])
+        self.assertEqual(fs.read("/b/x.txt"), "hello wörld")
+        self.assertEqual(image.skipped, [])
+
+    def test_written_text_is_read_back_from_the_journal(self):
+        image, fs = self.open()
+        fs.create("/x.txt", "one")
+        fs.append("/x.txt", "two")
+        node = fs.get("/x.txt")
+        self.assertIsNone(node.data)
+        self.assertTrue(all(isinstance(piece[0], vr.JournalView) for piece in node.extent))
+        self.assertEqual(fs.read("/x.txt"), "onetwo")
+
+    def test_append_leaves_snapshots_alone(self):
+        image, fs = self.open({"x.txt": "one"})
+        fs.append("/x.txt", "two")
+        snap = fs.snapshot()
+        fs.append("/x.txt", "three")
+        self.assertEqual(vr.VirtualFS.content(snap.root.children["x.txt"]), "onetwo")
+        self.assertEqual(fs.read("/x.txt"), "onetwothree")
+
+    def test_torn_tail_is_dropped(self):
+        image, fs = self.open()
+        fs.create("/kept.txt", "kept")
+        image.journal.close()
+        size = os.path.getsize(image.journal_path)
+        with open(image.journal_path, "ab") as f:
+            f.write(b'{"op": "write", "path": "/torn.txt", "len": 50}\nshort')
+        image, fs = self.reopen(image)
+        self.assertEqual(fs.read("/kept.txt"), "kept")
+        self.assertFalse(fs.exists("/torn.txt"))
+        self.assertEqual(os.path.getsize(image.journal_path), size)
+
+    def test_journal_starts_with_its_generation(self):
+        image, fs = self.open()
+        with open(image.journal_path, "rb") as f:
+            head = json.loads(f.readline())
+        self.assertEqual(head, {"op": "journal", "generation": image.generation})
+        generation = image.generation
+        fs.create("/x.txt", "x")
+        image.checkpoint()
+        self.assertEqual(image.generation, generation + 1)
+        image, fs = self.reopen(image)
+        self.assertEqual(image.generation, generation + 1)
+        self.assertEqual(fs.read("/x.txt"), "x")
+
+    def test_journal_of_an_older_generation_is_not_replayed(self):
+        image, fs = self.open({"a": {}})
+        fs.create("/a/x.txt", "x")
+        fs.rename("/a", "b")
+        image.journal.flush()
+        with open(image.journal_path, "rb") as f:
+            folded = f.read()
+        image.checkpoint()
+        image.journal.close()
+        # A crash after the new image replaced the old one, before the journal was reset
+        with open(image.journal_path, "wb") as f:
+            f.write(folded)
+        image, fs = self.reopen(image)
+        self.assertEqual(self.paths(fs), ["/", "/b", "/b/x.txt"])
+        self.assertEqual(image.skipped, [])
+
+    def test_records_that_no_longer_apply_are_kept_aside(self):
+        image, fs = self.open()
+        image.journal.close()
+        with open(image.journal_path, "ab") as f:
+            f.write(b'{"op": "delete", "path": "/nope"}\n{"op": "mkdir", "path": "/e"}\n')
+        image, fs = self.reopen(image)
+        self.assertTrue(fs.isdir("/e"))
+        self.assertEqual([(op, path) for op, path, _ in image.skipped], [("delete", "/nope")])
+        with open(image.skipped_path, "rb") as f:
+            self.assertEqual(f.read(), b'{"op": "delete", "path": "/nope"}\n')
+        self.assertIn("1 record(s) skipped", image.stats()[-1])
+
+    def test_checkpoint_dedups_blocks(self):
+        text = "x" * (3 * vr.BLOCK_SIZE)
+        image, fs = self.open({"a.txt": text, "b.txt": text})
+        self.assertEqual(len(image.store.table), 1)
+        image, fs = self.reopen(image)
+        self.assertEqual(fs.read("/b.txt"), text)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,83 @@
+import unittest
+
+from support import load
+
+vr = load("VFSError", "Inode", "SnapNode", "VFSSnapshot", "VirtualFS")
+
+
+class VFSIndexTest(unittest.TestCase):
+    def setUp(self):
+        self.fs = vr.VirtualFS.from_dict({
+            "home": {"a.txt": "a", "sub": {"b.txt": "b"}},
+            "Notes.txt": "notes",
+        })
+
+    def assertIndexValid(self):
+        for path, node in self.fs.index.items():
+            self.assertIs(node, self.fs.lookup(path.rstrip("/") or "/"))
+            self.assertEqual(self.fs.path_of(node), path)
+
+    def test_lookup_fills_index_for_every_prefix(self):
+        node = self.fs.lookup("/home/sub/b.txt")
+        self.assertEqual(self.fs.read("/home/sub/b.txt"), "b")
+        self.assertIs(self.fs.index["/home/sub/b.txt"], node)
+        self.assertIn("/home/sub", self.fs.index)
+        self.assertIsNone(self.fs.lookup("/home/nope/b.txt"))
+        self.assertIsNone(self.fs.lookup("/home/a.txt/x"))
+        self.assertIndexValid()
+
+    def test_normpath(self):
+        self.assertEqual(vr.VirtualFS.normpath("../x/./y", "/home/sub"), "/home/x/y")
+        self.assertEqual(vr.VirtualFS.normpath("/../.."), "/")
+
+    def test_get_checks_kind(self):
+        with self.assertRaises(vr.VFSError):
+            self.fs.get("/home", want_dir=False)
+        with self.assertRaises(vr.VFSError):
+            self.fs.get("/Notes.txt", want_dir=True)
+        with self.assertRaises(vr.VFSError):
+            self.fs.get("/missing")
+
+    def test_rename_prunes_the_subtree(self):
+        self.fs.lookup("/home/sub/b.txt")
+        self.fs.rename("/home", "house")
+        self.assertFalse(any(path.startswith("/home") for path in self.fs.index))
+        self.assertEqual(self.fs.read("/house/sub/b.txt"), "b")
+        self.assertFalse(self.fs.exists("/home/sub/b.txt"))
+        self.assertIndexValid()
+
+    def test_delete_prunes_the_subtree(self):
+        self.fs.lookup("/home/sub/b.txt")
+        self.fs.delete("/home/sub")
+        self.assertFalse(self.fs.exists("/home/sub/b.txt"))
+        self.assertNotIn("/home/sub/b.txt", self.fs.index)
+        self.fs.mkdir("/home/sub")
+        self.assertEqual(self.fs.listdir("/home/sub"), [])
+        self.assertIndexValid()
+
+    def test_listing_is_cached_until_a_change(self):
+        names = [n.name for n in self.fs.listdir("/")]
+        self.assertEqual(names, ["home", "Notes.txt"])
+        self.assertIs(self.fs.listdir("/"), self.fs.listdir("/"))
+        self.fs.create("/a.txt", "x")
+        self.assertEqual([n.name for n in self.fs.listdir("/")], ["home", "Notes.txt", "a.txt"])
+
+    def test_watchers(self):
+        events = []
+        self.fs.watch("/home", lambda path, event: events.append((path, event)))
+        self.fs.watch("/home/sub", lambda path, event: events.append((path, event)))
+        self.fs.create("/home/c.txt")
+        self.fs.rename("/home", "house")
+        self.assertEqual(events, [("/home", "changed"), ("/home", "gone"), ("/home/sub", "gone")])
+
+    def test_snapshot_shares_untouched_subtrees(self):
+        before = self.fs.snapshot()
+        self.fs.write("/home/a.txt", "changed")
+        after = self.fs.snapshot()
+        self.assertIs(before.root.children["home"].children["sub"], after.root.children["home"].children["sub"])
+        self.assertEqual(vr.VirtualFS.content(before.root.children["home"].children["a.txt"]), "a")
+        self.assertEqual(vr.VirtualFS.content(after.root.children["home"].children["a.txt"]), "changed")
+
+
+if __name__ == "__main__":
+    unittest.main()